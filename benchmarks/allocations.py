@@ -0,0 +1,57 @@
+"""Memory allocated per frame and garbage collection pauses, with an optional budget
+
+Run from the repository root with: python -m benchmarks.allocations [--level NAME] [--frames N] [--budget BYTES]
+
+Updates and renders a level (an attribute of src.levels, or generate:<spec>) with an AllocationTracker running.
+With --budget, the run exits with status 1 if any frame allocated more than BYTES at its peak, so it can gate CI
+"""
+
+import argparse
+import json
+import sys
+
+from benchmarks.null_backend import NullBackend
+from src.allocation_tracker import AllocationTracker
+from src.datatypes.vector import window_manager
+
+
+def main() -> None:
+    """Prints the allocation summary, exiting with status 1 when a frame went over the budget"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--level", default="bouncy_level", help="level in src.levels to run, or generate:<spec> for a generated one"
+    )
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--budget", type=int, help="most bytes a frame may allocate")
+    parser.add_argument("--report", metavar="FILE", help="also write every frame to FILE as JSON")
+    args = parser.parse_args()
+
+    import src.levels as levels
+
+    box = levels.load(args.level)
+    backend = NullBackend()
+    window_manager.update()
+    box.update()
+    box.render(backend)  # warm up caches and buffers, so they don't count against the first frame
+
+    tracker = AllocationTracker(budget=args.budget)
+    tracker.start()
+    for _ in range(args.frames):
+        tracker.begin_frame()
+        window_manager.update()
+        box.update()
+        box.render(backend)
+        tracker.end_frame()
+    tracker.stop()
+
+    print(json.dumps(tracker.summary(), indent=4))
+    if args.report:
+        tracker.dump(args.report)
+    if tracker.over_budget:
+        worst = max(tracker.over_budget, key=lambda frame: frame.peak)
+        print(f"{len(tracker.over_budget)} frames over the budget of {args.budget} bytes, worst: {worst.peak} bytes")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Loading level files, parsing the JSON every time and through the compiled cache, and copying level prototypes"""
+
+import json
+from functools import partial
+from pathlib import Path
+from typing import Callable
+
+import pytest
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from src.levels.converter import level_to_dict
+from src.levels.generator import Mix, generate_level
+from src.levels.loader import load_level_file
+from src.levels.prototype import LevelPrototype
+
+OBJECT_COUNTS = (100, 1000)
+
+
+@pytest.fixture
+def level_file(tmp_path: Path) -> Callable[[int], str]:
+    """Gets a function writing a generated level of walls, lines and relative walls to a level file"""
+
+    def write(count: int) -> str:
+        path = tmp_path / f"level-{count}.json"
+        box = generate_level(count, seed=count, mix=Mix(walls=3, falling=0, circles=0, lines=1, relative=1))
+        path.write_text(json.dumps(level_to_dict(box)))
+        return str(path)
+
+    return write
+
+
+@pytest.mark.parametrize("count", OBJECT_COUNTS)
+def bench_load_parsed(benchmark: BenchmarkFixture, level_file: Callable[[int], str], count: int) -> None:
+    """Parsing, checking and building a level file"""
+    path = level_file(count)
+    benchmark(load_level_file, path, use_cache=False)
+
+
+@pytest.mark.parametrize("count", OBJECT_COUNTS)
+def bench_load_cached(benchmark: BenchmarkFixture, level_file: Callable[[int], str], count: int) -> None:
+    """Building a level file from its compiled cache"""
+    path = level_file(count)
+    load_level_file(path)  # fills the cache
+    benchmark(load_level_file, path)
+
+
+@pytest.mark.parametrize("count", OBJECT_COUNTS)
+def bench_instantiate_prototype(benchmark: BenchmarkFixture, level_file: Callable[[int], str], count: int) -> None:
+    """Making a fresh copy of a level from its prototype, instead of loading the level file again"""
+    prototype = LevelPrototype(partial(load_level_file, level_file(count)))
+    prototype.template  # builds it
+    benchmark(prototype.instantiate)
@@ -0,0 +1,70 @@
+"""Physics ticks: GameObject.update on its own and BoxState.update at several object counts
+
+Each round gets new objects. Forces applied during a tick are kept on the object, so updating the same objects
+over and over would get slower with every round and make the timings depend on the number of rounds
+"""
+
+from typing import Callable
+
+import pytest
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from src.box import BoxState
+from src.datatypes import GameObject, Vector
+from src.datatypes.triggers import Triggers
+from src.levels.generator import generate_level
+from src.sensors import SensorIndex
+
+OBJECT_COUNTS = (10, 25, 50)
+SENSOR_COUNTS = (100, 10_000)
+
+
+def bench_game_object_update(benchmark: BenchmarkFixture) -> None:
+    """One tick of a falling object touching nothing"""
+
+    def setup() -> tuple:
+        return (GameObject(position=Vector(10.0, 10.0), velocity=Vector(0.5, 0.0), collision=[]),), {}
+
+    benchmark.pedantic(lambda obj: obj.update(), setup=setup, rounds=2000)
+
+
+@pytest.mark.parametrize("count", OBJECT_COUNTS)
+def bench_box_update(benchmark: BenchmarkFixture, make_box: Callable[[int], BoxState], count: int) -> None:
+    """One tick of a box of moving objects, broad phase, narrow phase and integration"""
+
+    def setup() -> tuple:
+        return (make_box(count),), {}
+
+    benchmark.pedantic(lambda box: box.update(), setup=setup, rounds=max(5, 500 // count))
+
+
+@pytest.mark.parametrize("count", OBJECT_COUNTS)
+def bench_generated_update(benchmark: BenchmarkFixture, count: int) -> None:
+    """One tick of a generated level, where falling objects collide with walls"""
+
+    def setup() -> tuple:
+        return (generate_level(count, seed=count),), {}
+
+    benchmark.pedantic(lambda box: box.update(), setup=setup, rounds=max(5, 500 // count))
+
+
+@pytest.mark.parametrize("sensors", SENSOR_COUNTS)
+def bench_sensor_dispatch(benchmark: BenchmarkFixture, sensors: int) -> None:
+    """A tick of the sensor index where 10 objects move between sensors. Should not depend on the number of sensors"""
+    index = SensorIndex()
+    objects = []
+    for handle in range(sensors + 10):
+        obj = GameObject(triggers=Triggers([]) if handle < sensors else None)
+        obj.handle = handle
+        index.add(obj)
+        objects.append(obj)
+    movers = objects[sensors:]
+    tick = iter(range(1 << 62))
+
+    def step() -> None:
+        offset = next(tick)
+        for number, mover in enumerate(movers):  # each mover touches the next sensor every tick
+            index.report(mover, [(0, 90, objects[(offset + number) % sensors], 0)])
+        index.dispatch()
+
+    benchmark(step)
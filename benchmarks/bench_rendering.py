@@ -0,0 +1,52 @@
+"""Texture rasterisation and BoxState.render into a virtual screen"""
+
+from typing import Callable
+
+import pytest
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from benchmarks.render_backends import drift
+from src.box import BoxState
+from src.datatypes import Vector
+from src.datatypes.shape import Shape
+from src.datatypes.textures import SolidTexture
+from src.headless import VirtualScreen
+from src.levels.generator import generate_level
+
+OBJECT_COUNTS = (50, 200)
+GENERATED_COUNTS = (100, 1000)
+
+
+@pytest.mark.parametrize("shape", [Shape.Rectangle, Shape.Circle, Shape.Line], ids=lambda shape: shape.name)
+def bench_solid_texture(benchmark: BenchmarkFixture, shape: Shape) -> None:
+    """Rasterising a 20x10 solid texture into its tile buffer"""
+    texture = SolidTexture(char="#", colour=1)
+    benchmark(texture.render, Vector(5.0, 5.0), Vector(20, 10), 0, shape)
+
+
+@pytest.mark.parametrize("count", OBJECT_COUNTS)
+def bench_render_full(
+    benchmark: BenchmarkFixture, make_box: Callable[[int], BoxState], screen: VirtualScreen, count: int
+) -> None:
+    """Drawing a whole frame from scratch, as after a resize"""
+    box = make_box(count)
+    box.render(screen)
+    benchmark.pedantic(lambda: box.render(screen), setup=box.compositor.invalidate, rounds=100)
+
+
+@pytest.mark.parametrize("count", OBJECT_COUNTS)
+def bench_render_moving(
+    benchmark: BenchmarkFixture, make_box: Callable[[int], BoxState], screen: VirtualScreen, count: int
+) -> None:
+    """Drawing a frame after every object moved, only sending the cells that changed"""
+    box = make_box(count)
+    box.render(screen)
+    benchmark.pedantic(lambda: box.render(screen), setup=lambda: drift(box), rounds=100)
+
+
+@pytest.mark.parametrize("count", GENERATED_COUNTS)
+def bench_render_generated(benchmark: BenchmarkFixture, screen: VirtualScreen, count: int) -> None:
+    """Drawing a generated level from scratch, mostly walls and lines with some falling objects"""
+    box = generate_level(count, seed=count)
+    box.render(screen)
+    benchmark.pedantic(lambda: box.render(screen), setup=box.compositor.invalidate, rounds=50)
@@ -0,0 +1,42 @@
+"""Vector arithmetic and property resolution"""
+
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from src.datatypes import Vector
+
+
+def bench_add(benchmark: BenchmarkFixture) -> None:
+    """Adding two constant vectors"""
+    a = Vector(3, 4)
+    b = Vector(-1, 2)
+    benchmark(a.__add__, b)
+
+
+def bench_multiply(benchmark: BenchmarkFixture) -> None:
+    """Multiplying a vector by a scalar"""
+    a = Vector(3, 4)
+    benchmark(a.__mul__, 1.5)
+
+
+def bench_constant_x(benchmark: BenchmarkFixture) -> None:
+    """Reading x of a vector with only a constant part"""
+    a = Vector(3, 4)
+    benchmark(lambda: a.x)
+
+
+def bench_relative_x(benchmark: BenchmarkFixture) -> None:
+    """Reading x of a vector relative to the size and position of the window"""
+    a = Vector(3, 4, relative_x=0.5, ratio_x=0.25)
+    benchmark(lambda: a.x)
+
+
+def bench_magnitude(benchmark: BenchmarkFixture) -> None:
+    """Length of a vector"""
+    a = Vector(3, 4)
+    benchmark(lambda: a.magnitude)
+
+
+def bench_copy(benchmark: BenchmarkFixture) -> None:
+    """Copying a vector with its relative parts"""
+    a = Vector(3, 4, relative_x=0.5, relative_y=0.5)
+    benchmark(a.copy)
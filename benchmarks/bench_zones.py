@@ -0,0 +1,71 @@
+"""Trigger zones: finding the zones of hundreds of moving objects, with the interval index and with a scan"""
+
+import random
+from typing import List, Tuple
+
+import pytest
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from benchmarks.render_backends import drift
+from src.box import BoxState
+from src.datatypes import GameObject, Vector
+from src.zones import TriggerZone, ZoneIndex
+
+ROWS = 50
+COLS = 200
+ZONE_COUNTS = (100, 1000)
+BODIES = 300
+WINDOW_RECT = (0, 0, COLS, ROWS)
+
+
+def zones_and_bodies(zones: int, seed: int = 0) -> Tuple[List[TriggerZone], BoxState]:
+    """Creates small zones scattered over the screen, and a box of moving objects"""
+    rng = random.Random(seed)
+    zone_list = [
+        TriggerZone(
+            position=Vector(rng.uniform(0, COLS), rng.uniform(0, ROWS)),
+            size=Vector(rng.randint(1, 10), rng.randint(1, 4)),
+        )
+        for _ in range(zones)
+    ]
+    bodies = [
+        GameObject(
+            position=Vector(rng.uniform(0, COLS), rng.uniform(0, ROWS)),
+            velocity=Vector(rng.uniform(-1, 1), rng.uniform(-0.5, 0.5)),
+            collision=[],
+        )
+        for _ in range(BODIES)
+    ]
+    return zone_list, BoxState(initial_objects=bodies)
+
+
+@pytest.mark.parametrize("zones", ZONE_COUNTS)
+def bench_zone_index(benchmark: BenchmarkFixture, zones: int) -> None:
+    """A tick of 300 objects moving between zones, found through the interval index"""
+    zone_list, box = zones_and_bodies(zones)
+    index = ZoneIndex()
+    for zone in zone_list:
+        index.add(zone)
+
+    def step() -> None:
+        drift(box)
+        index.update(box.objects, WINDOW_RECT)
+
+    benchmark(step)
+
+
+@pytest.mark.parametrize("zones", ZONE_COUNTS)
+def bench_zone_scan(benchmark: BenchmarkFixture, zones: int) -> None:
+    """The same tick, checking every zone against every object, for comparison"""
+    zone_list, box = zones_and_bodies(zones)
+
+    def step() -> None:
+        drift(box)
+        zone_bounds = [zone.tile_bounds() for zone in zone_list]
+        for obj in box.objects:
+            x1, y1, x2, y2 = obj.tile_bounds()
+            for zone_x1, zone_y1, zone_x2, zone_y2 in zone_bounds:
+                if zone_x1 <= x2 and x1 <= zone_x2 and zone_y1 <= y2 and y1 <= zone_y2:
+                    pass
+
+    benchmark(step)
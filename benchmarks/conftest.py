@@ -0,0 +1,62 @@
+"""Shared fixtures of the pytest-benchmark suite (the bench_*.py files)
+
+Importing the benchmarks package switches to the headless window manager, so the suite runs without a terminal
+or a window, and rendering goes into a VirtualScreen
+"""
+
+import random
+from typing import Callable
+
+import pytest
+
+from src.box import BoxState
+from src.datatypes import GameObject, Vector
+from src.datatypes.shape import Shape
+from src.datatypes.textures import SolidTexture
+from src.datatypes.vector import window_manager
+from src.headless import VirtualScreen
+
+ROWS = 50
+COLS = 200
+
+
+@pytest.fixture(scope="session", autouse=True)
+def headless_window() -> None:
+    """Reads the (stand-in) window once, as the game loop does before the first frame"""
+    window_manager.update()
+
+
+@pytest.fixture
+def screen() -> VirtualScreen:
+    """Virtual screen the size of the headless terminal"""
+    return VirtualScreen(ROWS, COLS)
+
+
+def moving_object(rng: random.Random, index: int) -> GameObject:
+    """Creates a small object with a random shape, moving in a random direction
+
+    Objects don't collide: the physics of this tree fails on some overlapping objects, and the benchmarks
+    measure the cost of a tick, not the outcome of collisions
+    """
+    obj = GameObject(
+        position=Vector(rng.uniform(0, COLS), rng.uniform(0, ROWS)),
+        shape=rng.choice([Shape.Rectangle, Shape.Circle, Shape.Line]),
+        size=Vector(rng.randint(1, 8), rng.randint(1, 4)),
+        velocity=Vector(rng.uniform(-1, 1), rng.uniform(-0.5, 0.5)),
+        gravity=Vector(0, 0),
+        collision=[],
+        z=rng.randint(0, 3),
+    )
+    obj.texture = SolidTexture(char=chr(ord("a") + index % 26), colour=rng.randint(1, 255), obj=obj)
+    return obj
+
+
+@pytest.fixture
+def make_box() -> Callable[[int], BoxState]:
+    """Gets a function creating a box of moving objects. Boxes with the same number of objects are identical"""
+
+    def make(count: int, seed: int = 0) -> BoxState:
+        rng = random.Random(seed)
+        return BoxState(initial_objects=[moving_object(rng, index) for index in range(count)])
+
+    return make
@@ -0,0 +1,34 @@
+"""A render backend for benchmarks that should time and count the work of the game, not of a terminal"""
+
+from typing import NoReturn, Tuple
+
+from src.render_backends import RenderBackend
+
+
+class NullBackend(RenderBackend):
+    """Backend that discards everything drawn with it
+
+    Unlike src.headless.VirtualScreen, it keeps no grid of characters, so drawing allocates nothing and costs next
+    to nothing. Calls are still counted
+    """
+
+    def __init__(self, rows: int = 50, cols: int = 200):
+        super().__init__()
+        self.rows = rows
+        self.cols = cols
+
+    def get_size(self) -> Tuple[int, int]:
+        """Gets the size of the screen as (rows, columns)"""
+        return self.rows, self.cols
+
+    def clear(self) -> NoReturn:
+        """Counts the call, there is nothing to blank"""
+        self.calls += 1
+
+    def draw_run(self, y: int, x: int, text: str, colour: int, last_cell: bool = False) -> NoReturn:
+        """Counts the call, the run is discarded"""
+        self.calls += 1
+
+    def flush(self) -> NoReturn:
+        """Counts the call, there is nothing to show"""
+        self.calls += 1
@@ -0,0 +1,190 @@
+"""Bytes written to the terminal and calls made to it per frame, measured on a pseudo-terminal
+
+Run from the repository root with: python -m benchmarks.output_bytes [level] [frames] [backend] [order]
+
+The level (an attribute of src.levels, bouncy_level by default, or generate:<spec>) is rendered by a child process
+whose terminal is a pty, with the given render backend (curses by default). After every frame the child signals
+the parent through a pipe, so the parent can attribute everything read from the pty to the frame that produced it.
+
+The order is how the compositor sends changed cells: grouped (by colour, in runs along rows, the default) or
+row (one cell at a time in screen order, as before cells were grouped). Grouping makes far fewer calls with
+curses, but it only writes fewer bytes with the ansi backend, which switches colour once per group instead of
+whenever the colour changes along the screen. With curses it does not reduce the bytes written: ncurses builds the
+output at refresh() by scanning the screen in row order, whatever order the cells were drawn in. The runs are
+deterministic, so the few bytes more seen with curses come from how ncurses happens to move the cursor.
+Bytes (and calls) over the first 30 frames on a 200x50 terminal:
+
+    level                        backend  row order         grouped
+    bouncy_level                 curses     645 B (127)       664 B (89)     +2.9%
+    second_level                 curses     466 B (146)       466 B (96)
+    generate:count=300,seed=1    curses   30443 B (5406)    30593 B (1406)   +0.5%
+    bouncy_level                 ansi       592 B             592 B
+    second_level                 ansi       454 B             454 B
+    generate:count=300,seed=1    ansi     23796 B           22691 B          -4.6%, median frame 456 -> 432 B
+"""
+
+import curses
+import fcntl
+import os
+import pty
+import select
+import statistics
+import struct
+import sys
+import termios
+import time
+from typing import Any, Callable, List, NoReturn, Optional, Tuple
+
+ROWS = 50
+COLS = 200
+FRAME_REPORT = struct.Struct("Id")  # calls, seconds spent rendering
+
+
+def load_level(level_name: str) -> Callable[[], Any]:
+    """Gets a function loading a level from src.levels by name. The level is only imported in the child"""
+
+    def load() -> Any:
+        import src.levels as levels
+
+        return levels.load(level_name)
+
+    return load
+
+
+def row_order(blit: Callable) -> Callable:
+    """Wraps Compositor._blit to send the cells it draws one at a time in screen order, without grouping"""
+
+    def blit_in_row_order(compositor: Any, backend: Any, damaged: Any) -> NoReturn:
+        runs = []
+        draw_run = backend.draw_run
+        backend.draw_run = lambda *run, **kwargs: runs.append((run, kwargs))
+        try:
+            blit(compositor, backend, damaged)
+        finally:
+            del backend.draw_run
+        cells = []
+        for (y, x, text, colour), kwargs in runs:
+            for offset, char in enumerate(text):
+                last_cell = kwargs.get("last_cell", False) and offset == len(text) - 1
+                cells.append((y, x + offset, char, colour, last_cell))
+        for cell in sorted(cells):
+            draw_run(*cell)
+
+    return blit_in_row_order
+
+
+def run_child(
+    load_box: Callable[[], Any],
+    frames: int,
+    backend_name: str,
+    step: Optional[Callable[[Any], Any]],
+    order: str,
+    signal_fd: int,
+) -> NoReturn:
+    """Renders the box in the pty, writing the calls and render time of each frame to signal_fd"""
+    fcntl.ioctl(sys.stdout.fileno(), termios.TIOCSWINSZ, struct.pack("HHHH", ROWS, COLS, 0, 0))
+    os.environ["TERM"] = "xterm-256color"
+
+    from src.compositor import Compositor
+    from src.datatypes.vector import window_manager
+    from src.render_backends import CursesBackend, render_backends
+
+    if order == "row":
+        Compositor._blit = row_order(Compositor._blit)
+
+    def main(screen: curses.window) -> NoReturn:
+        curses.curs_set(False)
+        box = load_box()
+        backend = CursesBackend(screen) if backend_name == "curses" else render_backends[backend_name]()
+        for _ in range(frames):
+            window_manager.update()
+            if step is None:
+                box.update()
+            else:
+                step(box)
+            backend.calls = 0
+            start = time.perf_counter()
+            box.render(backend)
+            elapsed = time.perf_counter() - start
+            os.write(signal_fd, FRAME_REPORT.pack(backend.calls, elapsed))
+
+    curses.wrapper(main)
+    os._exit(0)
+
+
+def read_pty(master: int) -> int:
+    """Reads what is available on the pty, returning the number of bytes. 0 once the child closed it"""
+    try:
+        return len(os.read(master, 65536))
+    except OSError:  # EIO on Linux when the child has exited
+        return 0
+
+
+def measure(
+    load_box: Callable[[], Any],
+    frames: int,
+    backend_name: str = "curses",
+    step: Optional[Callable[[Any], Any]] = None,
+    order: str = "grouped",
+) -> List[Tuple[int, int, float]]:
+    """Gets (bytes written, calls, seconds spent rendering) for every frame
+
+    :param load_box: Function creating the BoxState to render. It is called in the child process
+    :param step: Function advancing the box by a frame, BoxState.update by default
+    :param order: "grouped" or "row", see the module docstring
+    """
+    read_fd, write_fd = os.pipe()
+    pid, master = pty.fork()
+    if pid == 0:
+        os.close(read_fd)
+        run_child(load_box, frames, backend_name, step, order, write_fd)
+    os.close(write_fd)
+
+    results = []
+    frame_bytes = 0
+    while len(results) < frames:
+        readable, _, _ = select.select([master, read_fd], [], [], 5)
+        if not readable:
+            raise TimeoutError("The child stopped producing frames")
+        if master in readable:
+            frame_bytes += read_pty(master)
+        if read_fd in readable:
+            report = os.read(read_fd, FRAME_REPORT.size)
+            if not report:
+                raise RuntimeError("The child exited before rendering every frame")
+            calls, elapsed = FRAME_REPORT.unpack(report)
+            # The frame is fully written by now, pick up what is still buffered in the pty
+            while select.select([master], [], [], 0)[0]:
+                received = read_pty(master)
+                if not received:
+                    break
+                frame_bytes += received
+            results.append((frame_bytes, calls, elapsed))
+            frame_bytes = 0
+
+    os.waitpid(pid, 0)
+    return results
+
+
+def main() -> None:
+    """Prints the bytes and calls of the first frame and the median of the rest"""
+    level_name = sys.argv[1] if len(sys.argv) > 1 else "bouncy_level"
+    frames = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    backend_name = sys.argv[3] if len(sys.argv) > 3 else "curses"
+    order = sys.argv[4] if len(sys.argv) > 4 else "grouped"
+    if order not in ("grouped", "row"):
+        raise ValueError(f"Unknown order {order!r}, expected grouped or row")
+    results = measure(load_level(level_name), frames, backend_name, order=order)
+
+    first_bytes, first_calls, _ = results[0]
+    print(f"{level_name}, {backend_name} backend, {order} order, {ROWS}x{COLS} terminal, {frames} frames")
+    print(f"first frame:   {first_bytes:>8} bytes {first_calls:>6} calls")
+    print(
+        f"median frame:  {statistics.median(r[0] for r in results[1:]):>8} bytes "
+        f"{statistics.median(r[1] for r in results[1:]):>6} calls"
+    )
+    print(f"total:         {sum(r[0] for r in results):>8} bytes {sum(r[1] for r in results):>6} calls")
+
+
+if __name__ == "__main__":
+    main()
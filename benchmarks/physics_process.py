@@ -0,0 +1,91 @@
+"""Throughput and latency of the physics worker process, compared with updating and rendering in one process
+
+Run from the repository root with: python -m benchmarks.physics_process [--level NAME] [--frames N] [--fps FPS]
+
+Both modes render the level (an attribute of src.levels, or generate:<spec>) into a VirtualScreen, --frames times.
+Single process: each frame updates then renders the level, as the game loop does. The frame is as old as the time
+it took. Worker process: each frame copies the latest tick published by the worker and renders it, while the worker
+ticks at --fps (as fast as it can with --fps 0). A frame is as old as the tick it shows, plus the time to render it.
+Run it on a machine with at least two cores: on a single core the worker only takes time away from rendering
+"""
+
+import argparse
+import json
+import os
+import time
+from functools import partial
+
+import src.levels as levels
+from src.datatypes.vector import window_manager
+from src.frame_stats import PhaseTimers
+from src.headless import VirtualScreen
+from src.physics_process import PhysicsProcess
+
+
+def single_process(level_name: str, frames: int) -> dict:
+    """Updates and renders the level in this process"""
+    box = levels.load(level_name)
+    screen = VirtualScreen()
+    timers = PhaseTimers(window=frames)
+    start = time.perf_counter()
+    for _ in range(frames):
+        frame_start = time.perf_counter()
+        timers.start()
+        box.update(timers)
+        timers.start()
+        box.render(screen)
+        timers.lap("render")
+        timers.add("frame age", time.perf_counter() - frame_start)
+    elapsed = time.perf_counter() - start
+    return {"frames_per_second": frames / elapsed, "ticks_per_second": frames / elapsed, "phases": timers.summary()}
+
+
+def worker_process(level_name: str, frames: int, fps: int) -> dict:
+    """Renders the level in this process, while a worker process updates it"""
+    box = levels.load(level_name)
+    screen = VirtualScreen()
+    timers = PhaseTimers(window=frames)
+    physics = PhysicsProcess(partial(levels.load, level_name), box, max_fps=fps or None)
+    physics.start()
+    while not physics.sync():
+        time.sleep(0.001)  # the worker is still building the level
+
+    first_tick = physics.tick
+    start = time.perf_counter()
+    for _ in range(frames):
+        timers.start()
+        if physics.sync():
+            timers.add("worker tick", physics.tick_times[-1])
+        age = physics.latencies[-1] if physics.latencies else 0.0
+        timers.lap("sync")
+        render_start = time.perf_counter()
+        box.render(screen)
+        timers.lap("render")
+        timers.add("frame age", age + time.perf_counter() - render_start)
+    elapsed = time.perf_counter() - start
+    ticks = physics.tick - first_tick
+    physics.stop()
+    return {"frames_per_second": frames / elapsed, "ticks_per_second": ticks / elapsed, "phases": timers.summary()}
+
+
+def main() -> None:
+    """Prints the throughput and latency of both modes as JSON"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--level", default="bouncy_level", help="level in src.levels to run, or generate:<spec> for a generated one"
+    )
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--fps", type=int, default=0, help="ticks per second of the worker, 0 for as fast as it can")
+    args = parser.parse_args()
+
+    window_manager.update()
+    report = {
+        "cpus": os.cpu_count(),
+        "single_process": single_process(args.level, args.frames),
+        "worker_process": worker_process(args.level, args.frames, args.fps),
+    }
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Compares the render backends on a busy scene, measured on a pseudo-terminal
+
+Run from the repository root with: python -m benchmarks.render_backends [objects] [frames]
+
+Many small, differently coloured objects drift across the screen, so a large part of the screen changes
+every frame. Objects are moved directly rather than through BoxState.update, so the benchmark
+measures rendering alone. Each backend renders the same scene in a child process (see benchmarks.output_bytes),
+reporting the bytes sent to the terminal, the calls made to it and the time spent rendering per frame
+"""
+
+import random
+import statistics
+import sys
+from typing import Any, Callable
+
+from benchmarks.output_bytes import COLS, ROWS, measure
+
+BACKENDS = ("curses", "ansi")
+
+
+def busy_scene(count: int, seed: int = 0) -> Callable[[], Any]:
+    """Gets a function creating a box full of moving objects. It is called in the child process"""
+
+    def load() -> Any:
+        from src.box import BoxState
+        from src.datatypes import GameObject, Vector
+        from src.datatypes.shape import Shape
+        from src.datatypes.textures import SolidTexture
+
+        rng = random.Random(seed)
+        objects = []
+        for index in range(count):
+            obj = GameObject(
+                position=Vector(rng.uniform(0, COLS), rng.uniform(0, ROWS)),
+                shape=rng.choice([Shape.Rectangle, Shape.Circle, Shape.Line]),
+                size=Vector(rng.randint(1, 8), rng.randint(1, 4)),
+                velocity=Vector(rng.uniform(-1, 1), rng.uniform(-0.5, 0.5)),
+                gravity=Vector(0, 0),
+                collision=[],
+                z=rng.randint(0, 3),
+            )
+            obj.texture = SolidTexture(char=chr(ord("a") + index % 26), colour=rng.randint(1, 255), obj=obj)
+            objects.append(obj)
+        return BoxState(initial_objects=objects)
+
+    return load
+
+
+def drift(box: Any) -> None:
+    """Moves every object of the box by its velocity"""
+    for obj in box.objects:
+        obj.position += obj.velocity
+
+
+def main() -> None:
+    """Prints the median bytes, calls and render time per frame of every backend"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    frames = int(sys.argv[2]) if len(sys.argv) > 2 else 60
+    print(f"{count} moving objects, {ROWS}x{COLS} terminal, {frames} frames, medians per frame")
+    print(f"{'backend':<10}{'bytes':>10}{'calls':>10}{'render ms':>12}")
+    for backend_name in BACKENDS:
+        results = measure(busy_scene(count), frames, backend_name, step=drift)[1:]  # the first frame draws everything
+        print(
+            f"{backend_name:<10}"
+            f"{statistics.median(r[0] for r in results):>10.0f}"
+            f"{statistics.median(r[1] for r in results):>10.0f}"
+            f"{statistics.median(r[2] for r in results) * 1000:>12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
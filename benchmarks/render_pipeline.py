@@ -0,0 +1,119 @@
+"""Frame times with the level drawn on the loop's thread, and drawn on a render thread from frame snapshots
+
+Run from the repository root with: python -m benchmarks.render_pipeline [--level NAME] [--frames N] [--depth N]
+
+Both modes tick the level (an attribute of src.levels, or generate:<spec>) --frames times and draw it through an
+AnsiBackend writing to a pseudo-terminal, which a thread keeps draining. Serial: each frame updates then draws the
+level. Pipelined: each frame updates the level, takes a snapshot and queues it for the render thread, which draws
+it while the next tick runs. A frame time is the time the loop spent on the frame, the frame age is the time from
+the end of its tick until it is on the terminal
+"""
+
+import argparse
+import fcntl
+import json
+import os
+import pty
+import struct
+import termios
+import threading
+import time
+from functools import partial
+from typing import NoReturn, Tuple
+
+import src.levels as levels
+from src.datatypes.vector import window_manager
+from src.frame_stats import PhaseTimers
+from src.levels.prototype import LevelPrototype
+from src.render_backends import AnsiBackend
+from src.render_pipeline import RenderPipeline
+
+ROWS = 50
+COLS = 200
+
+
+def open_terminal() -> Tuple[int, int]:
+    """Opens a pseudo-terminal of ROWS by COLS, with a thread reading everything written to it
+
+    :return: (master, slave) file descriptors
+    """
+    master, slave = pty.openpty()
+    fcntl.ioctl(slave, termios.TIOCSWINSZ, struct.pack("HHHH", ROWS, COLS, 0, 0))
+
+    def drain() -> NoReturn:
+        try:
+            while os.read(master, 65536):
+                pass
+        except OSError:  # closed
+            pass
+
+    threading.Thread(target=drain, daemon=True).start()
+    return master, slave
+
+
+def serial(prototype: LevelPrototype, frames: int) -> dict:
+    """Updates then draws a fresh copy of the level, on this thread"""
+    box = prototype.instantiate()
+    master, slave = open_terminal()
+    backend = AnsiBackend(fd=slave)
+    timers = PhaseTimers(window=frames)
+    start = time.perf_counter()
+    for _ in range(frames):
+        frame_start = time.perf_counter()
+        window_manager.update()
+        box.update()
+        tick_end = time.perf_counter()
+        box.render(backend)
+        now = time.perf_counter()
+        timers.add("frame", now - frame_start)
+        timers.add("frame age", now - tick_end)
+    elapsed = time.perf_counter() - start
+    os.close(slave)
+    os.close(master)
+    return {"frames_per_second": frames / elapsed, "phases": timers.summary()}
+
+
+def pipelined(prototype: LevelPrototype, frames: int, depth: int) -> dict:
+    """Updates a fresh copy of the level on this thread, while a render thread draws the snapshots of its frames"""
+    box = prototype.instantiate()
+    master, slave = open_terminal()
+    pipeline = RenderPipeline(AnsiBackend(fd=slave), depth=depth)
+    pipeline.timers.window = frames
+    timers = PhaseTimers(window=frames)
+    pipeline.start()
+    start = time.perf_counter()
+    for _ in range(frames):
+        frame_start = time.perf_counter()
+        window_manager.update()
+        box.update()
+        pipeline.submit(box.compositor, box.snapshot())
+        timers.add("frame", time.perf_counter() - frame_start)
+    pipeline.drain()
+    elapsed = time.perf_counter() - start
+    pipeline.stop()
+    os.close(slave)
+    os.close(master)
+    return {"frames_per_second": frames / elapsed, "phases": timers.summary(), "render_thread": pipeline.summary()}
+
+
+def main() -> None:
+    """Prints the frame times of both modes as JSON"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--level", default="bouncy_level", help="level in src.levels to run, or generate:<spec> for a generated one"
+    )
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--depth", type=int, default=1, help="snapshots that can wait for the render thread")
+    args = parser.parse_args()
+
+    window_manager.update()
+    prototype = LevelPrototype(partial(levels.load, args.level))  # both modes start from the level as it was built
+    report = {
+        "serial": serial(prototype, args.frames),
+        "pipelined": pipelined(prototype, args.frames, args.depth),
+    }
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Microbenchmarks for the BoxState spatial query API
+
+Run from the repository root with: python -m benchmarks.spatial_query
+
+Compares query_point, query_rect and raycast against a linear scan over BoxState.objects
+as the number of objects grows. The indexed timings should stay roughly flat while the scan grows linearly
+"""
+
+import random
+import timeit
+from typing import List
+
+from src.box import BoxState
+from src.datatypes import Vector
+from src.datatypes.vector import window_manager
+from src.levels.objects.static import Wall
+
+OBJECT_COUNTS = (100, 1_000, 10_000)
+QUERIES = 200
+SCAN_QUERIES = 5  # the linear scan is far too slow to push every query through it
+WORLD_SIZE = 2_000
+
+
+def build_box(count: int, rng: random.Random) -> BoxState:
+    """Builds a level with `count` small walls scattered over the world"""
+    objects = []
+    for _ in range(count):
+        position = Vector(rng.randrange(WORLD_SIZE), rng.randrange(WORLD_SIZE))
+        size = Vector(rng.randint(1, 6), rng.randint(1, 3))
+        objects.append(Wall(position=position, size=size, collision=[rng.randint(0, 3)]))
+    return BoxState(initial_objects=objects)
+
+
+def linear_point(box: BoxState, x: int, y: int) -> List[Wall]:
+    """What a query_point call used to look like"""
+    found = []
+    for obj in box.objects:
+        x1, y1, x2, y2 = obj.tile_bounds()
+        if x1 <= x <= x2 and y1 <= y <= y2:
+            found.append(obj)
+    return found
+
+
+def main() -> None:
+    """Prints the time per query for every object count"""
+    window_manager.update()
+    rng = random.Random(0)
+    print(f"{'objects':>8} {'point':>10} {'rect':>10} {'raycast':>10} {'scan':>10}   (microseconds per query)")
+    for count in OBJECT_COUNTS:
+        box = build_box(count, rng)
+        points = [Vector(rng.randrange(WORLD_SIZE), rng.randrange(WORLD_SIZE)) for _ in range(QUERIES)]
+        box.query_point(points[0])  # builds the index
+
+        def run_points() -> None:
+            for point in points:
+                box.query_point(point, mask=[1])
+
+        def run_rects() -> None:
+            for point in points:
+                box.query_rect(point, Vector(16, 8), mask=[1])
+
+        def run_rays() -> None:
+            for point in points:
+                box.raycast(point, Vector(1, 1), max_distance=64, mask=[1])
+
+        def run_scan() -> None:
+            for point in points[:SCAN_QUERIES]:
+                linear_point(box, round(point.x), round(point.y))
+
+        timings = [
+            min(timeit.repeat(run, number=1, repeat=5)) / QUERIES * 1e6 for run in (run_points, run_rects, run_rays)
+        ]
+        timings.append(min(timeit.repeat(run_scan, number=1, repeat=1)) / SCAN_QUERIES * 1e6)
+        print(f"{count:>8} " + " ".join(f"{timing:>10.1f}" for timing in timings))
+
+
+if __name__ == "__main__":
+    main()
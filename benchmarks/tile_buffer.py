@@ -0,0 +1,73 @@
+"""Allocation counts and frame time for a full-screen scene
+
+Run from the repository root with: python -m benchmarks.tile_buffer
+
+Renders a single moving object covering the whole screen, so every cell goes through the texture buffer
+and the compositor each frame. For comparison, the same tiles are also produced the way textures used to,
+as a list of [Vector, char, colour] per tile
+"""
+
+import time
+import tracemalloc
+from typing import List
+
+from benchmarks.null_backend import NullBackend
+from src.box import BoxState
+from src.datatypes import GameObject, Vector
+from src.datatypes.textures import SolidTexture
+from src.datatypes.vector import window_manager
+
+ROWS = 50
+COLS = 200
+FRAMES = 50
+
+
+def legacy_tiles(obj: GameObject) -> List[list]:
+    """Rasterises a rectangle like Texture._buffer_tile used to"""
+    tiles = []
+    position = obj.position
+    size = obj.size
+    for x in range(round(position.x), round(position.x + size.x), 1):
+        for y in range(round(position.y), round(position.y + size.y), 1):
+            tiles.append([Vector(x, y), "#", 1])
+    return tiles
+
+
+def measure(label: str, frame: callable) -> None:
+    """Prints the time and the allocations of one frame"""
+    frame()  # warm up, so buffers have reached their final size
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        frame()
+    elapsed = (time.perf_counter() - start) / FRAMES
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    blocks_before = tracemalloc.take_snapshot().statistics("filename")
+    frame()
+    blocks_after = tracemalloc.take_snapshot().statistics("filename")
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    retained = sum(stat.count for stat in blocks_after) - sum(stat.count for stat in blocks_before)
+    print(f"{label:<28} {elapsed * 1000:>9.2f} ms {(peak - before) / 1024:>10.1f} KiB {retained:>9}")
+
+
+def main() -> None:
+    """Prints frame time, peak allocated memory and blocks still alive after a frame"""
+    window_manager.update()
+    obj = GameObject(position=Vector(0, 0), size=Vector(COLS, ROWS))
+    obj.texture = SolidTexture(char="#", colour=1, obj=obj)
+    box = BoxState(initial_objects=[obj])
+    backend = NullBackend(ROWS, COLS)
+
+    print(f"{ROWS * COLS} tiles per frame")
+    print(f"{'':<28} {'frame time':>12} {'peak alloc':>14} {'blocks':>9}")
+    measure("legacy [Vector, char, colour]", lambda: legacy_tiles(obj))
+    measure("texture into TileBuffer", obj.render)
+    measure("full BoxState.render", lambda: box.render(backend))
+
+
+if __name__ == "__main__":
+    main()
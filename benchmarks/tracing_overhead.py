@@ -0,0 +1,81 @@
+"""Frame time with tracing off and on
+
+Run from the repository root with: python -m benchmarks.tracing_overhead [objects] [frames] [repeats]
+
+Runs the phases of a game frame (update, timed with PhaseTimers, and render) on a busy scene, with the tracer off
+and tracing into a temporary file with the background writer running. The two are measured in turns, repeats times
+each, so a slowdown of the machine during the run hits both alike. The median and the minimum of the repeats are
+reported, along with the spread of the runs with tracing off: differences smaller than it are noise
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import List
+
+from benchmarks.null_backend import NullBackend
+from benchmarks.render_backends import busy_scene, drift
+from src.datatypes.vector import window_manager
+from src.frame_stats import PhaseTimers
+from src.tracing import tracer
+
+ROWS = 50
+COLS = 200
+
+
+def frame_time(count: int, frames: int) -> float:
+    """Gets the mean time of a frame in seconds"""
+    box = busy_scene(count)()
+    backend = NullBackend(ROWS, COLS)
+    timers = PhaseTimers()
+    start = time.perf_counter()
+    for _ in range(frames):
+        timers.start()
+        window_manager.update()
+        timers.lap("window manager")
+        drift(box)
+        timers.lap("update")
+        box.render(backend)
+        timers.lap("render")
+    return (time.perf_counter() - start) / frames
+
+
+def describe(label: str, times: List[float], baseline: List[float]) -> str:
+    """Formats the median and minimum frame time of a mode, and how they compare to the baseline"""
+    median = statistics.median(times)
+    best = min(times)
+    return (
+        f"{label:<13}median {median * 1000:8.3f} ms ({(median / statistics.median(baseline) - 1) * 100:+5.1f}%)"
+        f"   min {best * 1000:8.3f} ms ({(best / min(baseline) - 1) * 100:+5.1f}%)"
+    )
+
+
+def main() -> None:
+    """Prints the median and minimum frame time with tracing off and on"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    frames = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    repeats = int(sys.argv[3]) if len(sys.argv) > 3 else 15
+    window_manager.update()
+    frame_time(count, frames)  # warm up caches, so the first run doesn't count against tracing off
+
+    off = []
+    on = []
+    dropped = 0
+    with tempfile.TemporaryDirectory() as directory:
+        for repeat in range(repeats):
+            off.append(frame_time(count, frames))
+            tracer.start(os.path.join(directory, f"trace{repeat}.json"))
+            on.append(frame_time(count, frames))
+            tracer.stop()
+            dropped += tracer.dropped
+
+    spread = (max(off) / min(off) - 1) * 100
+    print(f"{count} objects, {frames} frames, {repeats} runs of each")
+    print(describe("tracing off:", off, off) + f"   spread of the runs {spread:.1f}%")
+    print(describe("tracing on:", on, off) + f"   {dropped} events dropped")
+
+
+if __name__ == "__main__":
+    main()
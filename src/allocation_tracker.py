@@ -0,0 +1,155 @@
+import gc
+import json
+import os
+import time
+import tracemalloc
+from collections import Counter, namedtuple
+from typing import Dict, List, NoReturn, Optional
+
+from .tracing import tracer
+
+SRC_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+# Memory allocated during a frame. net: bytes still held at the end of the frame, peak: the most held at once
+# (above the start of the frame), blocks: change in the number of memory blocks, lines: net bytes per src line
+FrameAllocations = namedtuple("FrameAllocations", ["frame", "net", "peak", "blocks", "lines"])
+GcPause = namedtuple("GcPause", ["frame", "generation", "duration", "collected"])
+
+
+class AllocationBudgetExceeded(Exception):
+    """A frame allocated more memory than the budget allows"""
+
+    def __init__(self, allocations: FrameAllocations, budget: int):
+        self.allocations = allocations
+        self.budget = budget
+        super().__init__(f"Frame {allocations.frame} allocated {allocations.peak} bytes, over the budget of {budget}")
+
+
+class AllocationTracker:
+    """Measures the memory allocated by every frame with tracemalloc, and times garbage collections
+
+    Call begin_frame() and end_frame() around each frame. Each frame takes two tracemalloc snapshots,
+    which is slow, so this is an instrumentation mode and not something to leave on.
+    Allocations are attributed to lines of files under src/. Garbage collections are timed through gc.callbacks
+    and recorded with the frame they happened in, so GC pauses can be matched with slow frames
+    """
+
+    def __init__(self, budget: Optional[int] = None, strict: bool = False, top: int = 10):
+        """Initialize a tracker that is not running
+
+        :param budget: Most bytes a frame may allocate (its peak above the start of the frame). None for no limit
+        :param strict: Raise AllocationBudgetExceeded from end_frame() when a frame goes over the budget,
+        instead of only counting it
+        :param top: Number of src lines kept per frame, biggest first
+        """
+        self.budget = budget
+        self.strict = strict
+        self.top = top
+
+        self.frames: List[FrameAllocations] = []
+        self.over_budget: List[FrameAllocations] = []
+        self.gc_pauses: List[GcPause] = []
+
+        # Only allocations made by the game's own code, leaving out the snapshots of this tracker
+        self._filters = [
+            tracemalloc.Filter(True, os.path.join(SRC_DIRECTORY, "*")),
+            tracemalloc.Filter(False, __file__),
+        ]
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self._frame_start_memory = 0
+        self._gc_start = 0.0
+        self._started_tracemalloc = False
+
+    def start(self) -> NoReturn:
+        """Starts tracing allocations and garbage collections"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        gc.callbacks.append(self._gc_callback)
+
+    def stop(self) -> NoReturn:
+        """Stops tracing. Recorded frames and pauses are kept"""
+        if self._gc_callback in gc.callbacks:
+            gc.callbacks.remove(self._gc_callback)
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        self._snapshot = None
+
+    def begin_frame(self) -> NoReturn:
+        """Marks the start of a frame"""
+        self._snapshot = tracemalloc.take_snapshot().filter_traces(self._filters)
+        tracemalloc.reset_peak()
+        self._frame_start_memory = tracemalloc.get_traced_memory()[0]
+
+    def end_frame(self) -> FrameAllocations:
+        """Marks the end of a frame, recording what it allocated"""
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces(self._filters)
+        differences = snapshot.compare_to(self._snapshot, "lineno")
+        self._snapshot = None
+
+        lines = {}
+        for difference in sorted(differences, key=lambda difference: difference.size_diff, reverse=True)[: self.top]:
+            if difference.size_diff <= 0:
+                break
+            frame = difference.traceback[0]
+            lines[f"{os.path.relpath(frame.filename, SRC_DIRECTORY)}:{frame.lineno}"] = difference.size_diff
+        allocations = FrameAllocations(
+            frame=len(self.frames),
+            net=current - self._frame_start_memory,
+            peak=peak - self._frame_start_memory,
+            blocks=sum(difference.count_diff for difference in differences),
+            lines=lines,
+        )
+        self.frames.append(allocations)
+
+        if self.budget is not None and allocations.peak > self.budget:
+            self.over_budget.append(allocations)
+            if self.strict:
+                raise AllocationBudgetExceeded(allocations, self.budget)
+        return allocations
+
+    def summary(self) -> dict:
+        """Statistics over every frame recorded"""
+        peaks = sorted(frame.peak for frame in self.frames)
+        lines = Counter()
+        for frame in self.frames:
+            lines.update(frame.lines)
+        gc_time = sum(pause.duration for pause in self.gc_pauses)
+        return {
+            "frames": len(self.frames),
+            "budget": self.budget,
+            "over_budget": len(self.over_budget),
+            "peak_bytes": {
+                "p50": peaks[len(peaks) // 2] if peaks else 0,
+                "max": peaks[-1] if peaks else 0,
+            },
+            "net_bytes_per_frame": sum(frame.net for frame in self.frames) / len(self.frames) if self.frames else 0,
+            "top_lines": dict(lines.most_common(self.top)),  # net bytes over every frame
+            "gc": {
+                "collections": len(self.gc_pauses),
+                "total_seconds": gc_time,
+                "max_seconds": max((pause.duration for pause in self.gc_pauses), default=0.0),
+            },
+        }
+
+    def dump(self, path: str) -> NoReturn:
+        """Writes the summary, every frame and every garbage collection to a JSON file"""
+        report = {
+            "summary": self.summary(),
+            "frames": [frame._asdict() for frame in self.frames],
+            "gc_pauses": [pause._asdict() for pause in self.gc_pauses],
+        }
+        with open(path, "w") as file:
+            json.dump(report, file, indent=4)
+
+    def _gc_callback(self, phase: str, info: Dict[str, int]) -> NoReturn:
+        """Times garbage collections (called by gc)"""
+        if phase == "start":
+            self._gc_start = time.perf_counter()
+            return
+        end = time.perf_counter()
+        generation = info["generation"]
+        self.gc_pauses.append(GcPause(len(self.frames), generation, end - self._gc_start, info["collected"]))
+        tracer.complete(f"gc generation {generation}", "gc", self._gc_start, end, {"collected": info["collected"]})
@@ -1,11 +1,24 @@
 import curses
-import heapq
+import itertools
 import math
+import time
 from functools import total_ordering
-from typing import Any, List, NoReturn
+from typing import Any, Dict, Iterable, List, NoReturn, Optional, Tuple, Union
 
+from .color_pairs import color_pairs
+from .compositor import Compositor
+from .datatypes.edge_index import EdgeIndex, Rect
 from .datatypes.game_object import GameObject
+from .datatypes.spatial_index import SpatialHash
+from .datatypes.vector import Vector
 from .datatypes.vector import window_manager as vector_window_manager
+from .frame_stats import PhaseTimers
+from .render_backends import CursesBackend, RenderBackend
+from .render_pipeline import FrameSnapshot, snapshot_layers
+from .sensors import SensorIndex
+from .terminal_geometry import terminal
+from .tracing import tracer
+from .zones import ZONE_ENTER, TriggerZone, ZoneIndex
 
 
 @total_ordering
@@ -31,106 +44,418 @@ def init_colors() -> NoReturn:
 class BoxState:
     """Defines the current state of the box. Has a render() method to display the contents"""
 
-    _current_color_slot = 49
+    def __init__(self, initial_objects: List[GameObject] = None, zones: List[TriggerZone] = None):
+        # Objects are bucketed by z. Each bucket maps handle -> object and keeps insertion order,
+        # so objects on the same z level are drawn in the order they were added
+        self._layers: Dict[int, Dict[int, GameObject]] = {}
+        self._handles: Dict[int, GameObject] = {}
+        self._next_handle = itertools.count()
 
-    def __init__(self, initial_objects: List[GameObject] = None):
-        self.objects = []
+        # Flattened draw order, rebuilt only after an object is added, removed or changes z
+        self._draw_order: Optional[List[GameObject]] = None
+        self._layer_order: Optional[List[Tuple[int, List[GameObject]]]] = None
+
+        # Draws the objects, keeping static ones pre-rendered
+        self.compositor = Compositor()
+        self._curses_backend: Optional[CursesBackend] = None  # wraps the window render() was last called with
+
+        # Grid of object bounds used by the query methods. It is (re)built lazily, see _refresh_index()
+        self.spatial_index = SpatialHash()
+        self._indexed_rect = None  # window rectangle the index was last fully built for
+
+        # Rects and edges of the static objects used by the broad phase, see _broad_phase(). Rebuilt when the objects
+        # change, or when the window or terminal is resized (which moves relative vectors)
+        self._static_rects: Dict[GameObject, Rect] = {}
+        self._static_edges: Optional[EdgeIndex] = None
+        self._static_key = None  # (window rectangle, terminal.generation) they were built for
+
+        # Objects with triggers, fired when contacts with them begin or end
+        self.sensors = SensorIndex()
+        # Regions noticing objects entering and leaving them. The level is completed when something enters a goal
+        self.zones = ZoneIndex()
+        self.completed = False
 
         if initial_objects is not None:
-            # Sorting objects initially to avoid sorting when rendering
             for obj in initial_objects:
-                heapq.heappush(self.objects, obj)
+                self.add_object(obj)
+        if zones is not None:
+            for zone in zones:
+                self.zones.add(zone)
+
+    @property
+    def objects(self) -> List[GameObject]:
+        """All objects in the box, in draw order (lowest z first). Do not modify this list"""
+        if self._draw_order is None:
+            self._draw_order = [obj for _, layer in self.layers for obj in layer]
+        return self._draw_order
+
+    @property
+    def layers(self) -> List[Tuple[int, List[GameObject]]]:
+        """All objects grouped by z level as [(z, objects)], lowest z first. Do not modify these lists"""
+        if self._layer_order is None:
+            self._layer_order = [(z, list(self._layers[z].values())) for z in sorted(self._layers)]
+        return self._layer_order
 
     def clear(self) -> NoReturn:
         """Clears the box of all objects"""
-        self.objects.clear()
+        for obj in self._handles.values():
+            obj.box = None
+            obj.handle = None
+        self._layers.clear()
+        self._handles.clear()
+        self._invalidate_order()
+        self.compositor.invalidate()
+        self.spatial_index.clear()
+        self._indexed_rect = None
+        self.sensors.clear()
+        self.zones.clear()
+
+    def add_object(self, obj: GameObject) -> int:
+        """Adds an object to the box
+
+        :return: A handle that can be used to remove the object again
+        """
+        if obj.box is not None:
+            raise ValueError("Object already belongs to a box")
+
+        handle = next(self._next_handle)
+        obj.box = self
+        obj.handle = handle
+        self._handles[handle] = obj
+        self._layers.setdefault(obj.z, {})[handle] = obj
+        self._invalidate_order(obj)
+        self.sensors.add(obj)
+
+        if self._indexed_rect is not None:
+            self.spatial_index.insert(obj, obj.tile_bounds())
+        return handle
+
+    def add_objects(self, objects: Iterable[GameObject]) -> List[int]:
+        """Adds many objects to the box at once. Does the same as add_object() for each, but faster
+
+        :return: The handles of the objects, in the same order
+        """
+        handles = []
+        layers = self._layers
+        indexed = self._indexed_rect is not None
+        for obj in objects:
+            if obj.box is not None:
+                raise ValueError("Object already belongs to a box")
+            handle = next(self._next_handle)
+            obj.box = self
+            obj.handle = handle
+            self._handles[handle] = obj
+            layer = layers.get(obj.z)
+            if layer is None:
+                layers[obj.z] = {handle: obj}
+            else:
+                layer[handle] = obj
+            self.sensors.add(obj)
+            if indexed:
+                self.spatial_index.insert(obj, obj.tile_bounds())
+            handles.append(handle)
+        self._invalidate_order()
+        return handles
+
+    def remove_object(self, handle: int) -> GameObject:
+        """Removes the object with the given handle from the box
+
+        :return: The removed object
+        """
+        obj = self._handles.pop(handle)
+        layer = self._layers[obj.z]
+        del layer[handle]
+        if not layer:
+            del self._layers[obj.z]
+        obj.box = None
+        obj.handle = None
+        self._invalidate_order(obj)
 
-    def add_object(self, obj: GameObject) -> NoReturn:
-        """Adds an object to the objects list"""
-        heapq.heappush(self.objects, obj)
+        self.spatial_index.remove(obj)
+        self.sensors.remove(obj)
+        self.zones.forget(obj)
+        return obj
 
-    def update(self) -> NoReturn:
-        """Updates the position of all objects. Should be called every tick"""
+    def restack_object(self, obj: GameObject, old_z: int) -> NoReturn:
+        """Moves an object between z levels. Called by the object when its z changes"""
+        layer = self._layers[old_z]
+        del layer[obj.handle]
+        if not layer:
+            del self._layers[old_z]
+        self._layers.setdefault(obj.z, {})[obj.handle] = obj
+        self._invalidate_order(obj)
+
+    def invalidate_static(self) -> NoReturn:
+        """Re-renders and re-reads static objects on the next frame. Call this after changing one in place"""
+        self.compositor.invalidate_static()
+        self._static_edges = None
+
+    def _invalidate_order(self, changed: GameObject = None) -> NoReturn:
+        """Drops the cached draw order so it gets rebuilt when next needed"""
+        self._draw_order = None
+        self._layer_order = None
+        self._static_edges = None  # indexed by position in the draw order
+        if changed is None or changed.static:
+            self.compositor.invalidate_static()
+
+    def prepare(self, rows: int, cols: int) -> NoReturn:
+        """Does the work of the first frame ahead of time, for a screen of the given size
+
+        Rasterises the static layer, renders the textures of the other objects once so their buffers are allocated,
+        and builds the zone index. The spatial index used by queries is left alone: it is only built on first use
+        """
+        if vector_window_manager.current_rect is None:  # nothing has been updated yet
+            vector_window_manager.update()
+        window_rect = vector_window_manager.current_rect
+        self.compositor.prepare(rows, cols, self.layers, window_rect)
+        for obj in self.objects:
+            if not obj.static:
+                obj.render()
+        self.zones.prepare(window_rect)
+
+    def query_point(self, position: Vector, mask: List[int] = None, z: int = None) -> List[GameObject]:
+        """Gets all objects covering the tile at the given position, topmost first
+
+        :param mask: Only return objects belonging to one of these collision groups. None matches everything
+        :param z: Only return objects on this z level. None matches everything
+        """
+        self._refresh_index()
+        found = self.spatial_index.query_point(round(position.x), round(position.y))
+        return self._filter_objects(found, mask, z)
+
+    def query_rect(self, position: Vector, size: Vector, mask: List[int] = None, z: int = None) -> List[GameObject]:
+        """Gets all objects overlapping the given rectangle of tiles, topmost first
+
+        :param mask: Only return objects belonging to one of these collision groups. None matches everything
+        :param z: Only return objects on this z level. None matches everything
+        """
+        self._refresh_index()
+        x1 = round(position.x)
+        y1 = round(position.y)
+        x2 = max(x1, round(position.x + size.x) - 1)
+        y2 = max(y1, round(position.y + size.y) - 1)
+        found = self.spatial_index.query_rect(x1, y1, x2, y2)
+        return self._filter_objects(found, mask, z)
+
+    def raycast(
+        self,
+        origin: Vector,
+        direction: Vector,
+        max_distance: float = math.inf,
+        mask: List[int] = None,
+        z: int = None,
+    ) -> Optional[Tuple[GameObject, float]]:
+        """Finds the first object hit by a ray cast from origin along direction
+
+        :param mask: Only consider objects belonging to one of these collision groups. None matches everything
+        :param z: Only consider objects on this z level. None matches everything
+        :return: (object, distance in tiles) for the nearest hit, or None if nothing was hit
+        """
+        self._refresh_index()
+        return self.spatial_index.raycast(
+            origin.x,
+            origin.y,
+            direction.x,
+            direction.y,
+            max_distance=max_distance,
+            predicate=lambda obj: obj.in_collision_mask(mask) and (z is None or obj.z == z),
+        )
+
+    @staticmethod
+    def _filter_objects(objects: List[GameObject], mask: Optional[List[int]], z: Optional[int]) -> List[GameObject]:
+        """Applies the collision mask and z filters of the query methods"""
+        found = [obj for obj in objects if obj.in_collision_mask(mask) and (z is None or obj.z == z)]
+        found.sort(key=lambda obj: obj.z, reverse=True)
+        return found
+
+    def _refresh_index(self, moved_only: bool = False) -> NoReturn:
+        """Brings the spatial index up to date with the objects
+
+        Relative vectors follow the window, so everything is re-indexed when the window moves or resizes.
+        Otherwise, static objects never move and only the rest have to be re-indexed (if moved_only is set)
+        """
+        window_rect = vector_window_manager.current_rect
+        if self._indexed_rect != window_rect or self._indexed_rect is None:
+            self.spatial_index.clear()
+            for obj in self.objects:
+                self.spatial_index.insert(obj, obj.tile_bounds())
+            self._indexed_rect = window_rect
+        elif moved_only:
+            for obj in self.objects:
+                if not obj.static:
+                    self.spatial_index.move(obj, obj.tile_bounds())
+
+    def update(self, timers: Optional[PhaseTimers] = None) -> NoReturn:
+        """Updates the position of all objects. Should be called every tick
+
+        :param timers: Records the time spent in the broad phase, narrow phase, integration, triggers and zones
+        if given
+        """
         vector_window_manager.update()
 
+        if timers is not None:
+            timers.start()
+        rects, candidates = self._broad_phase()
+        if timers is not None:
+            timers.lap("broad phase")
+
+        # Each object is integrated straight after its collisions are found,
+        # so objects later in the draw order collide with the updated positions of earlier ones
+        narrow_time = 0.0
+        integrate_time = 0.0
+        loop_start = time.perf_counter()
         for obj in self.objects:
             obj: GameObject
-            # TODO: Right now, this assumes the objects are rectangular. Could do with circles in here
-            #   It also does not (fully) support changing orientation
-            touching = []
-            for coll in self.objects:
-                coll: GameObject
-                if coll == obj:
-                    continue
-
-                # vertical collisions
-                if obj.position.y < coll.position.y:  # from above (check bottom edge of coll)
-                    result = obj.position.y <= coll.position.y <= obj.position.y + obj.size.y
-                else:  # from below (check top edge of coll)
-                    result = obj.position.y <= coll.position.y + coll.size.y <= obj.position.y + obj.size.y
-                # horizontal collisions
-                if not result:
-                    if obj.position.x < coll.position.x:  # from left (check right edge of coll)
-                        result = obj.position.x <= coll.position.x <= obj.position.x + obj.size.x
-                    else:  # from right (check left edge of coll)
-                        result = obj.position.x <= coll.position.x + coll.size.x <= obj.position.x + obj.size.x
-
-                if not result:  # if it hasn't collided, we're not interested
-                    continue
-
-                min_angle = 90 - math.degrees(
-                    math.atan((coll.position.y - obj.position.y) / (coll.position.x - obj.position.x))
-                )
-                max_angle = 90.0  # this has to be changed to support variable orientations
-                plane_normal = 0  # rectangles with no orientation are always flat
-
-                touching.append((min_angle, max_angle, coll, plane_normal))
+            phase_start = time.perf_counter()
+            touching = self._narrow_phase(obj, candidates[obj], rects)
+            self.sensors.report(obj, touching)
+            narrow_end = time.perf_counter()
             obj.update(touching)
+            if not obj.static:  # it moved
+                rects[obj] = self._collision_rect(obj)
+            narrow_time += narrow_end - phase_start
+            integrate_time += time.perf_counter() - narrow_end
 
-    def render(self, screen: curses.window) -> NoReturn:
-        """Renders the contents of the box"""
-        if len(self.objects) == 0:
-            return  # There is nothing to render!
+        if tracer.enabled:
+            tracer.complete(
+                "narrow phase + integrate",
+                "frame",
+                loop_start,
+                time.perf_counter(),
+                {"narrow phase ms": narrow_time * 1000, "integrate ms": integrate_time * 1000},
+            )
+        if timers is not None:
+            timers.add("narrow phase", narrow_time)
+            timers.add("integrate", integrate_time)
+            timers.start()
 
-        screen.clear()
-        for obj in self.objects:
-            self._render_object(obj, screen)
-        screen.refresh()
+        # Triggers run together once everything has moved, so they all see the same state of the box
+        self.sensors.dispatch()
+        if timers is not None:
+            timers.lap("triggers")
+
+        for event in self.zones.update(self.objects, vector_window_manager.current_rect):
+            if event.kind == ZONE_ENTER and event.zone.goal:
+                self.completed = True
+        if timers is not None:
+            timers.lap("zones")
+
+        if self._indexed_rect is not None:  # only maintain the index once something has queried it
+            self._refresh_index(moved_only=True)
+
+    def _broad_phase(self) -> Tuple[Dict[GameObject, Rect], Dict[GameObject, List[GameObject]]]:
+        """Gets the rect of every object, and the objects each one has to be tested against this tick
 
-    def _render_object(self, obj: GameObject, screen: curses.window) -> NoReturn:
+        Static objects don't react to what they touch, their contacts only matter to sensors: they are only tested
+        against sensors. Other objects are tested against every moving object, and against the static objects with
+        an edge within their extent. The narrow phase never finds any other static object touching them.
+        Candidates are in draw order, the order the narrow phase would find them in without pruning
+
+        :return: (rects, candidates). rects maps objects to their _collision_rect(), candidates to a list of objects
         """
-        Renders object on the screen (character-by-character)
+        # Reading a coordinate of a vector converts it to tiles through the window manager, so every rect is read
+        # once here, and again only when the object moves. Static objects only move with the window
+        objects = self.objects
+        key = (vector_window_manager.current_rect, terminal.generation)
+        if self._static_edges is None or self._static_key != key:
+            self._static_rects = {obj: self._collision_rect(obj) for obj in objects if obj.static}
+            self._static_edges = EdgeIndex(
+                (order, self._static_rects[obj]) for order, obj in enumerate(objects) if obj.static
+            )
+            self._static_key = key
+        rects = dict(self._static_rects)
+        moving = []
+        for order, obj in enumerate(objects):
+            if not obj.static:
+                rects[obj] = self._collision_rect(obj)
+                moving.append(order)
+        sensors = [obj for obj in objects if obj in self.sensors.sensors]
+
+        candidates = {}
+        for obj in objects:
+            if obj.static and obj not in self.sensors.sensors:
+                candidates[obj] = sensors
+                continue
+            x, y, width, height = rects[obj]
+            found = self._static_edges.query(x, y, x + width, y + height)
+            found.update(moving)
+            candidates[obj] = [objects[order] for order in sorted(found)]
+        return rects, candidates
+
+    @staticmethod
+    def _collision_rect(obj: GameObject) -> Rect:
+        """Gets the position and size of an object as (x, y, width, height), for the narrow phase"""
+        position = obj.position
+        size = obj.size
+        return position.x, position.y, size.x, size.y
 
-        It doesn't affect performance because curses draws all the stuff at once
-        when screen.refresh() is called (or when .getkey() / .getch() is called)
+    @staticmethod
+    def _narrow_phase(obj: GameObject, candidates: List[GameObject], rects: Dict[GameObject, Rect]) -> List[tuple]:
+        """Gets the candidates touching an object as (min_angle, max_angle, object, plane_normal)
+
+        :param rects: Current _collision_rect() of every object
+        """
+        # TODO: Right now, this assumes the objects are rectangular. Could do with circles in here
+        #   It also does not (fully) support changing orientation
+        x, y, width, height = rects[obj]
+        touching = []
+        for coll in candidates:
+            coll: GameObject
+            if coll == obj:
+                continue
+            coll_x, coll_y, coll_width, coll_height = rects[coll]
+
+            # vertical collisions
+            if y < coll_y:  # from above (check bottom edge of coll)
+                result = y <= coll_y <= y + height
+            else:  # from below (check top edge of coll)
+                result = y <= coll_y + coll_height <= y + height
+            # horizontal collisions
+            if not result:
+                if x < coll_x:  # from left (check right edge of coll)
+                    result = x <= coll_x <= x + width
+                else:  # from right (check left edge of coll)
+                    result = x <= coll_x + coll_width <= x + width
+
+            if not result:  # if it hasn't collided, we're not interested
+                continue
+
+            min_angle = 90 - math.degrees(math.atan((coll_y - y) / (coll_x - x)))
+            max_angle = 90.0  # this has to be changed to support variable orientations
+            plane_normal = 0  # rectangles with no orientation are always flat
+
+            touching.append((min_angle, max_angle, coll, plane_normal))
+        return touching
+
+    def render(self, screen: Union[RenderBackend, curses.window]) -> NoReturn:
+        """Renders the contents of the box
+
+        :param screen: Backend to draw with. A curses window is drawn on with a CursesBackend
         """
-        # color = self._get_object_color(obj)
+        if len(self.objects) == 0:
+            return  # There is nothing to render!
+
+        if not isinstance(screen, RenderBackend):
+            if self._curses_backend is None or self._curses_backend.screen is not screen:
+                self._curses_backend = CursesBackend(screen)
+            screen = self._curses_backend
+        self.compositor.render(screen, self.layers, vector_window_manager.current_rect)
 
-        buffer = obj.render()
-        for pos, char, colour in buffer:
-            if (0 <= pos.x < screen.getmaxyx()[1]) and (0 <= pos.y < screen.getmaxyx()[0]):
-                if pos.x == screen.getmaxyx()[1] - 1 and pos.y == screen.getmaxyx()[0] - 1:
-                    # insch doesn't raise en error when drawing on the bottom right tile
-                    draw = screen.insch
-                else:
-                    draw = screen.addch
+    def snapshot(self, overlay: Optional[List[str]] = None) -> FrameSnapshot:
+        """Takes what is needed to draw the current frame, for a RenderPipeline to draw it while the box updates
 
-                if char != "TRANSPARENT":
-                    draw(int(pos.y), int(pos.x), char, colour)
+        :param overlay: Lines to draw over the top left corner of the frame (e.g. the HUD)
+        """
+        return FrameSnapshot(
+            snapshot_layers(self.layers), vector_window_manager.current_rect, overlay, time.perf_counter()
+        )
 
     @staticmethod
     def _get_object_color(obj: GameObject) -> int:
         """Gets the color of an object based on their properties / custom color"""
         if obj.override_colors:  # If the object decides to override default property-based colors:
-            # All of this for multiple colors to render simultaneously
-            if BoxState._current_color_slot == 256:
-                BoxState._current_color_slot = 49
-
-            curses.init_pair(BoxState._current_color_slot, *obj.color)
-
-            BoxState._current_color_slot += 1  # Incrementing it for next iteration
-
-            return curses.color_pair(BoxState._current_color_slot - 1)
+            # Reuses the pair if these colours are already set up, so it doesn't call init_pair every frame
+            return curses.color_pair(color_pairs.get(*obj.color))
 
         # We're sorting if statements by importance. An object being bouncy is the most important,
         # therefore we're making it the top if statement.
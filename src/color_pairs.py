@@ -0,0 +1,103 @@
+import curses
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, NoReturn, Optional, Tuple
+
+
+class ColorPairAllocator:
+    """Hands out curses colour pairs for (foreground, background) combinations
+
+    Pairs that are already set up are reused, so drawing with the same colours frame after frame doesn't
+    call curses.init_pair (and send escape sequences to the terminal) again.
+    When every pair is taken, the least recently used one is redefined
+    """
+
+    def __init__(
+        self,
+        first_pair: int = 49,
+        last_pair: Optional[int] = None,
+        reserved: Iterable[int] = (200,),
+        init_pair: Callable[[int, int, int], NoReturn] = None,
+    ):
+        """Initialize the allocator
+
+        :param first_pair: Lowest pair number to hand out. Lower pairs are left to init_colors()
+        :param last_pair: Highest pair number to hand out. Defaults to the last pair the terminal supports
+        (up to 255), which is only known once curses has started
+        :param reserved: Pair numbers used elsewhere (e.g. MenuLoop.MENU_COLOR_PAIR) that must not be handed out
+        :param init_pair: Function defining a pair, curses.init_pair by default
+        """
+        self.first_pair = first_pair
+        self.last_pair = last_pair
+        self.reserved = set(reserved)
+        self.init_pair = init_pair or curses.init_pair
+
+        self.pairs: Dict[Tuple[int, int], int] = OrderedDict()  # least recently used first
+        self._free: Optional[List[int]] = None  # filled on first use, see _take_pair()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Proportion of requests answered with a pair that was already set up"""
+        requests = self.hits + self.misses
+        return self.hits / requests if requests else 1.0
+
+    def stats(self) -> dict:
+        """Counters describing how well pairs are being reused"""
+        return {
+            "pairs": len(self.pairs),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hit_rate,
+        }
+
+    def get(self, fg: int, bg: int) -> int:
+        """Gets a pair number with the given foreground and background colours, setting one up if needed"""
+        key = (fg, bg)
+        pair = self.pairs.get(key)
+        if pair is not None:
+            self.pairs.move_to_end(key)
+            self.hits += 1
+            return pair
+
+        self.misses += 1
+        pair = self._take_pair()
+        self.init_pair(pair, fg, bg)
+        self.pairs[key] = pair
+        return pair
+
+    def clear(self) -> NoReturn:
+        """Forgets every pair handed out. Call this if the terminal colours were reset"""
+        self.pairs.clear()
+        self._free = None
+
+    def _take_pair(self) -> int:
+        """Gets an unused pair number, evicting the least recently used pair if there are none left"""
+        if self._free is None:
+            last_pair = self.last_pair if self.last_pair is not None else min(curses.COLOR_PAIRS, 256) - 1
+            free = range(last_pair, self.first_pair - 1, -1)
+            self._free = [pair for pair in free if pair not in self.reserved and pair not in self.pairs.values()]
+        if self._free:
+            return self._free.pop()
+
+        self.evictions += 1
+        _, pair = self.pairs.popitem(last=False)
+        return pair
+
+
+color_pairs = ColorPairAllocator()  # colour pairs are global to the terminal, so share a single allocator
+
+
+def tile_attr(colour: int) -> int:
+    """Gets the curses attribute for a tile colour
+
+    Tile colours are foreground colour numbers drawn on black. 0 keeps the terminal's default colours
+    """
+    if colour <= 0:
+        return 0
+    if colour >= curses.COLORS:
+        colour = curses.COLOR_WHITE
+    return curses.color_pair(color_pairs.get(colour, curses.COLOR_BLACK))
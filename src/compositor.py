@@ -0,0 +1,245 @@
+import itertools
+from array import array
+from typing import Dict, Iterable, List, NoReturn, Tuple
+
+from .datatypes.game_object import GameObject
+from .datatypes.tile_buffer import STRIDE
+from .render_backends import RenderBackend
+
+EMPTY = -1  # character code of a cell nothing is drawn on
+
+
+class Compositor:
+    """Draws the objects of a box in two layers, only sending the cells that changed to the screen
+
+    The static layer holds every static object. It is rasterised once and only rebuilt when the window moves or
+    resizes, or when a static object is added, removed or restacked (see invalidate_static).
+    The dynamic layer holds everything else and is redrawn every frame on top of it.
+    Layers are still ordered by z, but on the same z level moving objects are drawn over static ones.
+    Only cells touched by the dynamic layer on this or the previous frame can change between frames,
+    so the cost of a frame scales with the moving objects, not with the size of the level.
+    The cells that changed are handed to a RenderBackend, which puts them on the terminal
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.cols = 0
+
+        # Static layer, one entry per cell
+        self._static_chars = array("i")
+        self._static_colours = array("i")
+        self._static_z = array("i")
+        self._static_valid = False
+        self._static_rect = None  # window rectangle the static layer was rasterised for
+
+        # Dynamic layer, one entry per cell, reset after every frame using the list of touched cells
+        self._dynamic_chars = array("i")
+        self._dynamic_colours = array("i")
+        self._dynamic_touched = array("i")
+        self._previous_touched = array("i")
+
+        # What is currently on the screen
+        self._front_chars = array("i")
+        self._front_colours = array("i")
+        self._full_redraw = True
+
+    def invalidate(self) -> NoReturn:
+        """Forgets what is on the screen, so the next frame is drawn from scratch"""
+        self._full_redraw = True
+
+    def invalidate_static(self) -> NoReturn:
+        """Rasterises the static layer again on the next frame. Call this when a static object changes"""
+        self._static_valid = False
+
+    def render(
+        self, backend: RenderBackend, layers: Iterable[Tuple[int, List[GameObject]]], window_rect: tuple
+    ) -> NoReturn:
+        """Composites the layers and draws the changes through the backend
+
+        :param layers: Objects grouped by z as [(z, objects)], lowest z first
+        :param window_rect: Current window rectangle. The static layer is rebuilt whenever it changes
+        """
+        rows, cols = backend.get_size()
+        self.prepare(rows, cols, layers, window_rect)
+        self._rasterise_dynamic(layers)
+
+        if self._full_redraw:
+            backend.clear()
+            self._front_chars[:] = array("i", [EMPTY]) * len(self._front_chars)
+            self._front_colours[:] = array("i", [0]) * len(self._front_colours)
+            damaged = range(rows * cols)
+            self._full_redraw = False
+        else:
+            # A cell touched on both frames is visited twice, but the second visit finds it up to date
+            damaged = itertools.chain(self._dynamic_touched, self._previous_touched)
+
+        self._blit(backend, damaged)
+
+        # Clear the dynamic layer for the next frame, touching only the cells used on this one
+        for index in self._dynamic_touched:
+            self._dynamic_chars[index] = EMPTY
+        self._previous_touched, self._dynamic_touched = self._dynamic_touched, self._previous_touched
+        del self._dynamic_touched[:]
+
+        backend.flush()
+
+    def prepare(
+        self, rows: int, cols: int, layers: Iterable[Tuple[int, List[GameObject]]], window_rect: tuple
+    ) -> NoReturn:
+        """Sizes the layers for the screen and rasterises the static layer if needed, without drawing anything
+
+        render() does this at the start of every frame. Calling it ahead of time (e.g. while a level loads)
+        takes the cost out of the first frame
+        """
+        if (rows, cols) != (self.rows, self.cols):
+            self._resize(rows, cols)
+        if window_rect != self._static_rect:
+            self._static_valid = False
+            self._static_rect = window_rect
+
+        if not self._static_valid:
+            self._rasterise_static(layers)
+            self._static_valid = True
+            self._full_redraw = True
+
+    def copy_static(self, other: "Compositor") -> NoReturn:
+        """Takes a copy of the static layer another compositor rasterised, if it has one
+
+        Both compositors must draw the same static objects, e.g. a level and a copy of it
+        """
+        if not other._static_valid:
+            return
+        if (other.rows, other.cols) != (self.rows, self.cols):
+            self._resize(other.rows, other.cols)
+        self._static_chars[:] = other._static_chars
+        self._static_colours[:] = other._static_colours
+        self._static_z[:] = other._static_z
+        self._static_rect = other._static_rect
+        self._static_valid = True
+        self._full_redraw = True
+
+    def _resize(self, rows: int, cols: int) -> NoReturn:
+        """Reallocates every layer for a new screen size"""
+        self.rows = rows
+        self.cols = cols
+        cells = rows * cols
+        self._static_chars = array("i", [EMPTY]) * cells
+        self._static_colours = array("i", [0]) * cells
+        self._static_z = array("i", [0]) * cells
+        self._dynamic_chars = array("i", [EMPTY]) * cells
+        self._dynamic_colours = array("i", [0]) * cells
+        self._front_chars = array("i", [EMPTY]) * cells
+        self._front_colours = array("i", [0]) * cells
+        del self._dynamic_touched[:]
+        del self._previous_touched[:]
+        self._static_valid = False
+        self._full_redraw = True
+
+    def _rasterise_static(self, layers: Iterable[Tuple[int, List[GameObject]]]) -> NoReturn:
+        """Draws every static object into the static layer, in z order"""
+        chars = self._static_chars
+        colours = self._static_colours
+        z_values = self._static_z
+        chars[:] = array("i", [EMPTY]) * len(chars)
+
+        rows = self.rows
+        cols = self.cols
+        for z, objects in layers:
+            for obj in objects:
+                if not obj.static:
+                    continue
+                buffer = obj.render()
+                data = buffer.data
+                for offset in range(0, buffer.length * STRIDE, STRIDE):
+                    x = data[offset]
+                    y = data[offset + 1]
+                    if 0 <= x < cols and 0 <= y < rows:
+                        index = y * cols + x
+                        chars[index] = data[offset + 2]
+                        colours[index] = data[offset + 3]
+                        z_values[index] = z
+
+    def _rasterise_dynamic(self, layers: Iterable[Tuple[int, List[GameObject]]]) -> NoReturn:
+        """Draws every non-static object into the dynamic layer, in z order
+
+        Tiles hidden behind a static object with a higher z are skipped
+        """
+        chars = self._dynamic_chars
+        colours = self._dynamic_colours
+        static_chars = self._static_chars
+        static_z = self._static_z
+        touched = self._dynamic_touched
+        rows = self.rows
+        cols = self.cols
+
+        for z, objects in layers:
+            for obj in objects:
+                if obj.static:
+                    continue
+                buffer = obj.render()
+                data = buffer.data
+                for offset in range(0, buffer.length * STRIDE, STRIDE):
+                    x = data[offset]
+                    y = data[offset + 1]
+                    if not (0 <= x < cols and 0 <= y < rows):
+                        continue
+                    index = y * cols + x
+                    if static_chars[index] != EMPTY and static_z[index] > z:
+                        continue
+                    if chars[index] == EMPTY:
+                        touched.append(index)
+                    chars[index] = data[offset + 2]
+                    colours[index] = data[offset + 3]
+
+    def _blit(self, backend: RenderBackend, damaged: Iterable[int]) -> NoReturn:
+        """Draws the damaged cells whose final content differs from what is on the screen
+
+        Every cell already holds its final content, so the order they are sent in doesn't change the result.
+        Changed cells are grouped by colour, then sorted so neighbouring cells on a row go out as a single
+        run. Each colour is switched to once per frame instead of once per tile
+        """
+        dynamic_chars = self._dynamic_chars
+        dynamic_colours = self._dynamic_colours
+        static_chars = self._static_chars
+        static_colours = self._static_colours
+        front_chars = self._front_chars
+        front_colours = self._front_colours
+        changed: Dict[int, List[int]] = {}  # colour -> indices of the cells changing to it
+
+        for index in damaged:
+            char = dynamic_chars[index]
+            if char != EMPTY:
+                colour = dynamic_colours[index]
+            else:
+                char = static_chars[index]
+                colour = static_colours[index] if char != EMPTY else 0
+            if char == front_chars[index] and colour == front_colours[index]:
+                continue
+
+            front_chars[index] = char
+            front_colours[index] = colour
+            cells = changed.get(colour)
+            if cells is None:
+                changed[colour] = [index]
+            else:
+                cells.append(index)
+
+        for colour, cells in changed.items():
+            cells.sort()
+            run_start = cells[0]
+            previous = run_start - 1
+            for index in cells:
+                if index != previous + 1 or index % self.cols == 0:  # not adjacent on the same row
+                    self._draw_run(backend, run_start, previous, colour)
+                    run_start = index
+                previous = index
+            self._draw_run(backend, run_start, previous, colour)
+
+    def _draw_run(self, backend: RenderBackend, start: int, end: int, colour: int) -> NoReturn:
+        """Draws the cells from index start to end (inclusive), which are all on the same row, as one string"""
+        if end < start:
+            return
+        stop = end + 1
+        text = "".join(" " if char == EMPTY else chr(char) for char in self._front_chars[start:stop])
+        y, x = divmod(start, self.cols)
+        backend.draw_run(y, x, text, colour, last_cell=end == self.rows * self.cols - 1)
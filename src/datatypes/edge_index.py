@@ -0,0 +1,51 @@
+from bisect import bisect_left, bisect_right
+from typing import Any, Iterable, List, Set, Tuple
+
+Rect = Tuple[float, float, float, float]  # (x, y, width, height)
+
+
+class EdgeIndex:
+    """Finds the rectangles with an edge inside a band of the plane
+
+    The left, right, top and bottom edges of the rectangles are each kept sorted, so a query is four pairs of
+    binary searches and only looks at the rectangles it returns. This is what the narrow phase of the box needs:
+    it counts rectangles as touching when an edge of one lies within the extent of the other on either axis.
+    The index is built once from all of its rectangles. Rebuild it when they change
+    """
+
+    def __init__(self, rects: Iterable[Tuple[Any, Rect]] = ()):
+        """Initialize an index
+
+        :param rects: (item, (x, y, width, height)) for every rectangle
+        """
+        rects = list(rects)
+        self.items = [item for item, _ in rects]
+        # (values, items) per edge, both sorted by value. The edges are computed as the narrow phase computes them,
+        # so the floats compare exactly the same
+        self.edges = [
+            self._sort((x, item) for item, (x, _, _, _) in rects),
+            self._sort((x + width, item) for item, (x, _, width, _) in rects),
+            self._sort((y, item) for item, (_, y, _, _) in rects),
+            self._sort((y + height, item) for item, (_, y, _, height) in rects),
+        ]
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def query(self, x1: float, y1: float, x2: float, y2: float) -> Set[Any]:
+        """Gets every item with a left or right edge in [x1, x2], or a top or bottom edge in [y1, y2]
+
+        A range whose end is before its start contains nothing
+        """
+        found = set()
+        for (values, items), low, high in zip(self.edges, (x1, x1, y1, y1), (x2, x2, y2, y2)):
+            start = bisect_left(values, low)
+            end = bisect_right(values, high)
+            found.update(items[start:end])
+        return found
+
+    @staticmethod
+    def _sort(edges: Iterable[Tuple[float, Any]]) -> Tuple[List[float], List[Any]]:
+        """Sorts (value, item) pairs by value, as separate lists of values and items"""
+        edges = sorted(edges, key=lambda edge: edge[0])
+        return [value for value, _ in edges], [item for _, item in edges]
@@ -8,6 +8,7 @@ sys.path.append("..")
 from src.datatypes.shape import Shape  # noqa: E402
 
 from .textures import EmptyTexture, Texture  # noqa: E402
+from .tile_buffer import TileBuffer  # noqa: E402
 from .vector import Vector  # noqa: E402
 
 if typing.TYPE_CHECKING:
@@ -61,15 +62,32 @@ class GameObject:
         self.collision = collision
         self.triggers = triggers
         self.forces = forces
-        self.z = z
+        self._z = z
         self.gravity = gravity
 
+        # Set by the BoxState holding this object, so it can keep its draw order up to date
+        self.box = None
+        self.handle: Optional[int] = None
+
         # These attributes are all updated every tick
         self._forces = initial_forces
         self._resultant: Vector = Vector(0, 0)
         self._acceleration: Vector = Vector(0, 0)
         self._touching = []
 
+    @property
+    def z(self) -> int:
+        """Drawing order of the object. Objects with a higher z are drawn on top"""
+        return self._z
+
+    @z.setter
+    def z(self, value: int) -> None:
+        """Moves the object to another z level, letting the box it belongs to know about it"""
+        old_z = self._z
+        self._z = value
+        if self.box is not None and old_z != value:
+            self.box.restack_object(self, old_z)
+
     def update(
         self, touching: List[Tuple[float, float, Union["GameObject", int], Optional[float]]] = None
     ) -> NoReturn:
@@ -227,10 +245,44 @@ class GameObject:
         """Adds a force to the object, but only for a single tick"""
         self._forces.append(force)
 
-    def render(self) -> list:
+    def render(self) -> TileBuffer:
         """A helper method to render the object"""
         return self.texture.render()
 
+    def tile_bounds(self) -> Tuple[int, int, int, int]:
+        """Gets the tiles covered by the object as (x1, y1, x2, y2), both corners inclusive
+
+        Follows the way the textures rasterise each shape. Circles and lines use their bounding box
+        """
+        x = self.position.x
+        y = self.position.y
+        if self.shape == Shape.Line:  # lines are drawn from position to size
+            end_x = self.size.x
+            end_y = self.size.y
+            return round(min(x, end_x)), round(min(y, end_y)), round(max(x, end_x)), round(max(y, end_y))
+        if self.shape == Shape.Circle:  # circles are centred on position and squashed vertically
+            radius = self.size.x / 2
+            return (
+                math.floor(x - radius),
+                math.floor(y - radius / 2),
+                math.ceil(x + radius),
+                math.ceil(y + radius / 2),
+            )
+
+        x1 = round(x)
+        y1 = round(y)
+        return x1, y1, max(x1, round(x + self.size.x) - 1), max(y1, round(y + self.size.y) - 1)
+
+    def in_collision_mask(self, mask: Optional[List[int]]) -> bool:
+        """Checks if the object belongs to any of the given collision groups. A mask of None matches everything"""
+        if mask is None:
+            return True
+        for group in self.collision:
+            if group in mask:
+                return True
+
+        return False
+
     def __ge__(self, other: "GameObject") -> bool:
         """Compares z value"""
         return self.z >= other.z
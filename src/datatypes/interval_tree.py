@@ -0,0 +1,74 @@
+from typing import Any, Iterable, List, Optional, Tuple
+
+Interval = Tuple[float, float, Any]  # (start, end, item), both ends inclusive
+
+
+class _Node:
+    """Intervals containing the centre of a node, and the subtrees of the ones entirely left or right of it"""
+
+    __slots__ = ("centre", "by_start", "by_end", "left", "right")
+
+    def __init__(self, centre: float, intervals: List[Interval]):
+        self.centre = centre
+        self.by_start = sorted(intervals, key=lambda interval: interval[0])
+        self.by_end = sorted(intervals, key=lambda interval: interval[1], reverse=True)
+        self.left: Optional[_Node] = None
+        self.right: Optional[_Node] = None
+
+
+class IntervalTree:
+    """A centred interval tree, finding every interval overlapping a range
+
+    The tree is built once from all of its intervals. A query visits one node per level of the tree
+    and only looks at the intervals it returns (plus one per node), so it costs O(log n + k) for k results
+    rather than a scan over all n intervals. Rebuild the tree when the intervals change
+    """
+
+    def __init__(self, intervals: Iterable[Interval] = ()):
+        intervals = list(intervals)
+        self.size = len(intervals)
+        self.root = self._build(intervals)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def query(self, start: float, end: float) -> List[Any]:
+        """Gets the items of every interval overlapping [start, end]"""
+        found = []
+        node = self.root
+        stack = []
+        while node is not None or stack:
+            if node is None:
+                node = stack.pop()
+            if end < node.centre:  # only intervals starting early enough reach the range
+                for interval in node.by_start:
+                    if interval[0] > end:
+                        break
+                    found.append(interval[2])
+                node = node.left
+            elif start > node.centre:  # only intervals ending late enough reach the range
+                for interval in node.by_end:
+                    if interval[1] < start:
+                        break
+                    found.append(interval[2])
+                node = node.right
+            else:  # the range contains the centre, so it overlaps every interval of the node
+                found.extend(interval[2] for interval in node.by_start)
+                if node.right is not None:
+                    stack.append(node.right)
+                node = node.left
+        return found
+
+    @classmethod
+    def _build(cls, intervals: List[Interval]) -> Optional[_Node]:
+        """Builds the subtree holding the intervals"""
+        if not intervals:
+            return None
+        endpoints = sorted(point for interval in intervals for point in interval[:2])
+        centre = endpoints[len(endpoints) // 2]
+        left = [interval for interval in intervals if interval[1] < centre]
+        right = [interval for interval in intervals if interval[0] > centre]
+        node = _Node(centre, [interval for interval in intervals if interval[0] <= centre <= interval[1]])
+        node.left = cls._build(left)
+        node.right = cls._build(right)
+        return node
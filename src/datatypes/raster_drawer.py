@@ -1,62 +1,74 @@
-from math import sqrt
-from typing import Any, NoReturn
+from math import floor
+from typing import Callable, Dict, NoReturn, Tuple
 
 from .vector import Vector
 
+# (x, y, length, character code, colour) -> None
+SpanCallback = Callable[[int, int, int, int, int], NoReturn]
 
-class Drawer:
-    """Draws vector shapes on the screen"""
-
-    def __init__(self, buffer_add: Any):
-        self.buffer_add = buffer_add
-
-    def draw_tile(self, pos: Vector, char: str, colour: int) -> NoReturn:
-        """Draws a tile at a position"""
-        self.buffer_add(pos, char, colour)
-
-    def draw_line(self, pos1: Vector, pos2: Vector, char: str, colour: int) -> NoReturn:
-        """Draws a vector line. Positions are tiles."""
-        distance_x = pos2.x - pos1.x
-        distance_y = pos2.y - pos1.y
-
-        # Both points are on the same position
-        if distance_x == 0 and distance_y == 0:
-            self.draw_tile(pos1, char, colour)
-            return
-
-        if abs(distance_x) >= abs(distance_y):
-            if pos2.x > pos1.x:
-                self._draw_line_x(pos1, pos2, char, colour)
-            else:
-                self._draw_line_x(pos2, pos1, char, colour)
-
-        else:
-            if pos2.y > pos1.y:
-                self._draw_line_y(pos1, pos2, char, colour)
-            else:
-                self._draw_line_y(pos2, pos1, char, colour)
 
-    def _draw_line_x(self, pos1: Vector, pos2: Vector, char: str, colour: int) -> NoReturn:
-        distance_x = pos2.x - pos1.x
-        distance_y = pos2.y - pos1.y
+class Drawer:
+    """Draws vector shapes on the screen
 
-        m = distance_y / distance_x
+    Shapes are emitted as horizontal runs of tiles (spans) instead of one tile at a time. Circles come from a table of
+    spans computed once per radius
+    """
 
-        for x in range(round(pos1.x), round(pos2.x + 1)):
-            y = m * (x - pos1.x) + pos1.y
+    # Spans of a circle for every radius drawn so far, as ((dy, dx, length), ...) relative to the centre
+    _circle_spans: Dict[int, Tuple[Tuple[int, int, int], ...]] = {}
 
-            self.draw_tile(Vector(x, y), char, colour)
+    def __init__(self, span_add: SpanCallback):
+        self.span_add = span_add
 
-    def _draw_line_y(self, pos1: Vector, pos2: Vector, char: str, colour: int) -> NoReturn:
-        distance_x = pos2.x - pos1.x
-        distance_y = pos2.y - pos1.y
+    def draw_tile(self, x: int, y: int, char: str, colour: int) -> NoReturn:
+        """Draws a tile at a position"""
+        self.span_add(x, y, 1, ord(char), colour)
 
-        m_inv = distance_x / distance_y
+    def draw_span(self, x: int, y: int, length: int, char: str, colour: int) -> NoReturn:
+        """Draws a horizontal run of tiles starting at a position"""
+        if length > 0:
+            self.span_add(x, y, length, ord(char), colour)
 
-        for y in range(round(pos1.y), round(pos2.y + 1)):
-            x = m_inv * (y - pos1.y) + pos1.x
+    def draw_line(self, pos1: Vector, pos2: Vector, char: str, colour: int) -> NoReturn:
+        """Draws a vector line. Positions are tiles.
 
-            self.draw_tile(Vector(x, y), char, colour)
+        Float positions are allowed: the ends are on the tiles containing them. The tiles in between come from
+        Bresenham's algorithm, in integers only. Consecutive tiles on the same row are drawn as a single span
+        """
+        # floor() keeps tiles left of or above the screen off it, the way the bounds check of the renderer used to
+        x1 = floor(pos1.x)
+        y1 = floor(pos1.y)
+        x2 = floor(pos2.x)
+        y2 = floor(pos2.y)
+        if x2 < x1:  # always step right, so tiles on a row are consecutive
+            x1, y1, x2, y2 = x2, y2, x1, y1
+        char = ord(char)
+        span_add = self.span_add
+
+        distance_x = x2 - x1
+        distance_y = -abs(y2 - y1)
+        step_y = 1 if y1 < y2 else -1
+        error = distance_x + distance_y
+        x = run_x = x1
+        y = y1
+        while True:
+            if x == x2 and y == y2:
+                span_add(run_x, y, x - run_x + 1, char, colour)
+                return
+            next_x = x
+            next_y = y
+            doubled = 2 * error
+            if doubled >= distance_y:
+                error += distance_y
+                next_x += 1
+            if doubled <= distance_x:
+                error += distance_x
+                next_y += step_y
+            if next_y != y:  # the row ends at this tile
+                span_add(run_x, y, x - run_x + 1, char, colour)
+                run_x = next_x
+            x = next_x
+            y = next_y
 
     def draw_rect(self, pos: Vector, size: Vector, char: str, colour: int) -> NoReturn:
         """
@@ -64,21 +76,68 @@ class Drawer:
 
         Float positions are allowed.
         """
-        for x in range(round(pos.x), round(pos.x + size.x), 1):
-            for y in range(round(pos.y), round(pos.y + size.y), 1):
-                draw_x = round(pos.x) + x
-                draw_y = round(pos.y) + y
-
-                self.draw_tile(Vector(draw_x, draw_y), char, colour)
+        x1 = round(pos.x)
+        y1 = round(pos.y)
+        width = round(pos.x + size.x) - x1
+        if width <= 0:
+            return
+        char = ord(char)
+        for y in range(y1, round(pos.y + size.y)):
+            self.span_add(x1, y, width, char, colour)
 
     def draw_circle(self, pos: Vector, radius: float, char: str, colour: int) -> NoReturn:
         """
         Draws a circle
 
-        Float positions are allowed.
+        Float positions are allowed. The radius is rounded to whole tiles. Tiles are twice as tall as they are wide,
+        so the circle is halved vertically
         """
-        for x in range(round(-radius), round(radius)):
-            height = round(sqrt(radius * radius - x * x) / 2)
-
-            for y in range(-height, height):
-                self.draw_tile(Vector(x + pos.x, y + pos.y), char, colour)
+        # floor() keeps tiles left of or above the screen off it, the way the bounds check of the renderer used to
+        centre_x = floor(pos.x)
+        centre_y = floor(pos.y)
+        char = ord(char)
+        for dy, dx, length in self.circle_spans(round(abs(radius))):
+            self.span_add(centre_x + dx, centre_y + dy, length, char, colour)
+
+    @classmethod
+    def circle_spans(cls, radius: int) -> Tuple[Tuple[int, int, int], ...]:
+        """Gets the spans of a circle as ((dy, dx, length), ...) relative to its centre
+
+        The outline comes from the midpoint circle algorithm, in integers only. Column dx of the circle covers the
+        rows -h to h - 1, where h is half the height of the outline in that column. Spans are computed once per
+        radius and then reused
+        """
+        spans = cls._circle_spans.get(radius)
+        if spans is not None:
+            return spans
+
+        # Height of the outline above the centre in each column right of it, walking one octant and mirroring it.
+        # The outline is walked at twice the size, so halving its heights for the tiles rounds them only once
+        size = 2 * radius
+        heights = [0] * (size + 1)
+        x = 0
+        y = size
+        decision = 1 - size
+        while x <= y:
+            heights[x] = max(heights[x], y)
+            heights[y] = max(heights[y], x)
+            if decision < 0:
+                decision += 2 * x + 3
+            else:
+                decision += 2 * (x - y) + 5
+                y -= 1
+            x += 1
+        halves = [(heights[2 * dx] + 2) // 4 for dx in range(radius + 1)]  # a quarter, rounded half up
+
+        # The outline touches the centre row at dx = ±radius, so those columns are left out. Heights shrink away
+        # from the centre, so each row is one span
+        spans = []
+        top = halves[0] if radius else 0
+        for dy in range(-top, top):
+            row = dy if dy >= 0 else -dy - 1  # rows -h to h - 1 are covered, so row dy is as wide as row -dy - 1
+            width = max(dx for dx in range(radius) if halves[dx] > row)
+            spans.append((dy, -width, 2 * width + 1))
+
+        spans = tuple(spans)
+        cls._circle_spans[radius] = spans
+        return spans
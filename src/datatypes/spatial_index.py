@@ -0,0 +1,236 @@
+import math
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, NoReturn, Optional, Tuple
+
+Bounds = Tuple[int, int, int, int]  # (x1, y1, x2, y2) in tiles, both corners inclusive
+
+
+class SpatialHash:
+    """A uniform grid over tile space, mapping each cell to the items overlapping it
+
+    Items are stored with inclusive integer tile bounds. Queries only visit the cells they touch,
+    so their cost depends on the area being queried rather than on the number of items stored
+    """
+
+    def __init__(self, cell_size: int = 8):
+        """Initialize an empty spatial hash
+
+        :param cell_size: Width and height of a single grid cell in tiles
+        """
+        self.cell_size = cell_size
+        self.cells: Dict[Tuple[int, int], Dict[Any, None]] = defaultdict(dict)
+        self.bounds: Dict[Any, Bounds] = {}
+
+        # Grow-only extent of every cell ever used, so raycasts know when to stop walking the grid
+        self._extent: Optional[Tuple[int, int, int, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.bounds)
+
+    def __contains__(self, item: Any) -> bool:
+        return item in self.bounds
+
+    def clear(self) -> NoReturn:
+        """Removes every item from the grid"""
+        self.cells.clear()
+        self.bounds.clear()
+        self._extent = None
+
+    def insert(self, item: Any, bounds: Bounds) -> NoReturn:
+        """Adds an item covering the given tile bounds"""
+        self.bounds[item] = bounds
+        self._grow_extent(bounds)
+        for cell in self._cells_of(bounds):
+            self.cells[cell][item] = None
+
+    def remove(self, item: Any) -> NoReturn:
+        """Removes an item from the grid. Does nothing if the item is not stored"""
+        bounds = self.bounds.pop(item, None)
+        if bounds is None:
+            return
+        for cell in self._cells_of(bounds):
+            bucket = self.cells[cell]
+            bucket.pop(item, None)
+            if not bucket:
+                del self.cells[cell]
+
+    def move(self, item: Any, bounds: Bounds) -> NoReturn:
+        """Updates the bounds of an item, only touching the cells that actually changed"""
+        old_bounds = self.bounds.get(item)
+        if old_bounds == bounds:
+            return
+        if old_bounds is not None and self._cell_range(old_bounds) == self._cell_range(bounds):
+            self.bounds[item] = bounds
+            return
+        self.remove(item)
+        self.insert(item, bounds)
+
+    def query_point(self, x: int, y: int) -> List[Any]:
+        """Gets every item whose bounds contain the tile (x, y)"""
+        bucket = self.cells.get((x // self.cell_size, y // self.cell_size))
+        if not bucket:
+            return []
+        result = []
+        for item in bucket:
+            x1, y1, x2, y2 = self.bounds[item]
+            if x1 <= x <= x2 and y1 <= y <= y2:
+                result.append(item)
+        return result
+
+    def query_rect(self, x1: int, y1: int, x2: int, y2: int) -> List[Any]:
+        """Gets every item whose bounds overlap the inclusive tile rectangle (x1, y1) - (x2, y2)"""
+        if self._extent is None:
+            return []
+        # Clamp the walked cells to the populated part of the grid, so huge rectangles stay cheap
+        size = self.cell_size
+        extent_x1, extent_y1, extent_x2, extent_y2 = self._extent
+        seen = {}
+        for cell in self._cells_of(
+            (
+                max(x1, extent_x1 * size),
+                max(y1, extent_y1 * size),
+                min(x2, (extent_x2 + 1) * size - 1),
+                min(y2, (extent_y2 + 1) * size - 1),
+            )
+        ):
+            bucket = self.cells.get(cell)
+            if not bucket:
+                continue
+            for item in bucket:
+                if item in seen:
+                    continue
+                item_x1, item_y1, item_x2, item_y2 = self.bounds[item]
+                if item_x1 <= x2 and x1 <= item_x2 and item_y1 <= y2 and y1 <= item_y2:
+                    seen[item] = None
+        return list(seen)
+
+    def raycast(
+        self,
+        origin_x: float,
+        origin_y: float,
+        direction_x: float,
+        direction_y: float,
+        max_distance: float = math.inf,
+        predicate: Callable[[Any], bool] = None,
+    ) -> Optional[Tuple[Any, float]]:
+        """Finds the nearest item hit by a ray
+
+        Walks the grid cell by cell along the ray (Amanatides & Woo), so only cells on the path are visited
+
+        :param predicate: If given, items for which it returns False are ignored
+        :return: (item, distance) for the nearest hit, or None if nothing was hit within max_distance
+        """
+        length = math.hypot(direction_x, direction_y)
+        if length == 0 or self._extent is None:
+            return None
+        direction_x /= length
+        direction_y /= length
+
+        # Never walk further than the furthest populated cell
+        extent_x1, extent_y1, extent_x2, extent_y2 = self._extent
+        cell_size = self.cell_size
+        exit_distance = self._ray_box(
+            origin_x,
+            origin_y,
+            direction_x,
+            direction_y,
+            (extent_x1 * cell_size, extent_y1 * cell_size, (extent_x2 + 1) * cell_size, (extent_y2 + 1) * cell_size),
+            exit_point=True,
+        )
+        if exit_distance is None:
+            return None
+        max_distance = min(max_distance, exit_distance)
+
+        cell_x = math.floor(origin_x / cell_size)
+        cell_y = math.floor(origin_y / cell_size)
+        step_x, next_x, delta_x = self._ray_axis(origin_x, direction_x, cell_x)
+        step_y, next_y, delta_y = self._ray_axis(origin_y, direction_y, cell_y)
+
+        best_item = None
+        best_distance = max_distance
+        checked = set()
+        distance = 0.0
+        while distance <= best_distance:
+            for item in self.cells.get((cell_x, cell_y), ()):
+                if item in checked:
+                    continue
+                checked.add(item)
+                if predicate is not None and not predicate(item):
+                    continue
+                x1, y1, x2, y2 = self.bounds[item]
+                hit = self._ray_box(origin_x, origin_y, direction_x, direction_y, (x1, y1, x2 + 1, y2 + 1))
+                if hit is not None and hit <= best_distance:
+                    best_item, best_distance = item, hit
+
+            if next_x < next_y:
+                distance = next_x
+                next_x += delta_x
+                cell_x += step_x
+            else:
+                distance = next_y
+                next_y += delta_y
+                cell_y += step_y
+
+        if best_item is None:
+            return None
+        return best_item, best_distance
+
+    def _ray_axis(self, origin: float, direction: float, cell: int) -> Tuple[int, float, float]:
+        """Gets the step, distance to the first cell boundary and distance between boundaries for one axis"""
+        if direction > 0:
+            return 1, ((cell + 1) * self.cell_size - origin) / direction, self.cell_size / direction
+        if direction < 0:
+            return -1, (cell * self.cell_size - origin) / direction, -self.cell_size / direction
+        return 0, math.inf, math.inf
+
+    @staticmethod
+    def _ray_box(
+        origin_x: float,
+        origin_y: float,
+        direction_x: float,
+        direction_y: float,
+        box: Tuple[float, float, float, float],
+        exit_point: bool = False,
+    ) -> Optional[float]:
+        """Slab test. Gets the distance at which the ray enters (or exits) a box, or None if it misses"""
+        t_enter = 0.0
+        t_exit = math.inf
+        for origin, direction, low, high in (
+            (origin_x, direction_x, box[0], box[2]),
+            (origin_y, direction_y, box[1], box[3]),
+        ):
+            if direction == 0:
+                if not low <= origin < high:
+                    return None
+                continue
+            t1 = (low - origin) / direction
+            t2 = (high - origin) / direction
+            if t1 > t2:
+                t1, t2 = t2, t1
+            t_enter = max(t_enter, t1)
+            t_exit = min(t_exit, t2)
+            if t_enter > t_exit:
+                return None
+        return t_exit if exit_point else t_enter
+
+    def _cell_range(self, bounds: Bounds) -> Tuple[int, int, int, int]:
+        x1, y1, x2, y2 = bounds
+        size = self.cell_size
+        return x1 // size, y1 // size, x2 // size, y2 // size
+
+    def _cells_of(self, bounds: Bounds) -> List[Tuple[int, int]]:
+        cell_x1, cell_y1, cell_x2, cell_y2 = self._cell_range(bounds)
+        return [(x, y) for x in range(cell_x1, cell_x2 + 1) for y in range(cell_y1, cell_y2 + 1)]
+
+    def _grow_extent(self, bounds: Bounds) -> NoReturn:
+        cell_x1, cell_y1, cell_x2, cell_y2 = self._cell_range(bounds)
+        if self._extent is None:
+            self._extent = (cell_x1, cell_y1, cell_x2, cell_y2)
+        else:
+            extent_x1, extent_y1, extent_x2, extent_y2 = self._extent
+            self._extent = (
+                min(extent_x1, cell_x1),
+                min(extent_y1, cell_y1),
+                max(extent_x2, cell_x2),
+                max(extent_y2, cell_y2),
+            )
@@ -2,6 +2,7 @@ from typing import List, NoReturn, Tuple, Union
 
 from .raster_drawer import Drawer
 from .shape import Shape
+from .tile_buffer import TRANSPARENT, TileBuffer
 from .vector import Vector
 
 # from .game_object import GameObject
@@ -22,20 +23,30 @@ class Texture:
         :param obj: The object this texture belongs to.
         """
         self.object = obj
-        self.buffer = []  # buffer of tiles to be rendered, refreshed each frame
-        self.drawer = Drawer(self._buffer_tile)
+        self.buffer = TileBuffer()  # buffer of tiles to be rendered, refilled each frame
+        self.drawer = Drawer(self.buffer.add_span)
+
+    def copy(self, obj: "GameObject" = None) -> "Texture":  # noqa: F821
+        """Returns a copy of the texture attached to another object, with a buffer of its own
+
+        Everything else (characters, colours, nested textures) is shared with this texture
+        """
+        texture = object.__new__(type(self))
+        texture.__dict__.update(self.__dict__)
+        texture.object = obj
+        texture.buffer = TileBuffer()
+        texture.drawer = Drawer(texture.buffer.add_span)
+        return texture
 
     def render(
         self, position: Vector = None, size: Vector = None, orientation: float = None, shape: Shape = None
-    ) -> list:
+    ) -> TileBuffer:
         """Outputs the texture in a format ready to render
 
         Takes into account the position, size and orientation of the object
 
-        Output format is [[position: Vector, char: str, colour: int]]
+        Output is a TileBuffer of (x, y, character code, colour) records. It is reused on the next call
         """
-        self.buffer = []
-
         if not size:
             if self.object:
                 size = self.object.size
@@ -57,8 +68,15 @@ class Texture:
             else:
                 shape = Shape.Rectangle
 
-        self.specific_render(position, size, orientation, shape)
+        return self.render_at(position, size, orientation, shape)
 
+    def render_at(self, position: Vector, size: Vector, orientation: float, shape: Shape) -> TileBuffer:
+        """Outputs the texture for exactly the given placement, never falling back on the object's
+
+        Output is the same as render()
+        """
+        self.buffer.clear()
+        self.specific_render(position, size, orientation, shape)
         return self.buffer
 
     def specific_render(self, position: Vector, size: Vector, orientation: float, shape: Shape) -> NoReturn:
@@ -70,9 +88,10 @@ class Texture:
         """
         pass
 
-    def _buffer_tile(self, position: Vector, character: str, colour: int) -> NoReturn:
+    def _buffer_tile(self, x: int, y: int, character: str, colour: int) -> NoReturn:
         """Adds a tile to be rendered in the current buffer"""
-        self.buffer.append([position, character, colour])
+        if character != TRANSPARENT:
+            self.buffer.add(x, y, ord(character), colour)
 
 
 class SolidTexture(Texture):
@@ -94,10 +113,11 @@ class SolidTexture(Texture):
 
     def specific_render(self, position: Vector, size: Vector, orientation: float, shape: Shape) -> NoReturn:
         """Render a solid texture"""
+        if self.char == TRANSPARENT:
+            return  # nothing would be drawn anyway
+
         if shape == shape.Rectangle:
-            for x in range(round(position.x), round(position.x + size.x), 1):
-                for y in range(round(position.y), round(position.y + size.y), 1):
-                    self._buffer_tile(Vector(x, y), self.char, self.colour)
+            self.drawer.draw_rect(position, size, self.char, self.colour)
         elif shape == Shape.Line:
             # TODO: Do we really need to go into a separate class?
             self.drawer.draw_line(position, size, self.char, self.colour)
@@ -111,7 +131,7 @@ class EmptyTexture(SolidTexture):
     """An entirely transparent texture, mostly used internally when textures are not specified"""
 
     def __init__(self, obj: "GameObject" = None):  # noqa: F821
-        super().__init__(obj=obj, char="TRANSPARENT", colour=0)
+        super().__init__(obj=obj, char=TRANSPARENT, colour=0)
 
 
 class FixedTexture(Texture):
@@ -141,7 +161,7 @@ class FixedTexture(Texture):
                 except StopIteration:
                     empty = EmptyTexture()
                     next_char = (empty.char, empty.colour)
-                self._buffer_tile(Vector(round(x + position.x), round(y + position.y)), next_char[0], next_char[1])
+                self._buffer_tile(round(x + position.x), round(y + position.y), next_char[0], next_char[1])
 
     def next_character(self) -> Tuple[str, int]:
         """Iterate over all characters in the texture"""
@@ -0,0 +1,70 @@
+from array import array
+from typing import Iterator, NoReturn, Tuple
+
+TRANSPARENT = "TRANSPARENT"  # character of tiles that are never drawn
+STRIDE = 4  # integers per record
+
+
+class TileBuffer:
+    """A reusable buffer of tiles, packed as (x, y, character code, colour) integer records
+
+    The records live in a single preallocated array('i') that only grows, so rasterising into the buffer
+    every frame does not allocate a Python object per tile. Read it through `data` and `length`:
+    record i occupies data[i * STRIDE:(i + 1) * STRIDE]
+    """
+
+    STRIDE = STRIDE
+
+    def __init__(self, capacity: int = 64):
+        """Initialize an empty buffer
+
+        :param capacity: Number of records to preallocate
+        """
+        self.data = array("i", [0]) * (capacity * STRIDE)
+        self.length = 0  # number of records in use
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __iter__(self) -> Iterator[Tuple[int, int, int, int]]:
+        """Iterates over the records as (x, y, character code, colour). Allocates; prefer data and length"""
+        data = self.data
+        for offset in range(0, self.length * STRIDE, STRIDE):
+            yield data[offset], data[offset + 1], data[offset + 2], data[offset + 3]
+
+    def clear(self) -> NoReturn:
+        """Empties the buffer, keeping its memory for the next frame"""
+        self.length = 0
+
+    def add(self, x: int, y: int, char: int, colour: int) -> NoReturn:
+        """Appends a tile. `char` is a character code, as returned by ord()"""
+        offset = self.length * STRIDE
+        data = self.data
+        if offset == len(data):
+            self.reserve(self.length or 1)  # double the capacity
+        data[offset] = x
+        data[offset + 1] = y
+        data[offset + 2] = char
+        data[offset + 3] = colour
+        self.length += 1
+
+    def add_span(self, x: int, y: int, length: int, char: int, colour: int) -> NoReturn:
+        """Appends a horizontal run of `length` tiles starting at (x, y)"""
+        if length <= 0:
+            return
+        self.reserve(length)
+        data = self.data
+        offset = self.length * STRIDE
+        for tile_x in range(x, x + length):
+            data[offset] = tile_x
+            data[offset + 1] = y
+            data[offset + 2] = char
+            data[offset + 3] = colour
+            offset += STRIDE
+        self.length += length
+
+    def reserve(self, records: int) -> NoReturn:
+        """Makes sure `records` more records fit without growing the array mid-write"""
+        needed = (self.length + records) * STRIDE
+        if needed > len(self.data):
+            self.data.extend(array("i", bytes((needed - len(self.data)) * self.data.itemsize)))
@@ -10,17 +10,24 @@ if typing.TYPE_CHECKING:
 class Triggers:
     """Represents an output action for a sensor (e.g. button, lever)
 
-    Consists of a list of triggers
+    Consists of a list of triggers. An object with Triggers is a sensor: the box processes them when
+    something starts touching the object, and the end triggers when something stops touching it
     """
 
-    def __init__(self, triggers: List["Trigger"]):
+    def __init__(self, triggers: List["Trigger"], end_triggers: List["Trigger"] = None):
         self.triggers = triggers
+        self.end_triggers = end_triggers if end_triggers is not None else []
 
     def process(self) -> NoReturn:
         """Process a list of triggers (in order)"""
         for trigger in self.triggers:
             trigger.process()
 
+    def process_end(self) -> NoReturn:
+        """Process the end triggers (in order)"""
+        for trigger in self.end_triggers:
+            trigger.process()
+
 
 class Trigger:
     """Represents a single trigger"""
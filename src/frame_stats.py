@@ -0,0 +1,150 @@
+import json
+import statistics
+import time
+from collections import deque
+from typing import Dict, NoReturn, Optional, Tuple
+
+from .tracing import tracer
+
+
+class FrameStats:
+    """Rolling statistics about the pacing of an application loop
+
+    Frame intervals are kept for the last `window` frames. Counters cover every frame since the last reset()
+    """
+
+    def __init__(self, window: int = 120):
+        """Initialize the statistics
+
+        :param window: Number of recent frames the achieved FPS and jitter are computed over
+        """
+        self.intervals = deque(maxlen=window)  # seconds between the starts of consecutive frames
+        self.frames = 0
+        self.late_frames = 0  # frames that were still running when their deadline passed
+        self.dropped_renders = 0  # frames that were ticked but not rendered to catch up
+        self.resyncs = 0  # times the loop fell so far behind it gave up on catching up
+        self._last_start: Optional[float] = None
+
+    def reset(self) -> NoReturn:
+        """Clears every statistic, e.g. when the loop is restarted"""
+        self.intervals.clear()
+        self.frames = 0
+        self.late_frames = 0
+        self.dropped_renders = 0
+        self.resyncs = 0
+        self._last_start = None
+
+    def record(self, start: float, late: bool, rendered: bool) -> NoReturn:
+        """Records a frame
+
+        :param start: Time the frame started at, from time.perf_counter()
+        :param late: Whether the frame overran its deadline
+        :param rendered: Whether the frame was rendered, or only ticked
+        """
+        if self._last_start is not None:
+            self.intervals.append(start - self._last_start)
+        self._last_start = start
+        self.frames += 1
+        self.late_frames += late
+        self.dropped_renders += not rendered
+
+    @property
+    def fps(self) -> float:
+        """Frames per second achieved over the window"""
+        elapsed = sum(self.intervals)
+        return len(self.intervals) / elapsed if elapsed else 0.0
+
+    @property
+    def jitter(self) -> float:
+        """Standard deviation of the frame interval over the window, in seconds"""
+        return statistics.pstdev(self.intervals) if len(self.intervals) > 1 else 0.0
+
+    def summary(self) -> dict:
+        """Every statistic, as a dictionary"""
+        return {
+            "fps": self.fps,
+            "jitter": self.jitter,
+            "frames": self.frames,
+            "late_frames": self.late_frames,
+            "dropped_renders": self.dropped_renders,
+            "resyncs": self.resyncs,
+        }
+
+
+class RollingHistogram:
+    """Keeps the last `window` samples of a value, to get percentiles from"""
+
+    def __init__(self, window: int = 240):
+        self.samples = deque(maxlen=window)
+        self.count = 0  # every sample added, including the ones that left the window
+
+    def add(self, value: float) -> NoReturn:
+        """Adds a sample"""
+        self.samples.append(value)
+        self.count += 1
+
+    def percentiles(self, *percents: float) -> Tuple[float, ...]:
+        """Gets percentiles (0 to 100) of the samples in the window, using the nearest rank"""
+        if not self.samples:
+            return (0.0,) * len(percents)
+        ordered = sorted(self.samples)
+        last = len(ordered) - 1
+        return tuple(ordered[min(last, int(percent / 100 * len(ordered)))] for percent in percents)
+
+
+class PhaseTimers:
+    """Times the phases of a frame into a rolling histogram per phase
+
+    Call start() at the beginning of the frame, then lap(phase) at the end of each phase.
+    Each lap costs a perf_counter() call and a deque append, so loops can leave the timers on.
+    Laps are also recorded as spans when tracing is on
+    """
+
+    PERCENTILES = (50, 95, 99)
+
+    def __init__(self, window: int = 240):
+        """Initialize the timers
+
+        :param window: Number of recent samples the percentiles of each phase are computed over
+        """
+        self.window = window
+        self.histograms: Dict[str, RollingHistogram] = {}
+        self._lap_start = time.perf_counter()
+
+    def start(self) -> NoReturn:
+        """Starts timing the first phase"""
+        self._lap_start = time.perf_counter()
+
+    def lap(self, phase: str) -> NoReturn:
+        """Records the time since the previous lap (or start()) for a phase"""
+        now = time.perf_counter()
+        self.add(phase, now - self._lap_start)
+        tracer.complete(phase, "frame", self._lap_start, now)
+        self._lap_start = now
+
+    def add(self, phase: str, seconds: float) -> NoReturn:
+        """Records a duration for a phase, for phases that are not timed with lap()"""
+        histogram = self.histograms.get(phase)
+        if histogram is None:
+            histogram = self.histograms[phase] = RollingHistogram(self.window)
+        histogram.add(seconds)
+
+    def reset(self) -> NoReturn:
+        """Forgets every sample"""
+        self.histograms.clear()
+
+    def summary(self) -> Dict[str, dict]:
+        """p50, p95 and p99 of every phase in seconds, with the number of samples, in the order phases were seen"""
+        summary = {}
+        for phase, histogram in self.histograms.items():
+            p50, p95, p99 = histogram.percentiles(*self.PERCENTILES)
+            summary[phase] = {"p50": p50, "p95": p95, "p99": p99, "count": histogram.count}
+        return summary
+
+    def dump(self, path: str, **extra) -> NoReturn:
+        """Writes the summary to a JSON file
+
+        :param extra: Additional top level entries, e.g. FrameStats.summary()
+        """
+        with open(path, "w") as file:
+            json.dump({"phases": self.summary(), **extra}, file, indent=4)
@@ -1,13 +1,29 @@
+import argparse
+import asyncio
 import curses
 import enum
 import os
 import time
 from abc import ABC
-from typing import NoReturn, Optional
+from collections import namedtuple
+from functools import partial
+from typing import Dict, List, NoReturn, Optional, Tuple
 
 import levels as loaded_levels
 from datatypes import Menu
 from input_getter import InputGetter
+from src.allocation_tracker import AllocationTracker
+from src.box import BoxState
+from src.color_pairs import color_pairs
+from src.datatypes.vector import window_manager as vector_window_manager
+from src.frame_stats import FrameStats, PhaseTimers
+from src.level_preloader import LevelPreloader
+from src.physics_process import PhysicsProcess
+from src.render_backends import CursesBackend, RenderBackend, render_backends
+from src.render_pipeline import RenderPipeline, draw_overlay
+from src.sampling_profiler import profiler
+from src.terminal_geometry import terminal
+from src.tracing import TRACE_ENV_VAR, tracer
 from window_manager import WindowManager
 
 
@@ -17,8 +33,9 @@ def center(string: str, width: int) -> str:
 
 
 class ExitCodes(enum.IntEnum):
-    """Return codes used in the AbstractAppLoop to indicate pause or app exit"""
+    """Return codes used in the AbstractAppLoop to indicate pause, app exit or level completion"""
 
+    COMPLETE = -3
     PAUSE = -2
     STOP = -1
 
@@ -28,37 +45,147 @@ class AbstractAppLoop(ABC):
 
     PAUSE_KEYS = {27, ord("p"), ord("P")}
     STOP_KEYS = {3, 26, ord("q"), ord("Q")}
+    PROFILER_KEYS = {curses.KEY_F9, ord("r"), ord("R")}
 
-    def __init__(self, window_manager: WindowManager, input_getter: InputGetter, max_fps: int = 20):
+    def __init__(
+        self,
+        window_manager: WindowManager,
+        input_getter: InputGetter,
+        max_fps: int = 20,
+        spin_time: float = 0.0,
+        max_frame_skip: int = 5,
+        max_lag: int = 10,
+    ):
+        """Initialize the loop
+
+        :param spin_time: How long before each deadline to stop sleeping and busy-wait instead, in seconds.
+        Sleeping can overshoot by a millisecond or more, spinning hits the deadline precisely but uses the CPU
+        :param max_frame_skip: Most renders that can be skipped in a row while catching up
+        :param max_lag: Number of frames the loop can fall behind before it stops catching up and starts over
+        from the current time
+        """
         self.max_fps = max_fps
+        self.spin_time = spin_time
+        self.max_frame_skip = max_frame_skip
+        self.max_lag = max_lag
         self.window_manager = window_manager
         self.input_getter = input_getter
 
         self.running = False
         self.return_code = None
-        self.throttle = False
+        self.throttle = False  # whether the last frame overran its deadline
+        self.stats = FrameStats()
+        self.timers = PhaseTimers()  # time spent in each phase of a frame
+        self.allocations: Optional[AllocationTracker] = None  # set to record the memory allocated by each frame
+        # Set to run the loop as a task on this event loop, which also reads input and watches the window
+        self.event_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._skipped_renders = 0
 
     def start(self) -> Optional[int]:
-        """Main game loop. This method blocks until game is finished!"""
-        period = 1 / self.max_fps
-        self.running = True
-        exit_code = None
+        """Main game loop. This method blocks until game is finished!
 
-        self._pre_loop()
-        while self.running:
-            frame_end_time = time.time() + period
+        Frames are scheduled on absolute deadlines, so time spent in a frame doesn't push back the following ones.
+        When the loop is behind, renders are skipped (up to max_frame_skip in a row) but every tick still runs.
+        With an event_loop, frames run as a task on it and the waits between them let it handle input and window
+        events, instead of sleeping
+        """
+        if self.event_loop is not None:
+            return self.event_loop.run_until_complete(self._start_async())
 
-            exit_code = self._loop_step()
+        period = self._begin()
+        exit_code = None
+        deadline = time.perf_counter()
+        while self.running:
+            exit_code, deadline = self._frame(deadline + period, period)
             if exit_code is not None:
                 break
+            with tracer.span("wait", "loop"):
+                self._wait_until(deadline)
+
+        self._post_loop()
+        return exit_code
 
-            sleep_time = max(0.0, frame_end_time - time.time())
-            self.throttle = sleep_time == 0
-            time.sleep(sleep_time)
+    async def _start_async(self) -> Optional[int]:
+        """Main game loop, as a task on the event loop. See start()"""
+        period = self._begin()
+        exit_code = None
+        deadline = time.perf_counter()
+        while self.running:
+            exit_code, deadline = self._frame(deadline + period, period)
+            if exit_code is not None:
+                break
+            with tracer.span("wait", "loop"):
+                await self._wait_until_async(deadline)
 
         self._post_loop()
         return exit_code
 
+    def _begin(self) -> float:
+        """Resets the loop for a start, returning the frame period in seconds"""
+        self.running = True
+        self.stats.reset()
+        self.timers.reset()
+        self._skipped_renders = 0
+        self._pre_loop()
+        return 1 / self.max_fps
+
+    def _frame(self, deadline: float, period: float) -> Tuple[Optional[int], float]:
+        """Runs the tick and, unless the loop is behind, the render of a frame due by the deadline
+
+        :return: (exit code, deadline to wait for before the next frame). The deadline moves to now if the loop
+        fell too far behind to catch up
+        """
+        frame_start = time.perf_counter()
+        if self.allocations is not None:
+            self.allocations.begin_frame()
+
+        exit_code = self._loop_step()
+        if exit_code is not None:
+            return exit_code, deadline
+
+        # Only render if the tick left time for it, or if the screen has been stale for too long
+        rendered = time.perf_counter() < deadline or self._skipped_renders >= self.max_frame_skip
+        if rendered:
+            self._render()
+            self._skipped_renders = 0
+        else:
+            self._skipped_renders += 1
+        if self.allocations is not None:
+            self.allocations.end_frame()
+
+        now = time.perf_counter()
+        self.timers.add("frame", now - frame_start)
+        self.throttle = now >= deadline
+        self.stats.record(frame_start, late=self.throttle, rendered=rendered)
+        if tracer.enabled:
+            tracer.complete("frame", "loop", frame_start, now, {"late": self.throttle, "rendered": rendered})
+        if now - deadline > self.max_lag * period:
+            # Too far behind to catch up (e.g. the process was suspended), carry on from now instead
+            deadline = now
+            self.stats.resyncs += 1
+        return None, deadline
+
+    def _wait_until(self, deadline: float) -> NoReturn:
+        """Sleeps until the deadline (a time.perf_counter() value), spinning for the last spin_time seconds"""
+        remaining = deadline - time.perf_counter()
+        if remaining > self.spin_time:
+            time.sleep(remaining - self.spin_time)
+        if self.spin_time:
+            while time.perf_counter() < deadline:
+                pass
+
+    async def _wait_until_async(self, deadline: float) -> NoReturn:
+        """Waits on the event loop until the deadline, spinning for the last spin_time seconds like _wait_until()
+
+        The event loop handles input and window events meanwhile
+        """
+        remaining = deadline - time.perf_counter()
+        if remaining > self.spin_time:
+            await asyncio.sleep(remaining - self.spin_time)
+        if self.spin_time:
+            while time.perf_counter() < deadline:
+                pass
+
     def _pre_loop(self) -> NoReturn:
         """Every call that is to be scheduled before loop start goes here"""
         self.window_manager.update()  # for correct population of previous frame
@@ -67,16 +194,26 @@ class AbstractAppLoop(ABC):
         """Every call that is to be scheduled after loop stop goes here"""
         pass
 
+    def _render(self) -> NoReturn:
+        """Draws the current state. Called after _loop_step, unless the loop is behind and skips the render"""
+        pass
+
     def _loop_step(self) -> Optional[int]:
         """Every call that is to be scheduled at each frame goes here"""
+        self.timers.start()
+        terminal.poll()  # only does anything if SIGWINCH isn't handled
         self.window_manager.update()
+        self.timers.lap("window manager")
         key = self.input_getter.get_first_char_index(remove=True)
         exit_code = self._get_key_action(key)
+        self.timers.lap("input")
         return exit_code
 
     def _get_key_action(self, key: int) -> int:
         """Returns exit code or action of pressed key"""
-        if key in self.PAUSE_KEYS:
+        if key in self.PROFILER_KEYS:
+            profiler.toggle()
+        elif key in self.PAUSE_KEYS:
             return ExitCodes.PAUSE
         elif key in self.STOP_KEYS:
             curses.endwin()
@@ -86,25 +223,136 @@ class AbstractAppLoop(ABC):
 class GameLoop(AbstractAppLoop):
     """Main game loop class. Entry point of the game."""
 
-    def __init__(self, screen: curses.window, window_manager: WindowManager, input_getter: InputGetter):
+    HUD_KEYS = {curses.KEY_F3, ord("t"), ord("T")}
+    HUD_WIDTH = 36
+
+    def __init__(
+        self,
+        screen: curses.window,
+        window_manager: WindowManager,
+        input_getter: InputGetter,
+        backend: Optional[RenderBackend] = None,
+        physics_process: bool = False,
+        pipelined: bool = False,
+    ):
+        """Initialize the loop
+
+        :param backend: Backend the levels are drawn with. Defaults to drawing on the screen through curses
+        :param physics_process: Run the physics of levels in a worker process, leaving this one to render and
+        handle input. See PhysicsProcess
+        :param pipelined: Draw frames on a render thread, from snapshots taken after each tick. See RenderPipeline
+        """
         self.screen = screen
+        self.backend = backend or CursesBackend(screen)
+        self.show_hud = False
+        self.render_calls = 0  # calls the backend made to the terminal on the last render
+        self.box_state: Optional[BoxState] = None  # level being played, None to start a fresh copy of level_name
+        self.physics_process = physics_process
+        self.physics: Optional[PhysicsProcess] = None  # worker updating box_state, with physics_process
+        self.pipeline = RenderPipeline(self.backend, overlay_width=self.HUD_WIDTH) if pipelined else None
         super().__init__(window_manager=window_manager, input_getter=input_getter)
 
     def _loop_step(self) -> Optional[int]:
         """Every call that is to be scheduled at each frame goes here"""
+        if self.pipeline is not None and terminal.pending:
+            self.pipeline.drain()  # curses is resized next, not while the render thread draws
         exit_code = super()._loop_step()
-        self.box_state.update()
-        self.box_state.render(screen=self.screen)
+        if self.physics is not None:
+            if self.physics.sync():
+                self.timers.add("worker tick", self.physics.tick_times[-1])
+                self.timers.add("state age", self.physics.latencies[-1])
+            self.timers.lap("sync")
+            completed = self.physics.completed
+        else:
+            self.box_state.update(timers=self.timers)
+            completed = self.box_state.completed
+        if exit_code is None and completed:
+            return ExitCodes.COMPLETE
         return exit_code
 
+    def _render(self) -> NoReturn:
+        """Renders the level, or hands a snapshot of it over to the render thread when pipelined"""
+        if self.pipeline is not None:
+            self.timers.start()
+            snapshot = self.box_state.snapshot(self._hud_lines() if self.show_hud else None)
+            self.timers.lap("snapshot")
+            self.pipeline.submit(self.box_state.compositor, snapshot)
+            self.render_calls = self.pipeline.render_calls
+            return
+
+        self.backend.calls = 0
+        self.timers.start()
+        self.box_state.render(screen=self.backend)
+        self.timers.lap("render")
+        self.render_calls = self.backend.calls
+        if self.show_hud:
+            draw_overlay(self.backend, self._hud_lines(), self.HUD_WIDTH)
+
+    def _hud_lines(self) -> List[str]:
+        """Lines of the performance overlay drawn in the top left corner, over the level"""
+        lines = [f"{'ms':<15}{'p50':>7}{'p95':>7}{'p99':>7}"]
+        for phase, summary in self.timers.summary().items():
+            lines.append(
+                f"{phase:<15}{summary['p50'] * 1000:>7.2f}{summary['p95'] * 1000:>7.2f}{summary['p99'] * 1000:>7.2f}"
+            )
+        lines.append(f"objects {len(self.box_state.objects)}  calls/frame {self.render_calls}")
+        lines.append(f"fps {self.stats.fps:.1f}  late {self.stats.late_frames}  skipped {self.stats.dropped_renders}")
+        if color_pairs.hits or color_pairs.misses:  # only the curses backend uses colour pairs
+            lines.append(f"colour pairs  hit {color_pairs.hit_rate:.1%}  evicted {color_pairs.evictions}")
+        if self.pipeline is not None:
+            lines.append(f"render thread  dropped {self.pipeline.dropped}")
+        return lines
+
+    def _get_key_action(self, key: int) -> int:
+        """Returns exit code or action of pressed key"""
+        if key in self.HUD_KEYS:
+            self.show_hud = not self.show_hud
+            if not self.show_hud:
+                self.box_state.compositor.invalidate()  # the compositor doesn't know what the HUD covered
+        return super()._get_key_action(key)
+
     def _pre_loop(self) -> NoReturn:
         """Called before the loop starts"""
         super()._pre_loop()
-        self.box_state = levels[level_name]
+        if self.box_state is None:
+            self.stop_physics()
+            with tracer.span("load level", "level", {"level": level_name}):
+                self.box_state = preloader.get(level_name)  # instant if the menu preloaded it
+            if self.physics_process:
+                self.physics = PhysicsProcess(levels[level_name].build, self.box_state, self.max_fps)
+                self.physics.start()
+        elif self.physics is not None:
+            self.physics.resume()
+        self.box_state.compositor.invalidate()  # the menu was drawn over the previous frame
+        if self.pipeline is not None:
+            self.pipeline.start()
+
+    def _post_loop(self) -> NoReturn:
+        """Called after the loop stops"""
+        super()._post_loop()
+        if self.physics is not None:
+            self.physics.pause()
+        if self.pipeline is not None:
+            self.pipeline.drain()  # the menu is drawn next, once the last frame is on the screen
+
+    def stop_physics(self) -> NoReturn:
+        """Stops the physics worker of the level, if there is one"""
+        if self.physics is not None:
+            self.physics.stop()
+            self.physics = None
+
+
+# Where the lines of a menu go on the terminal, as (y, x, text). generation: TerminalGeometry.generation it is for.
+# text_rows: lines that fit on the screen. option_rows: one per option, None if it doesn't fit
+MenuLayout = namedtuple("MenuLayout", ["menu", "generation", "text_rows", "option_rows"])
 
 
 class MenuLoop(AbstractAppLoop):
-    """Menu loop class. Handles both rendering and processing of the menu"""
+    """Menu loop class. Handles both rendering and processing of the menu
+
+    Nothing happens in a menu until a key is pressed or the terminal is resized, so instead of running frames at
+    max_fps the menu waits for input between frames, and a frame only redraws what the key changed
+    """
 
     MENU_COLOR_PAIR = 200
 
@@ -114,43 +362,120 @@ class MenuLoop(AbstractAppLoop):
         self.screen = screen
         self.menu = None
         self.selected_index = 0
+        self.preloader: Optional[LevelPreloader] = None  # told which level is highlighted, to load it early
+        self.layouts: Dict[int, MenuLayout] = {}  # layout of each menu shown, by id of the menu
+        self._drawn: Optional[Tuple[MenuLayout, int]] = None  # layout on the screen and option selected on it
         curses.init_pair(self.MENU_COLOR_PAIR, curses.COLOR_BLACK, curses.COLOR_WHITE)
         super().__init__(window_manager=window_manager, input_getter=input_getter, max_fps=max_fps)
 
     def show_menu(self, menu: Menu) -> Optional[int]:
         """Displays specified menu"""
         self.menu = menu
+        self._highlight()
         return self.start()
 
-    def _pre_loop(self) -> NoReturn:
-        """Every call that is to be scheduled before loop start goes here"""
-        super()._pre_loop()
+    def start(self) -> Optional[int]:
+        """Menu loop. Blocks until an option is chosen, or the menu is left with a key
 
-    def _loop_step(self) -> Optional[int]:
-        """Every call that is to be scheduled at each frame goes here"""
-        exit_code = super()._loop_step()
-        self.screen.clear()
+        Each frame handles a key and draws the changes, then waits for the next key (or resize)
+        """
+        if self.event_loop is not None:
+            return self.event_loop.run_until_complete(self._start_async())
+
+        self._begin()
+        exit_code = None
+        while self.running:
+            exit_code = self._menu_frame()
+            if exit_code is not None:
+                break
+            self.input_getter.wait()
+
+        self._post_loop()
+        return exit_code
+
+    async def _start_async(self) -> Optional[int]:
+        """Menu loop, as a task on the event loop. See start()"""
+        self._begin()
+        exit_code = None
+        while self.running:
+            exit_code = self._menu_frame()
+            if exit_code is not None:
+                break
+            await self.input_getter.wait_async()
 
-        rows, cols = self.screen.getmaxyx()
-        # self.screen.resize(rows, cols)
-        curses.resize_term(rows, cols)  # more window glitches, less text glitches and crashes
-        top_line = rows // 2 - (len(self.menu.text_lines) + len(self.menu.options)) // 2
+        self._post_loop()
+        return exit_code
 
-        for index, item in enumerate(self.menu.text_lines):
+    def _menu_frame(self) -> Optional[int]:
+        """Handles a key, then draws what it changed"""
+        frame_start = time.perf_counter()
+        exit_code = self._loop_step()
+        if exit_code is None:
+            self._render()
+        self.stats.record(frame_start, late=False, rendered=exit_code is None)
+        return exit_code
+
+    def _highlight(self) -> NoReturn:
+        """Starts loading the highlighted level in the background, or cancels loading if it isn't a level"""
+        if self.preloader is None:
+            return
+        action = self.menu.options_actions[self.selected_index]
+        if isinstance(action, str) and action.startswith("level:"):
+            self.preloader.preload(action.split(":", 1)[1], (terminal.lines, terminal.columns))
+        else:
+            self.preloader.cancel()
+
+    def _pre_loop(self) -> NoReturn:
+        """Every call that is to be scheduled before loop start goes here"""
+        super()._pre_loop()
+        self._drawn = None  # the level or another menu is on the screen
+
+    def _layout(self, menu: Menu) -> MenuLayout:
+        """Gets where the lines of the menu go on the terminal, laying it out once per terminal size"""
+        layout = self.layouts.get(id(menu))
+        if layout is not None and layout.menu is menu and layout.generation == terminal.generation:
+            return layout
+
+        rows, cols = terminal.lines, terminal.columns
+        top_line = rows // 2 - (len(menu.text_lines) + len(menu.options)) // 2
+        text_rows = []
+        for index, item in enumerate(menu.text_lines):
             y = top_line + index + 1
             x = cols // 2 - len(item) // 2
-            if len(item) < cols and y < rows - 1:
-                self.screen.addstr(y, x, item)
+            if len(item) < cols and 0 <= y < rows - 1:
+                text_rows.append((y, x, item))
 
-        for index, item in enumerate(self.menu.options):
-            color = curses.color_pair(0) if index != self.selected_index else curses.color_pair(self.MENU_COLOR_PAIR)
-            y = top_line + len(self.menu.text_lines) + index + 2
+        option_rows = []
+        for index, item in enumerate(menu.options):
+            y = top_line + len(menu.text_lines) + index + 2
             x = cols // 2 - len(item) // 2
-            if len(item) < cols and y < rows - 1:  # checks aren't working sometimes?
-                self.screen.addstr(y, x, item, color)
+            option_rows.append((y, x, item) if len(item) < cols and 0 <= y < rows - 1 else None)
+
+        layout = self.layouts[id(menu)] = MenuLayout(menu, terminal.generation, text_rows, option_rows)
+        return layout
+
+    def _render(self) -> NoReturn:
+        """Draws the menu, or only the options whose selection changed if it is already on the screen"""
+        layout = self._layout(self.menu)
 
+        if self._drawn is None or self._drawn[0] is not layout:
+            self.screen.clear()
+            for y, x, item in layout.text_rows:
+                self.screen.addstr(y, x, item)
+            changed = range(len(layout.option_rows))
+        elif self._drawn[1] != self.selected_index:
+            changed = (self._drawn[1], self.selected_index)
+        else:
+            return  # nothing changed
+
+        for index in changed:
+            row = layout.option_rows[index]
+            if row is not None:
+                y, x, item = row
+                color = curses.color_pair(self.MENU_COLOR_PAIR if index == self.selected_index else 0)
+                self.screen.addstr(y, x, item, color)
         self.screen.refresh()
-        return exit_code
+        self._drawn = (layout, self.selected_index)
 
     def _post_loop(self) -> NoReturn:
         """Every call that is to be scheduled after loop stop goes here"""
@@ -163,8 +488,10 @@ class MenuLoop(AbstractAppLoop):
             return self.selected_index
         elif key == curses.KEY_UP:
             self.selected_index = max(self.selected_index - 1, 0)
+            self._highlight()
         elif key == curses.KEY_DOWN:
             self.selected_index = min(self.selected_index + 1, len(self.menu.options) - 1)
+            self._highlight()
 
         return super()._get_key_action(key)
 
@@ -172,13 +499,25 @@ class MenuLoop(AbstractAppLoop):
 level_name = ""
 # fmt: off
 levels = {
-    "Static Test": loaded_levels.static_test,
-    "Second Level": loaded_levels.second_level,
-    "Bouncy Ball": loaded_levels.bouncy_level,
-    "Falling Test": loaded_levels.falling_test
+    # Level files in levels/data, converted from the level modules with levels/converter.py
+    "Static Test": loaded_levels.LevelPrototype(partial(loaded_levels.load_data_level, "static_test")),
+    "Second Level": loaded_levels.LevelPrototype(partial(loaded_levels.load_data_level, "second_level")),
+    "Bouncy Ball": loaded_levels.LevelPrototype(partial(loaded_levels.load_data_level, "bouncy_level")),
+    "Falling Test": loaded_levels.LevelPrototype(partial(loaded_levels.load_data_level, "falling_test")),
+    # Generated levels, for seeing how the game copes with many objects
+    "Stress: 50 Objects": loaded_levels.LevelPrototype(partial(loaded_levels.generate_level, 50, seed=1)),
+    "Stress: 300 Walls": loaded_levels.LevelPrototype(partial(
+        loaded_levels.generate_level,
+        300,
+        seed=2,
+        mix=loaded_levels.Mix(walls=3, falling=0, circles=0, lines=1, relative=1),
+    )),
 }
-# Add you level here
-# Format: {"Display name", loaded_levels.filename}
+# Add you level here. Levels are built when they are first highlighted in the menu, see LevelPreloader.
+# Every play starts from a fresh copy of the level, see LevelPrototype
+# Format for a level file in levels/data:
+# {"Display name", loaded_levels.LevelPrototype(partial(loaded_levels.load_data_level, "filename"))}
+preloader = LevelPreloader(levels)
 
 menus = {
     "start": Menu(
@@ -221,24 +560,64 @@ menus = {
         ["Back"],
         ["pause"],
     ),
+    "complete": Menu(
+        ["Level complete!"],
+        ["Levels", "Menu", "Exit"],
+        ["levels", "start", ExitCodes.STOP],
+    ),
     "pause": Menu(
         ["Paused"],
         ["Continue", "Settings", "Menu", "Exit"],
-        ["level:" + level_name, "settings_paused", "start", ExitCodes.STOP]
+        ["resume", "settings_paused", "start", ExitCodes.STOP]
     ),
 }
 # fmt: on
 
 
-def main(screen: curses.window) -> NoReturn:
-    """Main curses function"""
+def main(
+    screen: curses.window,
+    backend_name: str = "curses",
+    timings_path: Optional[str] = None,
+    allocations: Optional[AllocationTracker] = None,
+    physics_process: bool = False,
+    pipelined: bool = False,
+    asynchronous: bool = False,
+) -> NoReturn:
+    """Main curses function
+
+    :param backend_name: Name of the render backend levels are drawn with, see render_backends
+    :param timings_path: File the frame timings of the last level played are written to on exit, as JSON
+    :param allocations: Records the memory allocated by every frame of the levels played if given
+    :param physics_process: Run the physics of levels in a worker process
+    :param pipelined: Draw the frames of levels on a render thread
+    :param asynchronous: Run the loops on an asyncio event loop, which reads input when stdin is readable and
+    watches the window for events, instead of reading input on a thread and asking for the window rect every frame
+    """
     curses.curs_set(False)
     os.environ.setdefault("ESCDELAY", "25")
+    terminal.curses = True
+    terminal.refresh()
 
     window_manager = WindowManager()
-    input_getter = InputGetter(screen)
+    input_getter = InputGetter(screen, threaded=not asynchronous)
     menu_drawer = MenuLoop(screen, window_manager, input_getter)
-    loop = GameLoop(screen, window_manager, input_getter)
+    menu_drawer.preloader = preloader
+    backend = CursesBackend(screen) if backend_name == "curses" else render_backends[backend_name]()
+    loop = GameLoop(
+        screen, window_manager, input_getter, backend=backend, physics_process=physics_process, pipelined=pipelined
+    )
+    loop.allocations = allocations
+    event_loop = None
+    if asynchronous:
+        event_loop = asyncio.new_event_loop()
+        input_getter.watch(event_loop)
+        # Both are polled every frame if the platform has no window events
+        window_manager.watch(event_loop)
+        vector_window_manager.watch(event_loop)  # the one levels are updated with
+        terminal.watch(event_loop)
+        loop.event_loop = menu_drawer.event_loop = event_loop
+    else:
+        terminal.install_signal_handler()
 
     menu = "start"
     while True:
@@ -250,18 +629,101 @@ def main(screen: curses.window) -> NoReturn:
             break
         menu_drawer.selected_index = 0
 
-        if menu.startswith("level:"):
-            global level_name
-            level_name = menu.split(":", 1)[1]
+        if menu.startswith("level:") or menu == "resume":
+            if menu != "resume":
+                global level_name
+                level_name = menu.split(":", 1)[1]
+                loop.box_state = None  # play a fresh copy of the level
             loop_return = loop.start()
             if loop_return == ExitCodes.STOP:
                 break
             elif loop_return == ExitCodes.PAUSE:
                 menu = "pause"
+            elif loop_return == ExitCodes.COMPLETE:
+                menu = "complete"
 
+    loop.stop_physics()
+    if loop.pipeline is not None:
+        loop.pipeline.stop()
     input_getter.quit()
+    if event_loop is not None:
+        event_loop.close()
+    terminal.curses = False
+    if timings_path is not None:
+        extra = {"render_thread": loop.pipeline.summary()} if loop.pipeline is not None else {}
+        loop.timers.dump(timings_path, frame_stats=loop.stats.summary(), colour_pairs=color_pairs.stats(), **extra)
 
 
 if __name__ == "__main__":
-    curses.wrapper(main)
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--backend",
+        choices=render_backends.keys(),
+        default="curses",
+        help="how levels are drawn: through curses, or as raw ANSI escape codes written once per frame",
+    )
+    parser.add_argument("--timings", metavar="FILE", help="write frame timings to FILE as JSON on exit")
+    parser.add_argument(
+        "--trace",
+        metavar="FILE",
+        default=os.environ.get(TRACE_ENV_VAR),
+        help=f"record a trace of every frame to FILE, to open in Perfetto (or set {TRACE_ENV_VAR})",
+    )
+    parser.add_argument(
+        "--profile-rate", metavar="HZ", type=float, default=200, help="samples per second of the profiler"
+    )
+    parser.add_argument(
+        "--profile-dir",
+        metavar="DIR",
+        default=".",
+        help="where profiles are written. Press F9 or R in game, or send SIGUSR1, to start and stop profiling",
+    )
+    parser.add_argument(
+        "--allocations", metavar="FILE", help="record the memory allocated by every frame, written to FILE on exit"
+    )
+    parser.add_argument(
+        "--allocation-budget", metavar="BYTES", type=int, help="count frames allocating more than BYTES"
+    )
+    parser.add_argument(
+        "--physics-process",
+        action="store_true",
+        help="run the physics in a worker process, so it doesn't share a core with rendering and input",
+    )
+    parser.add_argument(
+        "--pipelined-render",
+        action="store_true",
+        help="draw frames on a render thread, so drawing a frame overlaps with the tick of the next one",
+    )
+    parser.add_argument(
+        "--event-loop",
+        action="store_true",
+        help="run on an asyncio event loop, reading input and window events as they come instead of polling",
+    )
+    args = parser.parse_args()
+    allocation_tracker = None
+    if args.allocations:
+        allocation_tracker = AllocationTracker(budget=args.allocation_budget)
+        allocation_tracker.start()
+    if args.trace:
+        tracer.start(args.trace)
+    profiler.rate = args.profile_rate
+    profiler.directory = args.profile_dir
+    profiler.install_signal_handler()
+    try:
+        curses.wrapper(
+            main,
+            args.backend,
+            args.timings,
+            allocation_tracker,
+            args.physics_process,
+            args.pipelined_render,
+            args.event_loop,
+        )
+    finally:
+        profiler.stop()
+        profiler.join()
+        tracer.stop()
+        if allocation_tracker is not None:
+            allocation_tracker.stop()
+            allocation_tracker.dump(args.allocations)
     curses.endwin()
@@ -0,0 +1,105 @@
+import argparse
+import json
+import os
+from typing import List, NoReturn, Optional, Tuple
+
+from .frame_stats import PhaseTimers
+from .render_backends import RenderBackend
+
+
+class VirtualScreen(RenderBackend):
+    """Render backend drawing into a grid of characters in memory, for running without a terminal
+
+    Pair it with the headless window manager (set NARWHALS_HEADLESS=1 before importing src) to update and render
+    levels in benchmarks or CI. The grid can be read back with text() or at()
+    """
+
+    def __init__(self, rows: int = 50, cols: int = 200):
+        super().__init__()
+        self.rows = rows
+        self.cols = cols
+        self.chars: List[List[str]] = []
+        self.colours: List[List[int]] = []
+        self.frames = 0  # number of flushes so far
+        self.clear()
+
+    def get_size(self) -> Tuple[int, int]:
+        """Gets the size of the screen as (rows, columns)"""
+        return self.rows, self.cols
+
+    def resize(self, rows: int, cols: int) -> NoReturn:
+        """Changes the size of the screen, blanking it"""
+        self.rows = rows
+        self.cols = cols
+        self.clear()
+
+    def clear(self) -> NoReturn:
+        """Blanks the whole screen"""
+        self.calls += 1
+        self.chars = [[" "] * self.cols for _ in range(self.rows)]
+        self.colours = [[0] * self.cols for _ in range(self.rows)]
+
+    def draw_run(self, y: int, x: int, text: str, colour: int, last_cell: bool = False) -> NoReturn:
+        """Writes a run of characters into the grid"""
+        self.calls += 1
+        stop = x + len(text)
+        self.chars[y][x:stop] = text
+        self.colours[y][x:stop] = [colour] * len(text)
+
+    def flush(self) -> NoReturn:
+        """Counts the frame, there is nothing to show"""
+        self.calls += 1
+        self.frames += 1
+
+    def at(self, y: int, x: int) -> Tuple[str, int]:
+        """Gets the character and colour at a position"""
+        return self.chars[y][x], self.colours[y][x]
+
+    def text(self) -> str:
+        """Gets the whole screen as text, with trailing blanks removed"""
+        return "\n".join("".join(row).rstrip() for row in self.chars).rstrip()
+
+
+def run(box: "BoxState", frames: int, screen: Optional[VirtualScreen] = None) -> PhaseTimers:  # noqa: F821
+    """Updates and renders a level for a number of frames as fast as possible, timing each phase
+
+    :param screen: Screen the level is rendered into, a new 50x200 one by default
+    """
+    if screen is None:
+        screen = VirtualScreen()
+    timers = PhaseTimers(window=max(frames, 1))
+    for _ in range(frames):
+        box.update(timers)
+        timers.start()
+        box.render(screen)
+        timers.lap("render")
+    return timers
+
+
+def main() -> None:
+    """Runs a level without a terminal, printing the time taken by each phase as JSON"""
+    parser = argparse.ArgumentParser(description="Runs a level without a terminal or a window")
+    parser.add_argument(
+        "--level", default="bouncy_level", help="level in src.levels to run, or generate:<spec> for a generated one"
+    )
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--rows", type=int, default=50)
+    parser.add_argument("--cols", type=int, default=200)
+    parser.add_argument("--timings", metavar="FILE", help="also write the timings to FILE as JSON")
+    parser.add_argument("--show", action="store_true", help="print the last frame")
+    args = parser.parse_args()
+
+    os.environ.setdefault("NARWHALS_HEADLESS", "1")  # before the window manager is imported
+    from . import levels
+
+    screen = VirtualScreen(args.rows, args.cols)
+    timers = run(levels.load(args.level), args.frames, screen)
+    print(json.dumps(timers.summary(), indent=4))
+    if args.show:
+        print(screen.text())
+    if args.timings:
+        timers.dump(args.timings, level=args.level, frames=args.frames)
+
+
+if __name__ == "__main__":
+    main()
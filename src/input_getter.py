@@ -1,18 +1,39 @@
+import asyncio
 import curses
-from threading import Thread
+import sys
+from threading import Event, Thread
 from typing import NoReturn, Optional
 
+from src.terminal_geometry import terminal
+from src.tracing import tracer
+
 
 class InputGetter:
-    """A class that uses curses.getch() to get input"""
+    """A class that uses curses.getch() to get input
+
+    Keys are read on a thread of its own, which blocks in getch(). Without the thread, keys are read by read_keys()
+    whenever stdin is readable, which an asyncio event loop does after watch().
+    A resize of the terminal seen by the TerminalGeometry comes in as curses.KEY_RESIZE, like a key
+    """
+
+    def __init__(self, screen: curses.window, threaded: bool = True):
+        """Initialize the InputGetter
 
-    def __init__(self, screen: curses.window):
-        """Initialize the InputGetter"""
+        :param threaded: Read keys on a thread. Otherwise keys are only read by read_keys()
+        """
         self.screen = screen
         self.char_index_list = []
         self.running = True
-        self.thread = Thread(target=self._loop)
-        self.thread.start()
+        self.key_ready = Event()  # set when a key is added, see wait()
+        self._waiter: Optional[asyncio.Future] = None  # resolved when a key is added, see wait_async()
+        self.thread: Optional[Thread] = None
+        terminal.listeners.append(self._resized)
+        terminal.wakers.append(self._wake)
+        if threaded:
+            self.thread = Thread(target=self._loop)
+            self.thread.start()
+        else:
+            self.screen.nodelay(True)
 
     @property
     def char_list(self) -> list:
@@ -22,7 +43,55 @@ class InputGetter:
     def _loop(self) -> NoReturn:
         """Main InputGetter loop (called as thread)"""
         while self.running:
-            self.char_index_list.append(self.screen.getch())
+            self._add_key(self.screen.getch())
+
+    def _add_key(self, key: int) -> NoReturn:
+        """Adds a key to the list, waking up whatever waits for one"""
+        tracer.instant("key", "input", {"key": key})
+        self.char_index_list.append(key)
+        self._wake()
+
+    def _wake(self) -> NoReturn:
+        """Wakes up whatever waits for a key, see wait() and wait_async()"""
+        self.key_ready.set()
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    def watch(self, loop: asyncio.AbstractEventLoop) -> NoReturn:
+        """Reads keys on an event loop whenever stdin is readable, for an InputGetter that isn't threaded"""
+        loop.add_reader(sys.stdin.fileno(), self.read_keys)
+
+    def read_keys(self) -> NoReturn:
+        """Reads every key waiting, without blocking (only for an InputGetter that isn't threaded)"""
+        while True:
+            key = self.screen.getch()
+            if key == -1:
+                return
+            self._add_key(key)
+
+    def _resized(self) -> NoReturn:
+        """Adds KEY_RESIZE (called by the TerminalGeometry once it resized curses)"""
+        self._add_key(curses.KEY_RESIZE)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until there is a key in the list, or the terminal was resized, for a threaded InputGetter
+
+        :return: Whether there is one, False if the timeout ran out first
+        """
+        self.key_ready.clear()
+        if self.char_index_list or terminal.pending:
+            return True
+        return self.key_ready.wait(timeout)
+
+    async def wait_async(self) -> NoReturn:
+        """Waits on the event loop until there is a key or a resize, for an InputGetter that isn't threaded"""
+        if self.char_index_list or terminal.pending:
+            return
+        self._waiter = asyncio.get_running_loop().create_future()
+        try:
+            await self._waiter
+        finally:
+            self._waiter = None
 
     def quit(self) -> NoReturn:
         """Quit the main InputGetter loop"""
@@ -30,7 +99,11 @@ class InputGetter:
         self.screen.clear()
         self.screen.addstr(0, 0, "Press any key to quit")
         self.screen.refresh()
-        self.thread.join()
+        if self.thread is not None:
+            self.thread.join()
+        else:
+            self.screen.nodelay(False)
+            self.screen.getch()
 
     def clear(self) -> NoReturn:
         """Clear the char_index_list"""
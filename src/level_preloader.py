@@ -0,0 +1,118 @@
+import threading
+import typing
+from typing import Dict, NoReturn, Optional, Tuple
+
+from .box import BoxState
+from .tracing import tracer
+
+if typing.TYPE_CHECKING:
+    from .levels.prototype import LevelPrototype
+
+
+class _LoadTask:
+    """A level being built on a worker thread"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.cancelled = threading.Event()
+        self.done = threading.Event()
+        self.result: Optional[BoxState] = None
+        self.error: Optional[BaseException] = None
+        self.thread: Optional[threading.Thread] = None
+
+
+class LevelPreloader:
+    """Builds levels on a worker thread while the menu is shown, so starting a level doesn't stall
+
+    The menu calls preload() with the highlighted level. Only one level is loaded at a time: highlighting
+    another one cancels the load in progress. Python threads can't be interrupted, so cancelling takes effect
+    at the next step of the load (building the prototype, copying it, then preparing the first frame) and the
+    cancelled copy is thrown away. A built prototype is kept even if its load is cancelled.
+    get() hands each preloaded level over once, so every play starts from a fresh copy of the level
+    """
+
+    def __init__(self, prototypes: Dict[str, "LevelPrototype"]):
+        """Initialize a preloader with nothing loaded
+
+        :param prototypes: Prototype of each level, by name
+        """
+        self.prototypes = prototypes
+        self.loaded: Dict[str, BoxState] = {}
+        self._task: Optional[_LoadTask] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loading(self) -> Optional[str]:
+        """Name of the level being loaded in the background, if any"""
+        task = self._task
+        return task.name if task is not None and not task.done.is_set() else None
+
+    def preload(self, name: str, screen_size: Tuple[int, int]) -> NoReturn:
+        """Starts building a level in the background, cancelling the load of any other level
+
+        Does nothing if the level is already loaded or being loaded
+
+        :param screen_size: Size of the screen the level will be drawn on as (rows, columns),
+        to rasterise its static objects for
+        """
+        with self._lock:
+            if name in self.loaded or name not in self.prototypes:
+                return
+            if self._task is not None and self._task.name == name and not self._task.cancelled.is_set():
+                return
+            self._cancel()
+            task = _LoadTask(name)
+            task.thread = threading.Thread(
+                target=self._load, args=(task, screen_size), name=f"preload {name}", daemon=True
+            )
+            self._task = task
+        task.thread.start()
+
+    def cancel(self) -> NoReturn:
+        """Cancels the load in progress, if any"""
+        with self._lock:
+            self._cancel()
+
+    def get(self, name: str) -> BoxState:
+        """Gets a fresh copy of a level, waiting for it if it is being loaded and making it now if it isn't"""
+        with self._lock:
+            if name in self.loaded:
+                return self.loaded.pop(name)
+            task = self._task
+        if task is not None and task.name == name and not task.cancelled.is_set():
+            task.done.wait()
+            if task.error is not None:
+                raise task.error
+            with self._lock:
+                if task.result is not None and self.loaded.get(name) is task.result:
+                    return self.loaded.pop(name)
+
+        return self.prototypes[name].instantiate()
+
+    def _cancel(self) -> NoReturn:
+        """Cancels the load in progress (the lock must be held)"""
+        if self._task is not None:
+            self._task.cancelled.set()
+            self._task = None
+
+    def _load(self, task: _LoadTask, screen_size: Tuple[int, int]) -> NoReturn:
+        """Copies a level and prepares its first frame, stopping if the load is cancelled (runs as thread)"""
+        prototype = self.prototypes[task.name]
+        try:
+            with tracer.span("preload level", "level", {"level": task.name}):
+                prototype.prepare(*screen_size)  # builds the prototype the first time
+                if task.cancelled.is_set():
+                    return
+                box = prototype.instantiate()
+                if task.cancelled.is_set():
+                    return
+                box.prepare(*screen_size)
+            with self._lock:
+                if task.cancelled.is_set():
+                    return
+                self.loaded[task.name] = box
+                task.result = box
+        except BaseException as error:  # handed over to get(), which re-raises it on the main thread
+            task.error = error
+        finally:
+            task.done.set()
@@ -1,7 +1,33 @@
+import sys
+
 from .bouncy import level as bouncy_level  # noqa: F401
+from .generator import Mix, generate_from_spec, generate_level  # noqa: F401
+from .loader import DATA_DIRECTORY, load_data_level, load_level_file  # noqa: F401
+from .prototype import LevelPrototype  # noqa: F401
 from .second_level import level as second_level  # # noqa: F401
 from .static_test import level as static_test  # noqa: F401
 from .testing.falling import level as falling_test  # noqa: F401
 
 # Add you level here
 # Format: from .filename import level as filename
+
+sys.path.append("..")
+
+from src.box import BoxState  # noqa: E402
+
+GENERATED_PREFIX = "generate:"
+
+
+def load(name: str) -> BoxState:
+    """Gets a level by the name it is imported as here, or generates one from `generate:<spec>`
+
+    See generator.generate_from_spec() for the spec, e.g. generate:count=500,seed=3.
+    Names of files in the data directory (without .json) load that level file, and so do paths to level files
+    """
+    if name.startswith(GENERATED_PREFIX):
+        return generate_from_spec(name.partition(":")[2])
+    if name in globals():
+        return globals()[name]
+    if name.endswith(".json"):
+        return load_level_file(name)
+    return load_data_level(name)
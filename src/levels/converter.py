@@ -0,0 +1,124 @@
+"""Converts levels written as Python modules into level files (see loader.py for the format)
+
+Run from the repository root with: python -m src.levels.converter [name ...] [--output DIRECTORY]
+
+Each name is a level imported in src/levels/__init__.py, every level module by default. The level is
+imported, so its construction code runs once, and the BoxState it builds is written out as JSON
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import Any, Dict, List, Union
+
+from . import load, loader
+
+sys.path.append("..")
+
+from src.box import BoxState  # noqa: E402
+from src.datatypes import GameObject, Vector  # noqa: E402
+from src.datatypes.textures import EmptyTexture, SolidTexture  # noqa: E402
+from src.datatypes.triggers import Triggers  # noqa: E402
+
+MODULE_LEVELS = ("static_test", "second_level", "bouncy_level", "falling_test")
+
+
+def level_to_dict(box: BoxState) -> Dict[str, Any]:
+    """Describes the objects and zones of a level in the level format. Values left at their default are omitted"""
+    objects = box.objects
+    indices = {obj: index for index, obj in enumerate(objects)}
+    zones = []
+    for zone in box.zones.zones:
+        if zone.triggers is not None or zone.stay_triggers is not None:
+            raise ValueError("Zones with triggers can't be written as a level file")
+        described = {}
+        if zone.object is not None:
+            described["object"] = indices[zone.object]
+        else:
+            described["position"] = vector_to_json(zone.position)
+            described["size"] = vector_to_json(zone.size)
+        if zone.mask is not None:
+            described["mask"] = list(zone.mask)
+        if zone.goal:
+            described["goal"] = True
+        zones.append(described)
+
+    level = {"objects": [object_to_dict(obj) for obj in objects]}
+    if zones:
+        level["zones"] = zones
+    return level
+
+
+def object_to_dict(obj: GameObject) -> Dict[str, Any]:
+    """Describes a single object in the level format"""
+    type_name = type(obj).__name__
+    if loader.OBJECT_TYPES.get(type_name) is not type(obj):
+        raise ValueError(f"Objects of type {type_name} can't be written as a level file")
+    if isinstance(obj.triggers, Triggers):
+        raise ValueError("Objects with triggers can't be written as a level file")
+
+    described = {"type": type_name}
+    if obj.shape.name != "Rectangle":
+        described["shape"] = obj.shape.name
+    for key, default in loader.VECTOR_DEFAULTS.items():
+        vector = getattr(obj, key)
+        if _vector_parts(vector) != default:
+            described[key] = vector_to_json(vector)
+    for key, default in loader.NUMBER_KEYS.items():
+        value = getattr(obj, key)
+        if value != default:
+            described[key] = value
+    if obj.collision != [1]:
+        described["collision"] = list(obj.collision)
+    if obj.static != (type_name == "Wall"):  # walls are static unless told otherwise, everything else isn't
+        described["static"] = obj.static
+
+    texture = obj.texture
+    if isinstance(texture, EmptyTexture):
+        pass  # the default
+    elif type(texture) is SolidTexture:
+        described["texture"] = {"type": "solid", "char": texture.char, "colour": texture.colour}
+    else:
+        raise ValueError(f"Textures of type {type(texture).__name__} can't be written as a level file")
+    return described
+
+
+def vector_to_json(vector: Vector) -> Union[List[float], Dict[str, float]]:
+    """Describes a vector as [x, y], or with only its non-zero parts if it is relative to the window"""
+    parts = _vector_parts(vector)
+    if not any(parts[2:]):
+        return list(parts[:2])
+    return {key: value for key, value in zip(loader.VECTOR_KEYS, parts) if value}
+
+
+def _vector_parts(vector: Vector) -> tuple:
+    """Gets the parts of a vector in the order of loader.VECTOR_KEYS"""
+    return (
+        vector.constant_x,
+        vector.constant_y,
+        vector.relative_x,
+        vector.relative_y,
+        vector.ratio_x,
+        vector.ratio_y,
+    )
+
+
+def main() -> None:
+    """Writes every level given on the command line to a level file"""
+    parser = argparse.ArgumentParser(description="Converts level modules into level files")
+    parser.add_argument("names", nargs="*", default=MODULE_LEVELS, help="levels to convert, all of them by default")
+    parser.add_argument("--output", default=loader.DATA_DIRECTORY, help="directory the files are written to")
+    args = parser.parse_args()
+
+    os.makedirs(args.output, exist_ok=True)
+    for name in args.names:
+        path = os.path.join(args.output, f"{name}.json")
+        with open(path, "w") as file:
+            json.dump(level_to_dict(load(name)), file, indent=4)
+            file.write("\n")
+        print(f"{name} -> {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Procedural stress levels, for seeing how the game scales with the number of objects
+
+The shipped levels only have a handful of objects. generate_level() builds a BoxState with as many as asked for,
+a seeded random mix of walls, falling bodies, circles, lines and objects positioned relative to the window.
+The same arguments always build the same level.
+Levels can also be described by a spec string, see generate_from_spec()
+"""
+
+import itertools
+import math
+import random
+import sys
+from collections import namedtuple
+from typing import Callable, Dict, List
+
+from .objects.kinematic import FallingObject
+from .objects.static import Wall
+
+sys.path.append("..")
+
+from src.box import BoxState  # noqa: E402
+from src.datatypes import GameObject, Vector  # noqa: E402
+from src.datatypes.shape import Shape  # noqa: E402
+from src.datatypes.textures import SolidTexture  # noqa: E402
+
+ASPECT_RATIO = 4  # width / height in tiles of the area objects are placed in, about the shape of a terminal
+WALL_GROUP = 1  # collision group of the walls, they all collide with each other (it doesn't matter, they don't move)
+FIRST_BODY_GROUP = 2  # each moving object gets its own collision group from here on, see generate_level()
+MOVING_KINDS = {"falling", "circles"}
+
+
+# Relative weights of the kinds of objects in a generated level. walls: static rectangles, falling: rectangles pulled
+# down by gravity, circles: bouncy falling circles, lines: static lines, relative: static walls positioned and sized
+# relative to the window
+Mix = namedtuple("Mix", ["walls", "falling", "circles", "lines", "relative"], defaults=[1, 1, 1, 1, 1])
+
+
+def _wall(rng: random.Random, position: Vector, collision: List[int]) -> GameObject:
+    obj = Wall(position=position, size=Vector(rng.randint(2, 12), rng.randint(1, 3)), collision=collision)
+    obj.texture = SolidTexture(char="#", colour=0, obj=obj)
+    return obj
+
+
+def _falling(rng: random.Random, position: Vector, collision: List[int]) -> GameObject:
+    obj = FallingObject(
+        position=position,
+        size=Vector(rng.randint(1, 3), rng.randint(1, 2)),
+        velocity=Vector(rng.uniform(-0.5, 0.5), 0.0),
+        collision=collision,
+        z=1,
+    )
+    obj.texture = SolidTexture(char="@", colour=rng.randint(1, 255), obj=obj)
+    return obj
+
+
+def _circle(rng: random.Random, position: Vector, collision: List[int]) -> GameObject:
+    diameter = rng.randint(1, 4)
+    obj = FallingObject(
+        position=position,
+        shape=Shape.Circle,
+        size=Vector(diameter, diameter),
+        collision=collision,
+        z=1,
+        elasticity=0.6,
+    )
+    obj.texture = SolidTexture(char="O", colour=rng.randint(1, 255), obj=obj)
+    return obj
+
+
+def _line(rng: random.Random, position: Vector, collision: List[int]) -> GameObject:
+    size = Vector(rng.randint(-10, 10), rng.randint(-4, 4))
+    obj = Wall(position=position, shape=Shape.Line, size=size, collision=collision)
+    obj.texture = SolidTexture(char="*", colour=0, obj=obj)
+    return obj
+
+
+def _relative(rng: random.Random, position: Vector, collision: List[int]) -> GameObject:
+    obj = Wall(
+        position=Vector(relative_x=rng.uniform(0, 0.9), relative_y=rng.uniform(0, 0.95)),
+        size=Vector(relative_x=rng.uniform(0.02, 0.1), y=1),
+        collision=collision,
+    )
+    obj.texture = SolidTexture(char="=", colour=0, obj=obj)
+    return obj
+
+
+# kind -> function creating an object of that kind at a position, with the given collision groups
+_MAKERS: Dict[str, Callable[[random.Random, Vector, List[int]], GameObject]] = {
+    "walls": _wall,
+    "falling": _falling,
+    "circles": _circle,
+    "lines": _line,
+    "relative": _relative,
+}
+
+
+def generate_level(count: int = 100, seed: int = 0, mix: Mix = Mix(), density: float = 5) -> BoxState:
+    """Builds a level of randomly placed objects
+
+    :param count: Number of objects
+    :param seed: Seed of the random number generator. The same seed builds the same level
+    :param mix: Relative weights of each kind of object
+    :param density: Objects per 100 tiles of the area they are placed in. The area grows with the number of
+    objects, so raising the density packs the same objects closer together. Relative objects are always placed
+    over the window
+
+    Moving objects collide with walls and lines, but not with each other: the physics can't resolve a collision
+    between two moving objects yet (GameObject.calculate_velocity_after_collision fails on most of them).
+    Every moving object has a collision group of its own, and every static object is in all of them
+    """
+    if count < 0 or density <= 0:
+        raise ValueError("count can't be negative and density must be positive")
+    if sum(mix) <= 0:
+        raise ValueError("At least one kind of object needs a positive weight")
+
+    area = count * 100 / density
+    height = max(math.sqrt(area / ASPECT_RATIO), 1)
+    width = area / height
+
+    rng = random.Random(seed)
+    kinds = rng.choices(Mix._fields, weights=mix, k=count)
+    moving = sum(kind in MOVING_KINDS for kind in kinds)
+    static_collision = [WALL_GROUP, *range(FIRST_BODY_GROUP, FIRST_BODY_GROUP + moving)]  # shared, never changed
+    body_groups = itertools.count(FIRST_BODY_GROUP)
+
+    objects = []
+    for kind in kinds:
+        position = Vector(rng.uniform(0, width), rng.uniform(0, height))  # floats, so no two x are equal
+        collision = [next(body_groups)] if kind in MOVING_KINDS else static_collision
+        objects.append(_MAKERS[kind](rng, position, collision))
+    return BoxState(initial_objects=objects)
+
+
+def generate_from_spec(spec: str) -> BoxState:
+    """Builds a level from `key=value` pairs separated by commas, e.g. count=500,seed=3,walls=2,circles=1
+
+    Keys are the arguments of generate_level() (count, seed, density) and the kinds of objects of Mix,
+    giving their weight. If any kind is given, the kinds left out get a weight of 0. An empty spec builds
+    the default level
+    """
+    arguments = {}
+    weights = {}
+    for pair in filter(None, spec.split(",")):
+        key, _, value = pair.partition("=")
+        key = key.strip()
+        if key in ("count", "seed"):
+            arguments[key] = int(value)
+        elif key == "density":
+            arguments[key] = float(value)
+        elif key in Mix._fields:
+            weights[key] = float(value)
+        else:
+            raise ValueError(f"Unknown key {key!r} in level spec {spec!r}")
+    if weights:
+        arguments["mix"] = Mix(**{kind: weights.get(kind, 0) for kind in Mix._fields})
+    return generate_level(**arguments)
@@ -0,0 +1,274 @@
+"""Declarative levels: JSON files describing the objects and zones of a level
+
+A level file looks like this (every key of an object but "type" is optional)::
+
+    {
+        "objects": [
+            {
+                "type": "FallingObject",
+                "position": [10, 10],
+                "size": {"relative_x": 0.2, "y": 1},
+                "shape": "Circle",
+                "collision": [0, 1],
+                "z": 1,
+                "elasticity": 0.5,
+                "texture": {"type": "solid", "char": "O", "colour": 1}
+            }
+        ],
+        "zones": [{"object": 0, "goal": true}]
+    }
+
+Object types are GameObject, Wall and FallingObject. Vectors are [x, y], or objects with any of the keys of
+Vector (x, y, relative_x, relative_y, ratio_x, ratio_y). Textures are solid or empty. Zones either follow
+an object, given by its index in "objects", or have a position and size.
+
+Loading a file compiles it into nested tuples of plain values, which are cached with marshal in a __pycache__
+directory next to the file, keyed by the SHA-256 of its contents. Loading the same file again reads the cache
+and skips parsing and checking the JSON. Unlike level modules, loading a file never runs code from it
+"""
+
+import hashlib
+import json
+import marshal
+import os
+import sys
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from .objects.kinematic import FallingObject
+from .objects.static import Wall
+
+sys.path.append("..")
+
+from src.box import BoxState  # noqa: E402
+from src.datatypes import GameObject, Vector  # noqa: E402
+from src.datatypes.shape import Shape  # noqa: E402
+from src.datatypes.textures import EmptyTexture, SolidTexture  # noqa: E402
+from src.zones import TriggerZone  # noqa: E402
+
+FORMAT_VERSION = 1  # part of the cache key, bump it whenever the compiled form changes
+DATA_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+CACHE_DIRECTORY_NAME = "__pycache__"
+
+OBJECT_TYPES = {"GameObject": GameObject, "Wall": Wall, "FallingObject": FallingObject}
+VECTOR_KEYS = ("x", "y", "relative_x", "relative_y", "ratio_x", "ratio_y")
+# Keys of an object that are plain numbers, with the default GameObject uses for them
+NUMBER_KEYS = {"orientation": 0, "elasticity": 0, "friction": 0, "mass": 1, "z": 0}
+# Keys of an object that are vectors, with their defaults as compiled vectors
+VECTOR_DEFAULTS = {
+    "position": (0, 0, 0, 0, 0, 0),
+    "size": (1, 1, 0, 0, 0, 0),
+    "velocity": (0, 0, 0, 0, 0, 0),
+    "gravity": (0, 0.03, 0, 0, 0, 0),
+}
+
+CompiledLevel = Tuple[int, tuple, tuple]  # (FORMAT_VERSION, objects, zones)
+
+
+class LevelFormatError(ValueError):
+    """A level file doesn't follow the level format"""
+
+
+def load_level_file(path: str, use_cache: bool = True) -> BoxState:
+    """Builds the level described by a JSON file, through the compiled cache
+
+    :param use_cache: Whether to read and write the cache. Without it, the file is always parsed
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+    if not use_cache:
+        return build_level(compile_level(json.loads(data)))
+
+    cache_path = _cache_path(path, data)
+    try:
+        with open(cache_path, "rb") as file:
+            compiled = marshal.loads(file.read())  # much faster than marshal.load(), which reads in small pieces
+    except (OSError, EOFError, ValueError, TypeError):
+        compiled = None  # not cached yet, or the cache is unreadable
+    if not isinstance(compiled, tuple) or not compiled or compiled[0] != FORMAT_VERSION:
+        compiled = compile_level(json.loads(data))
+        _write_cache(cache_path, compiled)
+    return build_level(compiled)
+
+
+def load_data_level(name: str) -> BoxState:
+    """Builds one of the levels shipped in the data directory, by its file name without the extension"""
+    return load_level_file(os.path.join(DATA_DIRECTORY, f"{name}.json"))
+
+
+def compile_level(level: Dict[str, Any]) -> CompiledLevel:
+    """Checks a parsed level file and turns it into its compiled form"""
+    if not isinstance(level, dict):
+        raise LevelFormatError("A level must be a JSON object")
+    objects = tuple(_compile_object(obj, index) for index, obj in enumerate(level.get("objects", [])))
+    zones = tuple(_compile_zone(zone, index, len(objects)) for index, zone in enumerate(level.get("zones", [])))
+    return FORMAT_VERSION, objects, zones
+
+
+def build_level(compiled: CompiledLevel) -> BoxState:
+    """Creates the objects and zones of a compiled level, in a new BoxState"""
+    _, compiled_objects, compiled_zones = compiled
+    objects = []
+    for (
+        type_name,
+        shape,
+        position,
+        size,
+        velocity,
+        gravity,
+        orientation,
+        elasticity,
+        friction,
+        mass,
+        z,
+        collision,
+        static,
+        texture,
+    ) in compiled_objects:
+        obj = OBJECT_TYPES[type_name](
+            position=_build_vector(position),
+            shape=Shape(shape),
+            size=_build_vector(size),
+            orientation=orientation,
+            elasticity=elasticity,
+            friction=friction,
+            mass=mass,
+            velocity=_build_vector(velocity),
+            gravity=_build_vector(gravity),
+            collision=list(collision),
+            z=z,
+        )
+        if static is not None:
+            obj.static = static
+        if texture[0] == "solid":
+            obj.texture = SolidTexture(char=texture[1], colour=texture[2], obj=obj)
+        else:
+            obj.texture = EmptyTexture(obj=obj)
+        objects.append(obj)
+
+    zones = []
+    for target, position, size, mask, goal in compiled_zones:
+        zones.append(
+            TriggerZone(
+                position=_build_vector(position) if position is not None else None,
+                size=_build_vector(size) if size is not None else None,
+                obj=objects[target] if target is not None else None,
+                mask=list(mask) if mask is not None else None,
+                goal=goal,
+            )
+        )
+    return BoxState(initial_objects=objects, zones=zones)
+
+
+def _compile_object(obj: Dict[str, Any], index: int) -> tuple:
+    """Compiles a single object as a tuple, in the order build_level() unpacks it"""
+    where = f"object {index}"
+    if not isinstance(obj, dict):
+        raise LevelFormatError(f"{where} must be a JSON object")
+    _check_keys(obj, {"type", "shape", "collision", "static", "texture", *NUMBER_KEYS, *VECTOR_DEFAULTS}, where)
+    type_name = obj.get("type")
+    if type_name not in OBJECT_TYPES:
+        raise LevelFormatError(f"{where} has type {type_name!r}, expected one of {', '.join(OBJECT_TYPES)}")
+    shape = obj.get("shape", "Rectangle")
+    if shape not in Shape.__members__:
+        raise LevelFormatError(f"{where} has shape {shape!r}, expected one of {', '.join(Shape.__members__)}")
+
+    vectors = [
+        _compile_vector(obj[key], f"{where} {key}") if key in obj else default
+        for key, default in VECTOR_DEFAULTS.items()
+    ]
+    numbers = [_number(obj.get(key, default), f"{where} {key}") for key, default in NUMBER_KEYS.items()]
+    collision = obj.get("collision", [1])
+    if not isinstance(collision, list) or not all(isinstance(group, int) for group in collision):
+        raise LevelFormatError(f"{where} collision must be a list of integers")
+    static = obj.get("static")
+    if static is not None and not isinstance(static, bool):
+        raise LevelFormatError(f"{where} static must be true or false")
+    return (type_name, Shape[shape].value, *vectors, *numbers, tuple(collision), static, _compile_texture(obj, where))
+
+
+def _compile_texture(obj: Dict[str, Any], where: str) -> tuple:
+    """Compiles a texture as ("solid", char, colour) or ("empty",)"""
+    texture = obj.get("texture", {"type": "empty"})
+    if not isinstance(texture, dict):
+        raise LevelFormatError(f"{where} texture must be a JSON object")
+    if texture.get("type") == "empty":
+        return ("empty",)
+    if texture.get("type") == "solid":
+        char = texture.get("char")
+        if not isinstance(char, str) or len(char) != 1:
+            raise LevelFormatError(f"{where} texture char must be a single character")
+        return "solid", char, int(_number(texture.get("colour", 0), f"{where} texture colour"))
+    raise LevelFormatError(f"{where} texture has type {texture.get('type')!r}, expected solid or empty")
+
+
+def _compile_zone(zone: Dict[str, Any], index: int, object_count: int) -> tuple:
+    """Compiles a zone as (object index or None, position, size, mask, goal)"""
+    where = f"zone {index}"
+    if not isinstance(zone, dict):
+        raise LevelFormatError(f"{where} must be a JSON object")
+    _check_keys(zone, {"object", "position", "size", "mask", "goal"}, where)
+    target = zone.get("object")
+    if target is not None and (not isinstance(target, int) or not 0 <= target < object_count):
+        raise LevelFormatError(f"{where} follows object {target!r}, which doesn't exist")
+    if target is None and ("position" not in zone or "size" not in zone):
+        raise LevelFormatError(f"{where} needs either an object to follow, or a position and size")
+    position = _compile_vector(zone["position"], f"{where} position") if "position" in zone else None
+    size = _compile_vector(zone["size"], f"{where} size") if "size" in zone else None
+    mask = zone.get("mask")
+    if mask is not None and (not isinstance(mask, list) or not all(isinstance(group, int) for group in mask)):
+        raise LevelFormatError(f"{where} mask must be a list of integers")
+    return target, position, size, tuple(mask) if mask is not None else None, bool(zone.get("goal", False))
+
+
+def _compile_vector(vector: Union[List[float], Dict[str, float]], where: str) -> Tuple[float, ...]:
+    """Compiles a vector as (x, y, relative_x, relative_y, ratio_x, ratio_y)"""
+    if isinstance(vector, list):
+        if len(vector) != 2:
+            raise LevelFormatError(f"{where} must be [x, y]")
+        return _number(vector[0], where), _number(vector[1], where), 0, 0, 0, 0
+    if isinstance(vector, dict):
+        _check_keys(vector, set(VECTOR_KEYS), where)
+        return tuple(_number(vector.get(key, 0), where) for key in VECTOR_KEYS)
+    raise LevelFormatError(f"{where} must be [x, y] or a JSON object")
+
+
+def _build_vector(compiled: Tuple[float, ...]) -> Vector:
+    """Creates a vector from its compiled form"""
+    x, y, relative_x, relative_y, ratio_x, ratio_y = compiled
+    return Vector(x, y, relative_x=relative_x, relative_y=relative_y, ratio_x=ratio_x, ratio_y=ratio_y)
+
+
+def _number(value: Any, where: str) -> float:
+    """Checks that a value is a number"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise LevelFormatError(f"{where} must be a number, not {value!r}")
+    return value
+
+
+def _check_keys(value: Dict[str, Any], allowed: set, where: str) -> None:
+    """Checks that a JSON object has no keys outside of the allowed ones, to catch typos"""
+    unknown = value.keys() - allowed
+    if unknown:
+        raise LevelFormatError(f"{where} has unknown keys: {', '.join(sorted(unknown))}")
+
+
+def _cache_path(path: str, data: bytes) -> str:
+    """Gets the file the compiled form of a level file with these contents is cached in"""
+    digest = hashlib.sha256(FORMAT_VERSION.to_bytes(4, "little") + data).hexdigest()
+    return os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIRECTORY_NAME, f"{digest}.level")
+
+
+def _write_cache(cache_path: str, compiled: CompiledLevel) -> Optional[str]:
+    """Writes the compiled form of a level. Caching is best effort: failing to write it is not an error
+
+    :return: The path written to, or None if it couldn't be written
+    """
+    temporary_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(temporary_path, "wb") as file:
+            file.write(marshal.dumps(compiled))
+        os.replace(temporary_path, cache_path)  # atomic, so other processes never read a partial cache
+    except OSError:
+        return None
+    return cache_path
@@ -0,0 +1,112 @@
+"""Level prototypes: levels built once, then copied every time they are played
+
+Level modules build their BoxState when they are imported, so every play of a level shares the same objects and
+playing it again carries on from where it was left. A LevelPrototype builds its level once, keeps it as a template
+that is never played, and instantiate() hands out fresh copies of it. Copying is much cheaper than building: the
+parts of the level that don't change during play are shared between the template and every copy
+"""
+
+import sys
+import threading
+from copy import deepcopy
+from typing import Any, Callable, Dict, NoReturn, Optional
+
+sys.path.append("..")
+
+from src.box import BoxState  # noqa: E402
+from src.datatypes import GameObject, Vector  # noqa: E402
+from src.zones import TriggerZone  # noqa: E402
+
+
+class LevelPrototype:
+    """A level that hands out fresh copies of itself to play
+
+    Static objects only get a new object for the box to hold: their vectors and textures are shared, so they must not
+    be changed in place once the prototype is built. Moving objects share their shape, size, gravity and texture
+    settings, and get their own position, velocity, forces and texture buffer. Triggers of objects and zones are
+    copied, and act on the copies of the objects they acted on in the template.
+    The static layer rasterised by prepare() is copied into every new level, instead of being drawn again
+    """
+
+    def __init__(self, build: Callable[[], BoxState]):
+        """Initialize a prototype. The level is built the first time it is needed
+
+        :param build: Function building the level, e.g. loading its level file
+        """
+        self.build = build
+        self._template: Optional[BoxState] = None
+        self._lock = threading.Lock()  # levels are built and prepared on the preloader thread
+
+    @property
+    def template(self) -> BoxState:
+        """The level copies are made from. Never play it, or the copies will start from where it was left"""
+        with self._lock:
+            if self._template is None:
+                self._template = self.build()
+            return self._template
+
+    def prepare(self, rows: int, cols: int) -> NoReturn:
+        """Rasterises the static layer of the template for a screen of the given size, for the copies to share"""
+        template = self.template
+        with self._lock:
+            template.prepare(rows, cols)
+
+    def instantiate(self) -> BoxState:
+        """Makes a fresh copy of the level, as it was built"""
+        template = self.template
+        box = BoxState()
+        # In draw order, so objects keep their order within each z level
+        copies: Dict[GameObject, GameObject] = {obj: _copy_object(obj) for obj in template.objects}
+        # Triggers are deep copied, with every object of the template they refer to (e.g. the target of a
+        # ForceTrigger) replaced by its copy
+        memo: Dict[int, Any] = {id(obj): copy for obj, copy in copies.items()}
+        for obj, copy in copies.items():
+            copy.triggers = deepcopy(obj.triggers, memo)
+        box.add_objects(copies.values())  # after copying the triggers, so the box finds the sensors
+        for zone in template.zones.zones:
+            box.zones.add(_copy_zone(zone, copies, memo))
+        with self._lock:
+            box.compositor.copy_static(template.compositor)
+        return box
+
+
+def _copy_object(obj: GameObject) -> GameObject:
+    """Copies an object for another box, sharing everything that doesn't change while it is played"""
+    copy = object.__new__(type(obj))
+    state = copy.__dict__
+    state.update(obj.__dict__)
+    state["box"] = None
+    state["handle"] = None
+    if obj.static:
+        return copy
+
+    state["position"] = _copy_vector(obj.position)
+    state["velocity"] = _copy_vector(obj.velocity)
+    state["forces"] = list(obj.forces)
+    state["collision"] = list(obj.collision)
+    state["_forces"] = None if obj._forces is None else list(obj._forces)
+    state["_touching"] = []
+    texture = obj.texture
+    state["texture"] = texture.copy(obj=copy if texture.object is obj else texture.object)
+    return copy
+
+
+def _copy_vector(vector: Vector) -> Vector:
+    """Copies a vector. Unlike Vector.copy(), a window position that isn't known yet stays unknown"""
+    copy = object.__new__(type(vector))
+    copy.__dict__.update(vector.__dict__)
+    return copy
+
+
+def _copy_zone(zone: TriggerZone, copies: Dict[GameObject, GameObject], memo: Dict[int, Any]) -> TriggerZone:
+    """Copies a zone, following the copy of the object it follows
+
+    :param memo: deepcopy() memo mapping the ids of the objects of the template to their copies, for the triggers
+    """
+    copy = object.__new__(type(zone))
+    copy.__dict__.update(zone.__dict__)
+    if zone.object is not None:
+        copy.object = copies[zone.object]
+    copy.triggers = deepcopy(zone.triggers, memo)
+    copy.stay_triggers = deepcopy(zone.stay_triggers, memo)
+    return copy
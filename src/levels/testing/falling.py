@@ -8,6 +8,7 @@ sys.path.append("..")
 from src.box import BoxState  # noqa: E402
 from src.datatypes import Vector  # noqa: E402 F401
 from src.datatypes.textures import SolidTexture  # noqa: E402 F401
+from src.zones import TriggerZone  # noqa: E402
 
 objects = []
 
@@ -19,4 +20,10 @@ obj = Wall(position=Vector(relative_x=0.4, relative_y=0.8), size=Vector(relative
 obj.texture = SolidTexture(char="_", colour=0, obj=obj)
 objects.append(obj)
 
-level = BoxState(initial_objects=objects)
+# The goal: the level is complete once the ball lands on the platform
+goal = Wall(position=Vector(relative_x=0.45, relative_y=0.8, y=-1), size=Vector(relative_x=0.1, y=1), collision=[])
+goal.texture = SolidTexture(char=".", colour=228, obj=goal)
+objects.append(goal)
+zones = [TriggerZone(obj=goal, goal=True)]
+
+level = BoxState(initial_objects=objects, zones=zones)
@@ -0,0 +1,325 @@
+"""Physics in a worker process, so it doesn't compete with rendering and input for the GIL
+
+The worker builds its own copy of the level and updates it at the frame rate of the game. After every tick it
+publishes the state of the moving objects into shared memory. The game process keeps a copy of the level it only
+renders: sync() copies the latest published state into it and tells the worker where the window is.
+
+Shared memory holds a header of int64 fields and two slots of float64 records, one record per moving object in draw
+order. The worker writes a tick into the slot readers aren't pointed at, then flips FRONT inside a seqlock:
+SEQUENCE is odd while the header is changing. A reader copies the front slot and checks SEQUENCE didn't change
+meanwhile, otherwise the worker may have reused the slot and the reader tries again. Neither side ever waits on a lock.
+Both processes build the level the same way, so the records line up with the objects of the game's copy.
+Triggers run in the worker, so they can't change anything the game process draws
+"""
+
+import multiprocessing
+import os
+import time
+import traceback
+from array import array
+from collections import deque
+from multiprocessing import shared_memory
+from multiprocessing.connection import Connection
+from typing import Callable, List, NoReturn, Optional, Tuple
+
+from .box import BoxState
+from .datatypes.game_object import GameObject
+from .datatypes.vector import Vector
+from .datatypes.vector import window_manager as vector_window_manager
+from .terminal_geometry import terminal
+from .window_manager import HEADLESS_ENV_VAR, HeadlessWindowManager
+
+# Fields of the header
+SEQUENCE = 0  # odd while the worker is changing the header
+FRONT = 1  # slot holding the latest tick
+TICK = 2  # number of ticks published
+COMPLETED = 3  # whether the level was completed
+PUBLISHED_NS = 4  # time.monotonic_ns() the latest tick was published at
+TICK_NS = 5  # time the worker took to update the latest tick
+STATE = 6  # RUNNING, PAUSED or STOPPED, set by the game process
+WINDOW_SEQUENCE = 7  # odd while the game process is changing the window fields
+WINDOW = 8  # window rectangle (4 fields), set by the game process
+TERMINAL = 12  # terminal size as columns, lines (2 fields), set by the game process
+HEADER_FIELDS = 14
+
+# Fields of a record
+RECORD_FIELDS = 5  # x, y, size x, size y, orientation
+
+STOPPED = 0
+RUNNING = 1
+PAUSED = 2
+
+
+class SharedState:
+    """The shared memory the worker publishes the state of the moving objects through, see the module docstring"""
+
+    def __init__(self, bodies: int, name: Optional[str] = None):
+        """Create the shared memory, or attach to it if it exists
+
+        :param bodies: Number of moving objects there is a record for
+        :param name: Name of the shared memory to attach to. None creates it
+        """
+        self.bodies = bodies
+        self.slot_size = bodies * RECORD_FIELDS
+        header_bytes = HEADER_FIELDS * 8
+        size = header_bytes + 2 * self.slot_size * 8
+        if name is None:
+            self.memory = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+        self.owner = name is None
+        buffer = self.memory.buf
+        self.header = buffer[:header_bytes].cast("q")
+        self.records = buffer[header_bytes:size].cast("d")
+
+        self._copy = array("d", bytes(self.slot_size * 8))  # the last slot read
+        self._copy_view = memoryview(self._copy)
+        self._window_copy = array("q", bytes((HEADER_FIELDS - WINDOW) * 8))
+        self._window_copy_view = memoryview(self._window_copy)
+
+    @property
+    def name(self) -> str:
+        """Name other processes attach with"""
+        return self.memory.name
+
+    def publish(self, bodies: List[GameObject], tick_ns: int, completed: bool) -> NoReturn:
+        """Writes the state of the moving objects into the back slot and makes it the front one (worker side)"""
+        header = self.header
+        records = self.records
+        back = 1 - header[FRONT]
+        offset = back * self.slot_size
+        for obj in bodies:
+            position = obj.position
+            size = obj.size
+            records[offset] = position.x
+            records[offset + 1] = position.y
+            records[offset + 2] = size.x
+            records[offset + 3] = size.y
+            records[offset + 4] = obj.orientation
+            offset += RECORD_FIELDS
+
+        header[SEQUENCE] += 1
+        header[FRONT] = back
+        header[TICK] += 1
+        header[COMPLETED] = completed
+        header[PUBLISHED_NS] = time.monotonic_ns()
+        header[TICK_NS] = tick_ns
+        header[SEQUENCE] += 1
+
+    def read(self) -> Tuple[array, int, bool, int, int]:
+        """Copies the latest tick (game process side)
+
+        :return: (records, tick, completed, published at, tick time). The records are overwritten by the next read
+        """
+        header = self.header
+        while True:
+            sequence = header[SEQUENCE]
+            if sequence & 1:
+                continue  # the worker is flipping the slots, which only takes a few field writes
+            start = header[FRONT] * self.slot_size
+            stop = start + self.slot_size
+            self._copy_view[:] = self.records[start:stop]
+            result = self._copy, header[TICK], bool(header[COMPLETED]), header[PUBLISHED_NS], header[TICK_NS]
+            if header[SEQUENCE] == sequence:
+                return result
+
+    def write_window(self, rect: tuple, terminal_size: Tuple[int, int]) -> NoReturn:
+        """Tells the worker where the window is and how big the terminal is (game process side)"""
+        header = self.header
+        header[WINDOW_SEQUENCE] += 1
+        header[WINDOW:TERMINAL] = array("q", rect)
+        header[TERMINAL:HEADER_FIELDS] = array("q", terminal_size)
+        header[WINDOW_SEQUENCE] += 1
+
+    def read_window(self) -> Tuple[Tuple[int, ...], Tuple[int, int]]:
+        """Gets the window rectangle and the terminal size last written by the game process (worker side)"""
+        header = self.header
+        while True:
+            sequence = header[WINDOW_SEQUENCE]
+            if sequence & 1:
+                continue
+            self._window_copy_view[:] = header[WINDOW:HEADER_FIELDS]
+            if header[WINDOW_SEQUENCE] == sequence:
+                values = tuple(self._window_copy)
+                return values[:4], values[4:]
+
+    def close(self) -> NoReturn:
+        """Detaches from the shared memory, removing it if this process created it"""
+        self._copy_view.release()
+        self._window_copy_view.release()
+        self.header.release()
+        self.records.release()
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+
+class PhysicsProcess:
+    """Runs the physics of a level in a worker process, mirroring the state it publishes into a local copy
+
+    The local copy is only rendered. Its moving objects get vectors of their own, which sync() sets to the
+    positions and sizes the worker computed (already resolved against the window)
+    """
+
+    def __init__(self, build: Callable[[], BoxState], box: BoxState, max_fps: Optional[int] = 20):
+        """Initialize a worker that isn't started yet
+
+        :param build: Function building the level, called in the worker. It must be picklable (e.g. a
+        functools.partial of a module level function) and build the same objects as box, in the same order
+        :param box: Copy of the level the game process renders
+        :param max_fps: Ticks per second of the worker. None ticks as fast as it can
+        """
+        if vector_window_manager.current_rect is None:  # needed to resolve the vectors of the objects
+            vector_window_manager.update()
+        self.box = box
+        self.bodies = [obj for obj in box.objects if not obj.static]
+        for obj in self.bodies:
+            obj.position = Vector(obj.position.x, obj.position.y)
+            obj.size = Vector(obj.size.x, obj.size.y)
+        self.shared = SharedState(len(self.bodies))
+        context = multiprocessing.get_context("spawn")
+        # The worker sends the traceback of the exception it dies with, if any, for sync() to raise
+        self._errors, self._error_sender = context.Pipe(duplex=False)
+        self.process = context.Process(
+            target=_worker_main,
+            args=(build, self.shared.name, len(self.bodies), 1 / max_fps if max_fps else 0.0, self._error_sender),
+            name="physics",
+            daemon=True,
+        )
+
+        self.tick = 0  # last tick copied into the box
+        self.completed = False
+        self.latencies = deque(maxlen=240)  # seconds between a tick being published and being copied
+        self.tick_times = deque(maxlen=240)  # seconds the worker took to update each tick copied
+        self._window = None
+
+    def start(self) -> NoReturn:
+        """Starts the worker. It builds the level, then starts ticking"""
+        self.publish_window()
+        self.shared.header[STATE] = RUNNING
+        # The worker has no window of its own: it uses the headless window manager, moved by publish_window()
+        previous = os.environ.get(HEADLESS_ENV_VAR)
+        os.environ[HEADLESS_ENV_VAR] = "1"
+        try:
+            self.process.start()
+        finally:
+            if previous is None:
+                del os.environ[HEADLESS_ENV_VAR]
+            else:
+                os.environ[HEADLESS_ENV_VAR] = previous
+        self._error_sender.close()  # only the worker sends
+
+    def pause(self) -> NoReturn:
+        """Stops ticking until resume() is called"""
+        self.shared.header[STATE] = PAUSED
+
+    def resume(self) -> NoReturn:
+        """Carries on ticking after pause()"""
+        self.shared.header[STATE] = RUNNING
+
+    def stop(self) -> NoReturn:
+        """Stops the worker and frees the shared memory"""
+        self.shared.header[STATE] = STOPPED
+        if self.process.is_alive():
+            self.process.join(timeout=1)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join()
+        self._errors.close()
+        self.shared.close()
+
+    def publish_window(self) -> NoReturn:
+        """Tells the worker where the window is, if it changed"""
+        window = (tuple(vector_window_manager.current_rect), (terminal.columns, terminal.lines))
+        if window != self._window:
+            self.shared.write_window(*window)
+            self._window = window
+
+    def sync(self) -> bool:
+        """Updates the window for the worker, and copies the latest tick into the box
+
+        Call it every frame, in place of BoxState.update()
+
+        :return: Whether there was a new tick to copy
+        :raises RuntimeError: If the worker died, with the traceback of the exception it died with if it sent one
+        """
+        vector_window_manager.update()
+        self.publish_window()
+        records, tick, completed, published_ns, tick_ns = self.shared.read()
+        if tick == self.tick:
+            if self.process.exitcode is not None:  # it won't publish anything anymore
+                self._raise_worker_error()
+            return False
+
+        self.latencies.append((time.monotonic_ns() - published_ns) / 1e9)
+        self.tick_times.append(tick_ns / 1e9)
+        self.tick = tick
+        self.completed = completed
+        offset = 0
+        for obj in self.bodies:
+            position = obj.position
+            size = obj.size
+            position.constant_x = records[offset]
+            position.constant_y = records[offset + 1]
+            size.constant_x = records[offset + 2]
+            size.constant_y = records[offset + 3]
+            obj.orientation = records[offset + 4]
+            offset += RECORD_FIELDS
+        return True
+
+    def _raise_worker_error(self) -> NoReturn:
+        """Raises a RuntimeError telling why the worker exited"""
+        message = f"The physics worker exited with code {self.process.exitcode}"
+        try:
+            if self._errors.poll():
+                message += f". Traceback of the worker:\n{self._errors.recv()}"
+        except EOFError:  # it died before it could send anything, e.g. while starting
+            pass
+        raise RuntimeError(message)
+
+
+def _worker_main(build: Callable[[], BoxState], name: str, bodies: int, period: float, errors: Connection) -> NoReturn:
+    """Runs the worker, sending the traceback of any exception it dies with through errors (runs in the worker)"""
+    try:
+        _run_worker(build, name, bodies, period)
+    except BaseException:
+        errors.send(traceback.format_exc())
+        raise
+    finally:
+        errors.close()
+
+
+def _run_worker(build: Callable[[], BoxState], name: str, bodies: int, period: float) -> NoReturn:
+    """Builds the level and updates it every period, publishing each tick"""
+    shared = SharedState(bodies, name)
+    if not isinstance(vector_window_manager, HeadlessWindowManager):
+        shared.close()
+        raise RuntimeError(f"The worker must be started with {HEADLESS_ENV_VAR}=1, not to move the real window")
+    box = build()
+    moving = [obj for obj in box.objects if not obj.static]
+    if len(moving) != bodies:
+        shared.close()
+        raise RuntimeError(f"The level built in the worker has {len(moving)} moving objects instead of {bodies}")
+
+    header = shared.header
+    deadline = time.perf_counter()
+    while header[STATE] != STOPPED:
+        if header[STATE] == PAUSED:
+            time.sleep(0.01)
+            deadline = time.perf_counter()
+            continue
+
+        rect, (columns, lines) = shared.read_window()
+        terminal.set_size(columns, lines)
+        vector_window_manager.set_window_rect(rect)
+        start = time.perf_counter_ns()
+        box.update()
+        shared.publish(moving, time.perf_counter_ns() - start, box.completed)
+
+        deadline += period
+        delay = deadline - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            deadline = time.perf_counter()  # fell behind, don't try to catch up
+    shared.close()
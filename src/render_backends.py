@@ -0,0 +1,160 @@
+import curses
+import os
+import sys
+from abc import ABC, abstractmethod
+from typing import Dict, List, NoReturn, Optional, Tuple
+
+from .color_pairs import tile_attr
+from .terminal_geometry import terminal
+
+
+class RenderBackend(ABC):
+    """Puts the runs of cells produced by the Compositor on the terminal
+
+    Runs arrive grouped by colour and, within a colour, sorted by position
+    """
+
+    def __init__(self):
+        self.calls = 0  # calls made to the terminal (curses functions or writes) since this was last reset
+
+    @abstractmethod
+    def get_size(self) -> Tuple[int, int]:
+        """Gets the size of the terminal as (rows, columns)"""
+        ...
+
+    @abstractmethod
+    def clear(self) -> NoReturn:
+        """Blanks the whole terminal, before a frame is drawn from scratch"""
+        ...
+
+    @abstractmethod
+    def draw_run(self, y: int, x: int, text: str, colour: int, last_cell: bool = False) -> NoReturn:
+        """Draws a run of characters on a single row in the given tile colour
+
+        :param last_cell: Whether the run ends on the bottom right tile of the terminal
+        """
+        ...
+
+    @abstractmethod
+    def flush(self) -> NoReturn:
+        """Shows everything drawn since the last flush"""
+        ...
+
+
+class CursesBackend(RenderBackend):
+    """Draws through a curses window"""
+
+    def __init__(self, screen: curses.window):
+        super().__init__()
+        self.screen = screen
+
+    def get_size(self) -> Tuple[int, int]:
+        """Gets the size of the terminal as (rows, columns)"""
+        self.calls += 1
+        return self.screen.getmaxyx()
+
+    def clear(self) -> NoReturn:
+        """Blanks the whole window"""
+        self.calls += 1
+        self.screen.erase()
+
+    def draw_run(self, y: int, x: int, text: str, colour: int, last_cell: bool = False) -> NoReturn:
+        """Draws a run of characters with addstr"""
+        attr = tile_attr(colour)
+        if last_cell:
+            # Writing to the bottom right tile raises an error with addstr, but not with insch
+            self.calls += 1
+            self.screen.insch(y, x + len(text) - 1, text[-1], attr)
+            text = text[:-1]
+            if not text:
+                return
+        self.calls += 1
+        self.screen.addstr(y, x, text, attr)
+
+    def flush(self) -> NoReturn:
+        """Refreshes the window"""
+        self.calls += 1
+        self.screen.refresh()
+
+
+class AnsiBackend(RenderBackend):
+    """Writes ANSI escape sequences straight to the terminal, skipping curses
+
+    The whole frame is built into a single bytes object and sent with one os.write.
+    Cursor moves are only emitted when the next run doesn't start where the cursor already is, and colours
+    are only switched when they change. Curses still owns the terminal (input, modes), so it should not draw
+    on it while this backend is in use
+    """
+
+    RESET = b"\x1b[0m"
+
+    def __init__(self, fd: Optional[int] = None):
+        """Initialize the backend
+
+        :param fd: File descriptor of the terminal, stdout by default
+        """
+        super().__init__()
+        self.fd = sys.stdout.fileno() if fd is None else fd
+        self._parts: List[bytes] = []
+        self._cursor: Optional[Tuple[int, int]] = None  # unknown until the first move of a frame
+        self._colour: Optional[int] = None
+        self._sgr_cache: Dict[int, bytes] = {}
+
+    def get_size(self) -> Tuple[int, int]:
+        """Gets the size of the terminal as (rows, columns)"""
+        if self.fd == sys.stdout.fileno():
+            return terminal.lines, terminal.columns  # only read again on a resize
+        size = os.get_terminal_size(self.fd)
+        return size.lines, size.columns
+
+    def clear(self) -> NoReturn:
+        """Resets the colours and blanks the terminal"""
+        self._parts.append(self.RESET + b"\x1b[2J")
+        self._colour = 0
+        self._cursor = None
+
+    def draw_run(self, y: int, x: int, text: str, colour: int, last_cell: bool = False) -> NoReturn:
+        """Queues a run of characters, moving the cursor and switching colour only when needed"""
+        parts = self._parts
+        cursor = self._cursor
+        if cursor != (y, x):
+            if cursor is not None and cursor[0] == y and 0 < x - cursor[1] < 4:
+                parts.append(b"\x1b[%dC" % (x - cursor[1]))  # a short hop along the row
+            else:
+                parts.append(b"\x1b[%d;%dH" % (y + 1, x + 1))
+        if colour != self._colour:
+            parts.append(self._sgr(colour))
+            self._colour = colour
+        parts.append(text.encode())
+        # After the last column the cursor position depends on the terminal's wrapping, so forget it
+        self._cursor = None if last_cell else (y, x + len(text))
+
+    def flush(self) -> NoReturn:
+        """Writes the queued frame to the terminal in one go"""
+        if not self._parts:
+            return
+        frame = b"".join(self._parts)
+        self._parts.clear()
+        self._cursor = None  # something else (e.g. curses) may move the cursor between frames
+        view = memoryview(frame)
+        while view:
+            self.calls += 1
+            written = os.write(self.fd, view)
+            view = view[written:]
+
+    def _sgr(self, colour: int) -> bytes:
+        """Gets the escape sequence selecting a tile colour (foreground colour number on black)"""
+        sgr = self._sgr_cache.get(colour)
+        if sgr is None:
+            if colour <= 0:
+                sgr = self.RESET
+            else:
+                sgr = b"\x1b[0;38;5;%d;40m" % colour
+            self._sgr_cache[colour] = sgr
+        return sgr
+
+
+render_backends = {
+    "curses": CursesBackend,
+    "ansi": AnsiBackend,
+}
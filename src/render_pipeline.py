@@ -0,0 +1,154 @@
+import queue
+import threading
+import time
+from collections import namedtuple
+from typing import List, NoReturn, Optional, Sequence, Tuple
+
+from .compositor import Compositor
+from .datatypes.shape import Shape
+from .datatypes.textures import Texture
+from .datatypes.tile_buffer import TileBuffer
+from .datatypes.vector import Vector
+from .frame_stats import PhaseTimers
+from .render_backends import RenderBackend
+
+# Everything needed to draw a frame, taken after its tick. layers: [(z, objects)] as BoxState.layers, with moving
+# objects replaced by SnapshotItems. overlay: lines drawn over the top left corner (the HUD), or None.
+# created: time.perf_counter() the snapshot was taken at
+FrameSnapshot = namedtuple("FrameSnapshot", ["layers", "window_rect", "overlay", "created"])
+
+
+class SnapshotItem:
+    """A moving object as it was when a frame snapshot was taken
+
+    The Compositor draws it like the object itself: it is never static and render() rasterises the texture of the
+    object where the object was. Textures are shared with the objects, only the render thread draws them
+    """
+
+    __slots__ = ("rect", "orientation", "shape", "texture")
+
+    static = False
+
+    def __init__(self, rect: Tuple[float, float, float, float], orientation: float, shape: Shape, texture: Texture):
+        """Initialize an item
+
+        :param rect: Position and size of the object as (x, y, width, height), in tiles
+        """
+        self.rect = rect
+        self.orientation = orientation
+        self.shape = shape
+        self.texture = texture
+
+    def render(self) -> TileBuffer:
+        """Rasterises the texture of the object where it was"""
+        x, y, width, height = self.rect
+        return self.texture.render_at(Vector(x, y), Vector(width, height), self.orientation, self.shape)
+
+
+def draw_overlay(backend: RenderBackend, lines: Sequence[str], width: int) -> NoReturn:
+    """Draws lines of text over the top left corner of the screen, padded to a width"""
+    rows, cols = backend.get_size()
+    for y, line in enumerate(lines[: rows - 1]):
+        backend.draw_run(y, 0, f"{line:<{width}}"[:cols], 0)
+    backend.flush()
+
+
+class RenderPipeline:
+    """Draws frame snapshots on a thread of its own, so drawing a frame overlaps with the tick of the next one
+
+    The game loop submits a snapshot per frame into a bounded queue. When the render thread falls behind, the oldest
+    snapshot waiting is dropped: a stale frame is never drawn after a newer one is ready. Python only runs one thread
+    at a time, so this only pays off while the render thread waits on the terminal (writes release the GIL)
+    """
+
+    def __init__(self, backend: RenderBackend, depth: int = 1, overlay_width: int = 36):
+        """Initialize a pipeline that isn't started yet
+
+        :param depth: Number of snapshots that can wait to be drawn. 1 or 2 keeps frames fresh
+        :param overlay_width: Width the overlay lines are padded to
+        """
+        self.backend = backend
+        self.overlay_width = overlay_width
+        self.queue: queue.Queue = queue.Queue(maxsize=depth)
+        self.timers = PhaseTimers()  # time spent drawing each frame, and its age once drawn
+        self.frames = 0  # snapshots drawn
+        self.dropped = 0  # snapshots replaced by a newer one before they were drawn
+        self.render_calls = 0  # calls the backend made to the terminal for the last frame drawn
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> NoReturn:
+        """Starts the render thread, unless it is running"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="render", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> NoReturn:
+        """Draws the snapshot waiting, if any, then stops the render thread"""
+        if self._thread is not None:
+            self.queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def submit(self, compositor: Compositor, snapshot: FrameSnapshot) -> NoReturn:
+        """Queues a snapshot to be drawn with a compositor, dropping the oldest one waiting if the queue is full
+
+        The compositor must only be used by the render thread while the pipeline is running
+        """
+        while True:
+            try:
+                self.queue.put_nowait((compositor, snapshot))
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    continue  # the render thread took it meanwhile
+                self.queue.task_done()
+                self.dropped += 1
+
+    def drain(self) -> NoReturn:
+        """Waits until every snapshot submitted is drawn, e.g. before something else draws on the screen"""
+        if self._thread is not None:
+            self.queue.join()
+
+    def _run(self) -> NoReturn:
+        """Draws snapshots as they come (runs as thread)"""
+        timers = self.timers
+        backend = self.backend
+        while True:
+            item = self.queue.get()
+            if item is None:
+                self.queue.task_done()
+                return
+            compositor, snapshot = item
+            timers.start()
+            backend.calls = 0
+            compositor.render(backend, snapshot.layers, snapshot.window_rect)
+            if snapshot.overlay is not None:
+                draw_overlay(backend, snapshot.overlay, self.overlay_width)
+            timers.lap("render thread")
+            timers.add("frame age", time.perf_counter() - snapshot.created)
+            self.render_calls = backend.calls
+            self.frames += 1
+            self.queue.task_done()
+
+    def summary(self) -> dict:
+        """Percentiles of the time spent drawing and of the age of frames once drawn, with the frame counts"""
+        return {"phases": self.timers.summary(), "frames": self.frames, "dropped": self.dropped}
+
+
+def snapshot_layers(layers: List[Tuple[int, list]]) -> tuple:
+    """Copies layers of objects for a snapshot: static objects as they are, moving ones as SnapshotItems"""
+    copied = []
+    for z, objects in layers:
+        items = []
+        for obj in objects:
+            if obj.static:
+                items.append(obj)  # static objects don't change once added, the compositor only reads them
+            else:
+                position = obj.position
+                size = obj.size
+                rect = (position.x, position.y, size.x, size.y)
+                items.append(SnapshotItem(rect, obj.orientation, obj.shape, obj.texture))
+        copied.append((z, tuple(items)))
+    return tuple(copied)
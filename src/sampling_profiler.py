@@ -0,0 +1,132 @@
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from types import FrameType
+from typing import NoReturn, Optional
+
+from .tracing import tracer
+
+
+class SamplingProfiler:
+    """Samples the stack of a thread from a helper thread and writes it as collapsed stacks
+
+    The output has a line per distinct stack, `outermost;...;innermost count`, which flamegraph.pl,
+    speedscope and most other flame graph tools read. Sampling only reads sys._current_frames(),
+    so the profiled thread keeps running undisturbed (apart from sharing the GIL with the sampler)
+    """
+
+    def __init__(self, rate: float = 200, directory: str = ".", thread_id: Optional[int] = None):
+        """Initialize a profiler that is not running
+
+        :param rate: Samples per second
+        :param directory: Where profiles are written, one file per start() / stop()
+        :param thread_id: Thread to sample, the main thread by default
+        """
+        self.rate = rate
+        self.directory = directory
+        self.thread_id = thread_id
+        self.last_path: Optional[str] = None  # file the last profile was written to
+
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._profiles = 0  # profiles started so far, to give each file a unique name
+
+    @property
+    def running(self) -> bool:
+        """Whether the profiler is sampling"""
+        return self._thread is not None and not self._stop.is_set()
+
+    def start(self) -> NoReturn:
+        """Starts sampling. Does nothing if the profiler is already running"""
+        if self.running:
+            return
+        if self._thread is not None:
+            self._thread.join()  # the previous profile is still being written
+        self._stop.clear()
+        self._profiles += 1
+        thread_id = self.thread_id if self.thread_id is not None else threading.main_thread().ident
+        self._thread = threading.Thread(target=self._sample_loop, args=(thread_id,), name="profiler", daemon=True)
+        self._thread.start()
+        tracer.instant("profiler started", "profiler")
+
+    def stop(self) -> NoReturn:
+        """Stops sampling. The helper thread writes the profile out in the background"""
+        if self.running:
+            self._stop.set()
+            tracer.instant("profiler stopped", "profiler")
+
+    def toggle(self) -> NoReturn:
+        """Starts the profiler if it is stopped, stops it otherwise"""
+        if self.running:
+            self.stop()
+        else:
+            self.start()
+
+    def join(self) -> NoReturn:
+        """Waits until the last profile has been written"""
+        if self._thread is not None:
+            self._thread.join()
+
+    def install_signal_handler(self, signum: int = getattr(signal, "SIGUSR1", None)) -> bool:
+        """Toggles the profiler when the process receives a signal (SIGUSR1 by default)
+
+        The handler only starts or stops the helper thread, so it returns straight away.
+        Returns whether the handler was installed: SIGUSR1 doesn't exist on Windows
+        """
+        if signum is None:
+            return False
+        signal.signal(signum, lambda *_: self.toggle())
+        return True
+
+    def _sample_loop(self, thread_id: int) -> NoReturn:
+        """Samples the thread until stop(), then writes the profile (runs as thread)"""
+        interval = 1 / self.rate
+        stacks = Counter()
+        labels = {}  # code object -> frame label, so each function is only formatted once
+        next_sample = time.perf_counter()
+        while not self._stop.is_set():
+            frame = sys._current_frames().get(thread_id)
+            if frame is None:  # the thread has exited
+                self._stop.set()
+                break
+            stacks[self._collapse(frame, labels)] += 1
+            del frame
+
+            next_sample += interval
+            delay = next_sample - time.perf_counter()
+            if delay > 0:
+                self._stop.wait(delay)
+            else:
+                next_sample = time.perf_counter()  # sampling is slower than the rate, don't try to catch up
+
+        self._write(stacks)
+
+    @staticmethod
+    def _collapse(frame: FrameType, labels: dict) -> str:
+        """Gets a stack as `outermost;...;innermost`"""
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            label = labels.get(code)
+            if label is None:
+                label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                labels[code] = label
+            names.append(label)
+            frame = frame.f_back
+        names.reverse()
+        return ";".join(names)
+
+    def _write(self, stacks: Counter) -> NoReturn:
+        """Writes the sampled stacks to a new file in the directory"""
+        name = f"profile-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self._profiles}.folded"
+        path = os.path.join(self.directory, name)
+        with open(path, "w") as file:
+            for stack, count in stacks.most_common():
+                file.write(f"{stack} {count}\n")
+        self.last_path = path
+
+
+profiler = SamplingProfiler()  # shared by the game, see game_loop.py for how it is started
@@ -0,0 +1,105 @@
+from collections import deque, namedtuple
+from typing import Deque, Dict, List, NoReturn, Set, Tuple
+
+from .datatypes.game_object import GameObject
+from .datatypes.triggers import Triggers
+
+CONTACT_BEGIN = "begin"
+CONTACT_END = "end"
+
+# Something started (kind=CONTACT_BEGIN) or stopped (kind=CONTACT_END) touching a sensor
+ContactEvent = namedtuple("ContactEvent", ["kind", "sensor", "other"])
+
+
+class SensorIndex:
+    """Fires the triggers of sensors when objects start or stop touching them
+
+    A sensor is any object whose triggers are a Triggers instance. The index maps each sensor to its Triggers,
+    so nothing ever has to look through every object for them. Collision detection reports what each object
+    touches with report(), and end_tick() compares that with the previous tick to queue contact-begin and
+    contact-end events. dispatch() processes the queue in one batch, once per tick after every object has moved.
+    Only contacts involving a sensor are kept, so the cost of a tick follows the number of sensor contacts,
+    and triggers only run when a contact changes
+    """
+
+    def __init__(self):
+        self.sensors: Dict[GameObject, Triggers] = {}
+        self.queue: Deque[ContactEvent] = deque()
+        self._contacts: Set[Tuple[GameObject, GameObject]] = set()  # (sensor, other) touching after the last tick
+        self._touching: Set[Tuple[GameObject, GameObject]] = set()  # (sensor, other) reported during this tick
+
+    def add(self, obj: GameObject) -> NoReturn:
+        """Starts watching an object if it is a sensor. Its triggers must be set before it is added"""
+        if isinstance(obj.triggers, Triggers):
+            self.sensors[obj] = obj.triggers
+
+    def remove(self, obj: GameObject) -> NoReturn:
+        """Stops watching an object
+
+        Contacts of a removed sensor are dropped without events. An object removed while touching a sensor
+        stops touching it, so that contact ends
+        """
+        self.sensors.pop(obj, None)
+        for pair in [pair for pair in self._contacts if obj in pair]:
+            self._contacts.discard(pair)
+            if pair[1] is obj and pair[0] in self.sensors:
+                self.queue.append(ContactEvent(CONTACT_END, pair[0], obj))
+        self._touching = {pair for pair in self._touching if obj not in pair}
+
+    def clear(self) -> NoReturn:
+        """Forgets every sensor, contact and queued event"""
+        self.sensors.clear()
+        self.queue.clear()
+        self._contacts.clear()
+        self._touching.clear()
+
+    def report(self, obj: GameObject, touching: List[tuple]) -> NoReturn:
+        """Records what an object touches this tick. Called by collision detection for every object
+
+        :param touching: Output of the narrow phase, as (min_angle, max_angle, object, plane_normal)
+        """
+        sensors = self.sensors
+        if not sensors:
+            return
+        if obj in sensors:
+            for contact in touching:
+                self._touching.add((obj, contact[2]))
+        else:
+            for contact in touching:
+                if contact[2] in sensors:
+                    self._touching.add((contact[2], obj))
+
+    def end_tick(self) -> NoReturn:
+        """Queues an event for every contact that began or ended since the last tick"""
+        began = self._touching - self._contacts
+        ended = self._contacts - self._touching
+        # Sets have no order, sort so triggers always run in the same order
+        for sensor, other in sorted(ended, key=self._pair_order):
+            self.queue.append(ContactEvent(CONTACT_END, sensor, other))
+        for sensor, other in sorted(began, key=self._pair_order):
+            self.queue.append(ContactEvent(CONTACT_BEGIN, sensor, other))
+        self._contacts = self._touching
+        self._touching = set()
+
+    def dispatch(self) -> List[ContactEvent]:
+        """Ends the tick and processes the triggers of every queued event, oldest first
+
+        :return: The events processed
+        """
+        self.end_tick()
+        events = list(self.queue)
+        self.queue.clear()
+        for event in events:
+            triggers = self.sensors.get(event.sensor)
+            if triggers is None:
+                continue  # the sensor was removed after the event was queued
+            if event.kind == CONTACT_BEGIN:
+                triggers.process()
+            else:
+                triggers.process_end()
+        return events
+
+    @staticmethod
+    def _pair_order(pair: Tuple[GameObject, GameObject]) -> Tuple[int, int]:
+        """Sort key of a contact, by the handles of the objects in it"""
+        return pair[0].handle, pair[1].handle
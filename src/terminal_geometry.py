@@ -0,0 +1,110 @@
+import asyncio
+import curses
+import os
+import shutil
+import signal
+from typing import Callable, List, NoReturn, Tuple
+
+
+class TerminalGeometry:
+    """The size of the terminal, shared by everything that needs it
+
+    Asking the OS for the size is a system call, and everything converting between tiles and pixels needs it. The size
+    is read once, then again only when the terminal is resized: after SIGWINCH once install_signal_handler() or watch()
+    is called, or when poll() finds it changed (headless, where nothing sends the signal). SIGWINCH only marks the size
+    as pending: poll(), at the start of the next frame, reads it, so nothing is resized in the middle of a frame.
+    generation counts the changes, so caches of anything computed from the size can key on it.
+    While curses owns the terminal, it is resized along with it. Nothing else should call curses.resize_term()
+    """
+
+    def __init__(self):
+        self.columns, self.lines = self._read()
+        self.generation = 0  # incremented every time the size changes
+        self.curses = False  # set while curses owns the terminal, to resize curses along with it
+        self.signalled = False  # whether SIGWINCH tells about changes, so poll() only reads the size after one
+        self.pending = False  # set by SIGWINCH until poll() reads the size again
+        self.listeners: List[Callable[[], None]] = []  # called after every change
+        # Called on SIGWINCH to wake up whatever waits for input, so a frame runs poll(). They must only set flags
+        self.wakers: List[Callable[[], None]] = []
+
+    @property
+    def size(self) -> os.terminal_size:
+        """Current size of the terminal"""
+        return os.terminal_size((self.columns, self.lines))
+
+    def cell_size(self, width: int, height: int) -> Tuple[int, int]:
+        """Gets the size (width, height) of a character cell in pixels, in a window of the given size in pixels"""
+        return int(width / self.columns), int(height / self.lines)
+
+    def set_size(self, columns: int, lines: int) -> bool:
+        """Sets the size of the terminal, e.g. one reported by another process
+
+        :return: Whether it changed
+        """
+        if (columns, lines) == (self.columns, self.lines):
+            return False
+        self.columns = columns
+        self.lines = lines
+        self.generation += 1
+        if self.curses:
+            curses.resize_term(lines, columns)
+        for listener in self.listeners:
+            listener()
+        return True
+
+    def refresh(self) -> bool:
+        """Reads the size of the terminal again
+
+        :return: Whether it changed
+        """
+        return self.set_size(*self._read())
+
+    def poll(self) -> bool:
+        """Reads the size of the terminal again if SIGWINCH was received, or every time if nothing handles SIGWINCH
+
+        Call it at the start of every frame, while nothing draws
+
+        :return: Whether it changed
+        """
+        if self.signalled:
+            if not self.pending:
+                return False
+            self.pending = False
+        return self.refresh()
+
+    def install_signal_handler(self) -> bool:
+        """Marks the size as pending whenever the process receives SIGWINCH. This replaces the handler of curses
+
+        Returns whether the handler was installed: SIGWINCH doesn't exist on Windows
+        """
+        if not hasattr(signal, "SIGWINCH"):
+            return False
+        signal.signal(signal.SIGWINCH, lambda *_: self._resized())
+        self.signalled = True
+        return True
+
+    def watch(self, loop: asyncio.AbstractEventLoop) -> bool:
+        """Marks the size as pending on an event loop on SIGWINCH, see install_signal_handler"""
+        if not hasattr(signal, "SIGWINCH"):
+            return False
+        loop.add_signal_handler(signal.SIGWINCH, self._resized)
+        self.signalled = True
+        return True
+
+    def _resized(self) -> NoReturn:
+        """Marks the size as pending and wakes up whatever waits for input (called on SIGWINCH)"""
+        self.pending = True
+        for waker in self.wakers:
+            waker()
+
+    @staticmethod
+    def _read() -> Tuple[int, int]:
+        """Asks the OS for the size of the terminal as (columns, lines)"""
+        try:
+            size = os.get_terminal_size()
+        except OSError:  # not attached to a terminal, e.g. headless. Falls back to $COLUMNS / $LINES, then 80x24
+            size = shutil.get_terminal_size()
+        return size.columns, size.lines
+
+
+terminal = TerminalGeometry()  # shared by the whole game, see game_loop.py for how it follows resizes
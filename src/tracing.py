@@ -0,0 +1,174 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from threading import get_ident
+from typing import NoReturn, Optional, Union
+
+TRACE_ENV_VAR = "NARWHALS_TRACE"  # set to a file path to trace the game into it
+
+
+class _Span:
+    """Context manager recording a complete event from __enter__ to __exit__"""
+
+    __slots__ = ("tracer", "name", "category", "args", "start")
+
+    def __init__(self, tracer: "Tracer", name: str, category: str, args: Optional[dict]):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self) -> "_Span":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> NoReturn:
+        self.tracer.complete(self.name, self.category, self.start, time.perf_counter(), self.args)
+
+
+class _NullSpan:
+    """Context manager that does nothing, used while tracing is off"""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> NoReturn:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """Records spans and events in the Chrome trace event format, which opens in Perfetto and chrome://tracing
+
+    Tracing is off until start() is called, and every method returns straight away while it is off.
+    Recording an event only appends a tuple to a bounded ring buffer. A background thread drains it,
+    formats the events and writes them to the file. If the writer falls behind, the oldest events are dropped
+    (and counted) rather than stalling the game
+    """
+
+    def __init__(self, capacity: int = 1 << 16, flush_interval: float = 0.25):
+        """Initialize a tracer that is off
+
+        :param capacity: Number of events the ring buffer holds before dropping the oldest
+        :param flush_interval: Seconds between writes to the file
+        """
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.enabled = False
+        self.dropped = 0
+
+        self._events = deque(maxlen=capacity)
+        self._file = None
+        self._writer: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._origin = 0.0
+        self._written = 0
+        self._named_threads = set()
+        self._event_heads = {}  # (phase, name, category) -> start of the JSON object of such events
+
+    def start(self, path: str) -> NoReturn:
+        """Starts recording events into a new trace file"""
+        if self.enabled:
+            self.stop()
+        self._file = open(path, "w")
+        self._file.write("[\n")
+        self._origin = time.perf_counter()
+        self._written = 0
+        self._named_threads.clear()
+        self.dropped = 0
+        self._stop.clear()
+        self._writer = threading.Thread(target=self._write_loop, name="trace writer", daemon=True)
+        self._writer.start()
+        self.enabled = True
+
+    def stop(self) -> NoReturn:
+        """Stops recording and finishes the trace file"""
+        if not self.enabled:
+            return
+        self.enabled = False
+        self._stop.set()
+        self._writer.join()
+        self._file.write("\n]\n")
+        self._file.close()
+        self._file = None
+
+    def complete(self, name: str, category: str, start: float, end: float, args: Optional[dict] = None) -> NoReturn:
+        """Records a span that started and ended at the given time.perf_counter() values"""
+        if self.enabled:
+            events = self._events
+            if len(events) == self.capacity:
+                self.dropped += 1  # the oldest event is pushed out
+            events.append(("X", name, category, start, end - start, get_ident(), args))
+
+    def instant(self, name: str, category: str, args: Optional[dict] = None) -> NoReturn:
+        """Records an event that happened now"""
+        if self.enabled:
+            events = self._events
+            if len(events) == self.capacity:
+                self.dropped += 1
+            events.append(("i", name, category, time.perf_counter(), 0.0, get_ident(), args))
+
+    def span(self, name: str, category: str, args: Optional[dict] = None) -> Union[_Span, _NullSpan]:
+        """Gets a context manager recording a span around its body
+
+        Usage: `with tracer.span("load level", "level"): ...`
+        """
+        if self.enabled:
+            return _Span(self, name, category, args)
+        return _NULL_SPAN
+
+    def _write_loop(self) -> NoReturn:
+        """Writes the buffered events every flush_interval until stop() (runs as thread)"""
+        while not self._stop.wait(self.flush_interval):
+            self._drain()
+        self._drain()
+
+    def _drain(self) -> NoReturn:
+        """Formats and writes every buffered event"""
+        pid = os.getpid()
+        origin = self._origin
+        heads = self._event_heads
+        lines = []
+        while True:
+            try:
+                phase, name, category, start, duration, thread, args = self._events.popleft()
+            except IndexError:
+                break
+            if thread not in self._named_threads:
+                self._named_threads.add(thread)
+                lines.append(self._thread_name_event(pid, thread))
+
+            # Events are formatted by hand, json.dumps() on every event would take most of the writer's time
+            key = (phase, name, category)
+            head = heads.get(key)
+            if head is None:
+                head = heads[key] = f'{{"ph": "{phase}", "name": {json.dumps(name)}, "cat": {json.dumps(category)}, '
+            line = f'{head}"ts": {(start - origin) * 1e6:.3f}, "pid": {pid}, "tid": {thread}'
+            if phase == "X":
+                line += f', "dur": {duration * 1e6:.3f}'
+            else:
+                line += ', "s": "t"'  # instant events are scoped to their thread
+            if args:
+                line += ', "args": ' + json.dumps(args)
+            lines.append(line + "}")
+
+        if lines:
+            separator = ",\n" if self._written else ""
+            self._file.write(separator + ",\n".join(lines))
+            self._file.flush()
+            self._written += len(lines)
+
+    @staticmethod
+    def _thread_name_event(pid: int, thread: int) -> str:
+        """Gets the metadata event labelling a thread in the trace viewer"""
+        name = next((t.name for t in threading.enumerate() if t.ident == thread), str(thread))
+        return json.dumps({"ph": "M", "name": "thread_name", "pid": pid, "tid": thread, "args": {"name": name}})
+
+
+tracer = Tracer()  # shared by the whole game, call tracer.start() to turn tracing on
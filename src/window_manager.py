@@ -1,10 +1,14 @@
+import asyncio
 import operator
+import os
 import platform
 from abc import ABC, abstractmethod
 from collections import namedtuple
-from os import get_terminal_size
 from typing import NoReturn, Optional
 
+from src.terminal_geometry import terminal
+from src.tracing import tracer
+
 Position = namedtuple("Position", ["x", "y"])
 Size = namedtuple("Size", ["width", "height"])
 Rectangle = namedtuple("Rectangle", ["x1", "y1", "x2", "y2"])
@@ -12,9 +16,14 @@ Edges = namedtuple("Corners", ["left", "top", "right", "bottom"])
 Color = namedtuple("Color", ["fg", "bg"])
 Menu = namedtuple("Menu", ["text_lines", "options", "options_actions"])
 
+HEADLESS_ENV_VAR = "NARWHALS_HEADLESS"  # set to 1 to run without a real window (benchmarks, CI)
+
 current_platform = platform.system()
+headless = os.environ.get(HEADLESS_ENV_VAR, "") not in ("", "0")
 
-if current_platform == "Windows":
+if headless:
+    pass  # no platform APIs are needed
+elif current_platform == "Windows":
     import win32console
     import win32gui
 elif current_platform == "Linux":
@@ -61,6 +70,10 @@ class AbstractWindowManager(metaclass=ABCSingleton):
         self.current_rect: Rectangle = None  # window rect coordinates on current frame
         self.previous_rect: Rectangle = None  # window rectangle coordinates on previous frame
 
+        # With window events watched (see watch), the window rect is only asked for again after one arrives
+        self.watching = False
+        self._window_changed = True
+
     @staticmethod
     def get_position(rect: Rectangle) -> Position:
         """Extracts position (x, y) from rectangle coordinates (upper left corner)"""
@@ -77,9 +90,7 @@ class AbstractWindowManager(metaclass=ABCSingleton):
 
     def get_font_size(self, rect: Rectangle) -> Size:
         """Extracts size (width, height) of each character as pixels"""
-        width = int(self.get_size(rect).width / get_terminal_size().columns)
-        height = int(self.get_size(rect).height / get_terminal_size().lines)
-        return Size(width, height)
+        return Size(*terminal.cell_size(*self.get_size(rect)))
 
     @property
     def position(self) -> Position:
@@ -154,12 +165,16 @@ class AbstractWindowManager(metaclass=ABCSingleton):
         including getting values from properties
         """
         self.previous_rect = self.current_rect
-        self.current_rect = self._get_window_rect()
+        if self._window_changed or not self.watching:
+            self._window_changed = False
+            with tracer.span("get window rect", "window manager"):
+                self.current_rect = self._get_window_rect()
 
         # Resize window to fit constraints
         constrained_rect = self._fit_constraints(self.current_rect)
         if self.current_rect != constrained_rect:
-            self._set_window_rect(constrained_rect)
+            with tracer.span("set window rect", "window manager"):
+                self._set_window_rect(constrained_rect)
             self.current_rect = constrained_rect
 
     def _fit_constraints(self, rect: Rectangle) -> Rectangle:
@@ -184,9 +199,36 @@ class AbstractWindowManager(metaclass=ABCSingleton):
         For clarity it's better if this method is called no more than once per frame, after everything else
         """
         constrained_rect = self._fit_constraints(rect)
-        self._set_window_rect(constrained_rect)
+        with tracer.span("set window rect", "window manager"):
+            self._set_window_rect(constrained_rect)
         self.current_rect = constrained_rect
 
+    def watch(self, loop: asyncio.AbstractEventLoop) -> bool:
+        """Watches for the window moving or resizing on an event loop, instead of asking for its rect every frame
+
+        :return: Whether the platform can report window events. If it can't, update() keeps asking every frame
+        """
+        fd = self._select_window_events()
+        if fd is None:
+            return False
+        loop.add_reader(fd, self._read_window_events)
+        self.watching = True
+        self._window_changed = True
+        return True
+
+    def _select_window_events(self) -> Optional[int]:
+        """Asks to be sent an event whenever the window moves or resizes
+
+        OS - specific implementation of calls
+
+        :return: File descriptor readable when there are events, or None if the platform doesn't send any
+        """
+        return None
+
+    def _read_window_events(self) -> NoReturn:
+        """Takes the events that arrived, so the next update() asks for the window rect (called by the event loop)"""
+        self._window_changed = True
+
     @abstractmethod
     def _get_window_rect(self) -> Rectangle:
         """Get window position and size as coordinates
@@ -259,6 +301,38 @@ class X11WindowManager(AbstractWindowManager):
         self.window.configure(x=rect.x1, y=rect.y1, width=(rect.x2 - rect.x1), height=(rect.y2 - rect.y1))
         self.display.sync()
 
+    def _select_window_events(self) -> Optional[int]:
+        # The frame around the window moves with it, and is what _get_window_rect measures
+        self.window.query_tree().parent.change_attributes(event_mask=X.StructureNotifyMask)
+        self.display.flush()
+        return self.display.fileno()
+
+    def _read_window_events(self) -> NoReturn:
+        while self.display.pending_events():
+            event = self.display.next_event()
+            if event.type == X.ConfigureNotify:
+                self._window_changed = True
+
+
+class HeadlessWindowManager(AbstractWindowManager):
+    """Window manager that makes up a window the size of the terminal, for running without a display
+
+    The window stays where it is unless set_window_rect() moves it, so tests and benchmarks can move it themselves
+    """
+
+    FONT_SIZE = Size(8, 16)  # pixels per character of the made up window
+
+    def __init__(self):
+        super().__init__()
+        width, height = self.FONT_SIZE
+        self.rect = Rectangle(0, 0, terminal.columns * width, terminal.lines * height)
+
+    def _get_window_rect(self) -> Rectangle:
+        return self.rect
+
+    def _set_window_rect(self, rect: Rectangle) -> NoReturn:
+        self.rect = rect
+
 
 window_managers = {
     "Windows": Win32WindowManager,
@@ -266,4 +340,5 @@ window_managers = {
     "Linux": X11WindowManager,
 }
 
-WindowManager = window_managers[current_platform]  # import this name to get window manager for current platform!
+# import this name to get window manager for current platform!
+WindowManager = HeadlessWindowManager if headless else window_managers[current_platform]
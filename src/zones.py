@@ -0,0 +1,188 @@
+from collections import namedtuple
+from typing import Dict, Iterable, List, NoReturn, Optional, Set, Tuple
+
+from .datatypes.game_object import GameObject
+from .datatypes.interval_tree import IntervalTree
+from .datatypes.spatial_index import Bounds
+from .datatypes.triggers import Triggers
+from .datatypes.vector import Vector
+
+ZONE_ENTER = "enter"
+ZONE_STAY = "stay"
+ZONE_EXIT = "exit"
+
+# A body entered a zone, is still inside it or left it this tick
+ZoneEvent = namedtuple("ZoneEvent", ["kind", "zone", "body"])
+
+
+class TriggerZone:
+    """A region of the level that notices moving objects entering it, staying in it and leaving it
+
+    Zones never collide with anything. A zone either covers a fixed rectangle, or follows an object
+    (e.g. a goal drawn as a yellow object) and covers the same tiles as it
+    """
+
+    def __init__(
+        self,
+        position: Vector = None,
+        size: Vector = None,
+        obj: GameObject = None,
+        triggers: Triggers = None,
+        stay_triggers: Triggers = None,
+        mask: List[int] = None,
+        goal: bool = False,
+    ):
+        """Initialize a zone
+
+        :param position: Top left corner, if the zone doesn't follow an object. Can be relative to the window
+        :param size: Size in tiles, if the zone doesn't follow an object
+        :param obj: Object the zone follows, instead of a position and size
+        :param triggers: Processed when an object enters the zone. Its end triggers are processed when it leaves
+        :param stay_triggers: Processed every tick an object stays in the zone
+        :param mask: Only objects in one of these collision groups are noticed. None notices every object
+        :param goal: Whether an object entering the zone completes the level
+        """
+        if obj is None and (position is None or size is None):
+            raise ValueError("A zone needs either a position and size, or an object to follow")
+        self.position = position
+        self.size = size
+        self.object = obj
+        self.triggers = triggers
+        self.stay_triggers = stay_triggers
+        self.mask = mask
+        self.goal = goal
+
+    @property
+    def moving(self) -> bool:
+        """Whether the zone follows an object that can move"""
+        return self.object is not None and not self.object.static
+
+    def tile_bounds(self) -> Bounds:
+        """Gets the tiles covered by the zone as (x1, y1, x2, y2), both corners inclusive"""
+        if self.object is not None:
+            return self.object.tile_bounds()
+        x1 = round(self.position.x)
+        y1 = round(self.position.y)
+        return (
+            x1,
+            y1,
+            max(x1, round(self.position.x + self.size.x) - 1),
+            max(y1, round(self.position.y + self.size.y) - 1),
+        )
+
+
+class ZoneIndex:
+    """Finds the zones every moving object is in and turns changes into enter, stay and exit events
+
+    Zones that don't move are kept in an interval tree over their horizontal extent, so finding the zones
+    an object is in costs O(log n) in the number of zones rather than a scan over all of them. The tree is
+    rebuilt when a zone is added or removed, or when the window moves (zones can be relative to it).
+    Zones following moving objects change every tick, so those are checked one by one
+    """
+
+    def __init__(self):
+        self.zones: Dict[TriggerZone, int] = {}  # zone -> order it was added in, to sort events by
+        self._next_order = 0
+        self._tree: Optional[IntervalTree] = None
+        self._indexed_rect = None  # window rectangle the tree was built for
+        self._moving: List[TriggerZone] = []
+        self._inside: Set[Tuple[TriggerZone, GameObject]] = set()  # (zone, object) after the last update
+
+    def __len__(self) -> int:
+        return len(self.zones)
+
+    def add(self, zone: TriggerZone) -> NoReturn:
+        """Adds a zone. It starts noticing objects on the next update"""
+        self.zones[zone] = self._next_order
+        self._next_order += 1
+        self._tree = None
+
+    def remove(self, zone: TriggerZone) -> NoReturn:
+        """Removes a zone. Objects inside it don't get exit events"""
+        del self.zones[zone]
+        self._inside = {pair for pair in self._inside if pair[0] is not zone}
+        self._tree = None
+
+    def forget(self, obj: GameObject) -> NoReturn:
+        """Forgets an object removed from the box, removing the zones following it. It doesn't get exit events"""
+        for zone in [zone for zone in self.zones if zone.object is obj]:
+            self.remove(zone)
+        self._inside = {pair for pair in self._inside if pair[1] is not obj}
+
+    def clear(self) -> NoReturn:
+        """Removes every zone"""
+        self.zones.clear()
+        self._inside.clear()
+        self._tree = None
+
+    def zones_at(self, bounds: Bounds) -> List[TriggerZone]:
+        """Gets the zones overlapping the given tile bounds, using the index built by the last update"""
+        x1, y1, x2, y2 = bounds
+        found = []
+        if self._tree is not None:
+            for zone, zone_y1, zone_y2 in self._tree.query(x1, x2):
+                if zone_y1 <= y2 and y1 <= zone_y2:
+                    found.append(zone)
+        for zone in self._moving:
+            zone_x1, zone_y1, zone_x2, zone_y2 = zone.tile_bounds()
+            if zone_x1 <= x2 and x1 <= zone_x2 and zone_y1 <= y2 and y1 <= zone_y2:
+                found.append(zone)
+        return found
+
+    def update(self, objects: Iterable[GameObject], window_rect: tuple) -> List[ZoneEvent]:
+        """Finds the zones every moving object is in, processing the triggers of the events this causes
+
+        Events come exits first, then entries, then stays, each sorted by zone and object so the order is stable
+
+        :param window_rect: Current window rectangle. The index is rebuilt whenever it changes
+        :return: The events of this tick
+        """
+        if not self.zones:
+            return []
+        self.prepare(window_rect)
+
+        inside = set()
+        for obj in objects:
+            if obj.static:
+                continue
+            for zone in self.zones_at(obj.tile_bounds()):
+                if zone.object is not obj and obj.in_collision_mask(zone.mask):
+                    inside.add((zone, obj))
+
+        def order(pair: Tuple[TriggerZone, GameObject]) -> Tuple[int, int]:
+            return self.zones[pair[0]], pair[1].handle
+
+        events = [ZoneEvent(ZONE_EXIT, zone, obj) for zone, obj in sorted(self._inside - inside, key=order)]
+        events += [ZoneEvent(ZONE_ENTER, zone, obj) for zone, obj in sorted(inside - self._inside, key=order)]
+        events += [ZoneEvent(ZONE_STAY, zone, obj) for zone, obj in sorted(inside & self._inside, key=order)]
+        self._inside = inside
+
+        for event in events:
+            zone = event.zone
+            if event.kind == ZONE_ENTER:
+                if zone.triggers is not None:
+                    zone.triggers.process()
+            elif event.kind == ZONE_EXIT:
+                if zone.triggers is not None:
+                    zone.triggers.process_end()
+            elif zone.stay_triggers is not None:
+                zone.stay_triggers.process()
+        return events
+
+    def prepare(self, window_rect: tuple) -> NoReturn:
+        """Builds the index for the window rectangle, unless it is up to date"""
+        if self._tree is None or self._indexed_rect != window_rect:
+            self._rebuild(window_rect)
+
+    def _rebuild(self, window_rect: tuple) -> NoReturn:
+        """Builds the interval tree from the zones that don't move"""
+        intervals = []
+        self._moving = []
+        for zone in self.zones:
+            if zone.moving:
+                self._moving.append(zone)
+                continue
+            x1, y1, x2, y2 = zone.tile_bounds()
+            intervals.append((x1, x2, (zone, y1, y2)))
+        self._tree = IntervalTree(intervals)
+        self._indexed_rect = window_rect
@@ -0,0 +1,4 @@
+import os
+
+# Tests don't need a real window: use the headless window manager unless told otherwise
+os.environ.setdefault("NARWHALS_HEADLESS", "1")
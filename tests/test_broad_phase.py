@@ -0,0 +1,39 @@
+"""The broad phase of the box only prunes pairs the narrow phase would never find touching"""
+
+import pytest
+
+from src.datatypes.edge_index import EdgeIndex
+from src.datatypes.triggers import Triggers
+from src.datatypes.vector import window_manager
+from src.levels import Mix, generate_level
+
+
+@pytest.fixture(scope="module", autouse=True)
+def headless_window() -> None:
+    """Reads the (stand-in) window, which vectors need to resolve"""
+    window_manager.update()
+
+
+def test_edge_index_query() -> None:
+    """Items are found by any of their edges, on either axis"""
+    index = EdgeIndex([("a", (0, 0, 2, 1)), ("b", (5, 5, 3, 2)), ("c", (10, 0, -3, 1))])
+    assert index.query(1, 20, 3, 30) == {"a"}  # right edge of a
+    assert index.query(20, 6, 30, 7) == {"b"}  # bottom edge of b
+    assert index.query(6.5, 20, 7.5, 30) == {"c"}  # negative width, the right edge is left of the left one
+    assert index.query(3, 3, 2, 2) == set()
+    assert len(index) == 3
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_candidates_find_every_contact(seed: int) -> None:
+    """Every object touches the same objects, in the same order, as when it is tested against every object"""
+    box = generate_level(60, seed=seed, mix=Mix(relative=0), density=20)
+    for obj in box.objects[::4]:  # some of them are sensors
+        obj.triggers = Triggers([])
+        box.sensors.add(obj)
+    rects, candidates = box._broad_phase()
+    for obj in box.objects:
+        expected = box._narrow_phase(obj, box.objects, rects)
+        if obj.static and obj not in box.sensors.sensors:  # only its contacts with sensors matter
+            expected = [contact for contact in expected if contact[2] in box.sensors.sensors]
+        assert box._narrow_phase(obj, candidates[obj], rects) == expected
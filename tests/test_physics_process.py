@@ -0,0 +1,30 @@
+"""A PhysicsProcess whose worker dies must say so, instead of never publishing another tick"""
+
+import pytest
+
+from src.box import BoxState
+from src.datatypes.vector import window_manager
+from src.physics_process import PhysicsProcess
+
+
+@pytest.fixture(scope="module", autouse=True)
+def headless_window() -> None:
+    """Reads the (stand-in) window, which vectors need to resolve"""
+    window_manager.update()
+
+
+def build_broken_level() -> BoxState:
+    """Fails to build, in the worker"""
+    raise ValueError("broken level")
+
+
+def test_sync_raises_when_the_worker_dies() -> None:
+    """sync() raises the exception the worker died with"""
+    physics = PhysicsProcess(build_broken_level, BoxState())
+    physics.start()
+    try:
+        physics.process.join(timeout=60)
+        with pytest.raises(RuntimeError, match="ValueError: broken level"):
+            physics.sync()
+    finally:
+        physics.stop()
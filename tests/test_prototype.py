@@ -0,0 +1,62 @@
+"""Copies of levels made by LevelPrototype must not share anything that changes while a level is played"""
+
+import pytest
+
+from src.box import BoxState
+from src.datatypes import Vector
+from src.datatypes.textures import SolidTexture
+from src.datatypes.triggers import ForceTrigger, Triggers
+from src.datatypes.vector import window_manager
+from src.levels.objects.kinematic import FallingObject
+from src.levels.objects.static import Wall
+from src.levels.prototype import LevelPrototype
+from src.zones import TriggerZone
+
+
+@pytest.fixture(scope="module", autouse=True)
+def headless_window() -> None:
+    """Reads the (stand-in) window, which vectors need to resolve"""
+    window_manager.update()
+
+
+def build() -> BoxState:
+    """A button pushing a ball, and a zone pushing the ball back"""
+    ball = FallingObject(position=Vector(5, 2), size=Vector(1, 1))
+    button = Wall(position=Vector(2, 8), size=Vector(3, 1), triggers=Triggers([ForceTrigger(ball, Vector(1, 0))]))
+    for obj in (ball, button):
+        obj.texture = SolidTexture(char="#", colour=1, obj=obj)
+    zone = TriggerZone(Vector(20, 0), Vector(5, 10), triggers=Triggers([ForceTrigger(ball, Vector(-1, 0))]))
+    return BoxState(initial_objects=[ball, button], zones=[zone])
+
+
+def copied_targets(box: BoxState) -> tuple:
+    """Gets (ball, button, target of the button's trigger, target of the zone's trigger) of a level from build()"""
+    ball, button = box.objects
+    (zone,) = box.zones.zones
+    return ball, button, button.triggers.triggers[0].target, zone.triggers.triggers[0].target
+
+
+def test_triggers_target_copies() -> None:
+    """Triggers are copied along with the level, and act on the copy's objects instead of the template's"""
+    prototype = LevelPrototype(build)
+    template_button = prototype.template.objects[1]
+    ball, button, button_target, zone_target = copied_targets(prototype.instantiate())
+
+    assert button.triggers is not template_button.triggers
+    assert button_target is ball
+    assert zone_target is ball
+
+
+def test_copies_are_independent() -> None:
+    """Two copies of a level share no triggers, and the sensors of each are registered with its own box"""
+    prototype = LevelPrototype(build)
+    first = prototype.instantiate()
+    second = prototype.instantiate()
+    first_ball, first_button, first_target, _ = copied_targets(first)
+    second_ball, second_button, second_target, _ = copied_targets(second)
+
+    assert first_target is first_ball
+    assert second_target is second_ball
+    assert first_button in first.sensors.sensors
+    assert second_button in second.sensors.sensors
+    assert second_button not in first.sensors.sensors
@@ -0,0 +1,164 @@
+"""Golden images of the shapes SolidTexture draws
+
+Each image is a 16x10 grid, "#" where the texture has a tile. Lines are Bresenham lines between the tiles containing
+their ends, and circles are midpoint circles of the rounded radius, halved vertically. Tiles left of or above the grid
+stay off it
+"""
+
+import pytest
+
+from src.datatypes import Vector
+from src.datatypes.shape import Shape
+from src.datatypes.textures import SolidTexture
+from src.datatypes.vector import window_manager
+
+WIDTH = 16
+HEIGHT = 10
+
+
+@pytest.fixture(scope="module", autouse=True)
+def headless_window() -> None:
+    """Reads the (stand-in) window, which vectors need to resolve"""
+    window_manager.update()
+
+
+def draw(shape: Shape, position: Vector, size: Vector) -> str:
+    """Renders a solid texture and returns its tiles on the grid as a string
+
+    Tiles off the grid are dropped, like the compositor drops tiles off the screen. Tiles drawn twice fail the test
+    """
+    buffer = SolidTexture(char="#", colour=1).render_at(position, size, 0, shape)
+    tiles = [(x, y) for x, y, _, _ in buffer]
+    assert len(tiles) == len(set(tiles)), "tiles drawn more than once"
+    rows = [["."] * WIDTH for _ in range(HEIGHT)]
+    for x, y in tiles:
+        if 0 <= x < WIDTH and 0 <= y < HEIGHT:
+            rows[y][x] = "#"
+    return "\n".join("".join(row) for row in rows)
+
+
+def image(*rows: str) -> str:
+    """Joins the rows of a golden image, padding it with empty rows to the full height"""
+    return "\n".join(rows + ("." * WIDTH,) * (HEIGHT - len(rows)))
+
+
+def test_rect() -> None:
+    """A rectangle snaps its corner to the tile grid"""
+    assert draw(Shape.Rectangle, Vector(1.4, 1.6), Vector(6, 3)) == image(
+        "................",
+        "................",
+        ".######.........",
+        ".######.........",
+        ".######.........",
+    )
+
+
+def test_line_shallow() -> None:
+    """A line closer to horizontal, one run of tiles per row"""
+    assert draw(Shape.Line, Vector(1, 1), Vector(14, 5)) == image(
+        "................",
+        ".##.............",
+        "...###..........",
+        "......####......",
+        "..........###...",
+        ".............##.",
+    )
+
+
+def test_line_steep() -> None:
+    """A line closer to vertical, one tile per row"""
+    assert draw(Shape.Line, Vector(12, 0), Vector(9, 9)) == image(
+        "............#...",
+        "............#...",
+        "...........#....",
+        "...........#....",
+        "...........#....",
+        "..........#.....",
+        "..........#.....",
+        "..........#.....",
+        ".........#......",
+        ".........#......",
+    )
+
+
+def test_line_float_reversed() -> None:
+    """A line between fractional points, drawn from right to left. The ends are on the tiles containing them"""
+    assert draw(Shape.Line, Vector(14.6, 8.3), Vector(0.2, 2.7)) == image(
+        "................",
+        "................",
+        "##..............",
+        "..##............",
+        "....##..........",
+        "......###.......",
+        ".........##.....",
+        "...........##...",
+        ".............##.",
+    )
+
+
+def test_line_off_the_grid() -> None:
+    """A line starting left of and above the grid. Its tiles there stay off the grid"""
+    assert draw(Shape.Line, Vector(-3.2, -0.4), Vector(5, 3)) == image(
+        "................",
+        "##..............",
+        "..##............",
+        "....##..........",
+    )
+
+
+def test_circle() -> None:
+    """A circle of even radius, squashed vertically as tiles are twice as high as wide"""
+    assert draw(Shape.Circle, Vector(7, 5), Vector(8, 8)) == image(
+        "................",
+        "................",
+        "................",
+        ".....#####......",
+        "....#######.....",
+        "....#######.....",
+        ".....#####......",
+    )
+
+
+def test_circle_large() -> None:
+    """A bigger circle"""
+    assert draw(Shape.Circle, Vector(7, 5), Vector(12, 12)) == image(
+        "................",
+        "................",
+        "....#######.....",
+        "..###########...",
+        "..###########...",
+        "..###########...",
+        "..###########...",
+        "....#######.....",
+    )
+
+
+def test_circle_float() -> None:
+    """A circle of fractional radius off the tile grid. The radius is rounded (2.5 to 2) and the centre floored"""
+    assert draw(Shape.Circle, Vector(7.5, 4.6), Vector(5, 5)) == image(
+        "................",
+        "................",
+        "................",
+        "......###.......",
+        "......###.......",
+    )
+
+
+def test_circle_left_of_the_grid() -> None:
+    """Tiles of a circle centred left of column 0 stay left of it, instead of being truncated onto it"""
+    assert draw(Shape.Circle, Vector(-0.5, 4), Vector(6, 6)) == image(
+        "................",
+        "................",
+        "#...............",
+        "##..............",
+        "##..............",
+        "#...............",
+    )
+    assert draw(Shape.Circle, Vector(0.5, 4), Vector(6, 6)) == image(
+        "................",
+        "................",
+        "##..............",
+        "###.............",
+        "###.............",
+        "##..............",
+    )
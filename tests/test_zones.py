@@ -0,0 +1,34 @@
+"""Zones forget the objects removed from their box"""
+
+import pytest
+
+from src.box import BoxState
+from src.datatypes import Vector
+from src.datatypes.vector import window_manager
+from src.levels.objects.kinematic import FallingObject
+from src.zones import ZONE_ENTER, TriggerZone
+
+
+@pytest.fixture(scope="module", autouse=True)
+def headless_window() -> None:
+    """Reads the (stand-in) window, which vectors need to resolve"""
+    window_manager.update()
+
+
+def test_removed_objects_leave_no_stale_pairs() -> None:
+    """Objects removed while inside a zone are dropped from it, and so is a zone following a removed object"""
+    first = FallingObject(position=Vector(5, 5), size=Vector(1, 1))
+    second = FallingObject(position=Vector(7, 5), size=Vector(1, 1))
+    zone = TriggerZone(Vector(0, 0), Vector(20, 20))
+    follower = TriggerZone(obj=second)
+    box = BoxState(initial_objects=[first, second], zones=[zone, follower])
+    events = box.zones.update(box.objects, window_manager.current_rect)
+    assert [(event.kind, event.body) for event in events if event.zone is zone] == [
+        (ZONE_ENTER, first),
+        (ZONE_ENTER, second),
+    ]
+
+    box.remove_object(first.handle)
+    box.remove_object(second.handle)
+    assert box.zones.update(box.objects, window_manager.current_rect) == []
+    assert list(box.zones.zones) == [zone]